@@ -1,4 +1,4 @@
-import serve
-
-if __name__ == "__main__":
-    serve.be_run()
+import serve
+
+if __name__ == "__main__":
+    serve.be_run()
@@ -1,224 +1,426 @@
-import uuid
-import json
-import logging
-from pymongo import MongoClient
-from be.model import error
-from be.model.user import User  # 导入用户类用于 Token 验证
-
-
-class Buyer:
-    def __init__(self):
-        # 连接本地 MongoDB（默认端口 27017）
-        self.client = MongoClient('mongodb://localhost:27017/')
-        self.db = self.client['bookstore']  # 使用 bookstore 数据库
-
-        # 初始化集合（对应原 SQL 表）
-        self.store_col = self.db['store']  # 店铺库存集合
-        self.order_col = self.db['new_order']  # 订单主集合
-        self.order_detail_col = self.db['new_order_detail']  # 订单详情集合
-        self.user_col = self.db['user']  # 用户集合
-        self.user_store_col = self.db['user_store']  # 用户-店铺关联集合
-
-        # 初始化 User 实例用于 Token 验证
-        self.user = User()
-
-    # 辅助方法：检查用户是否存在
-    def user_id_exist(self, user_id: str) -> bool:
-        return self.user_col.find_one({'user_id': user_id}) is not None
-
-    # 辅助方法：检查店铺是否存在
-    def store_id_exist(self, store_id: str) -> bool:
-        return self.user_store_col.find_one({'store_id': store_id}) is not None
-
-    def new_order(
-            self, user_id: str, store_id: str, id_and_count: [(str, int)]
-    ) -> (int, str, str):
-        order_id = ""
-        try:
-            # 验证用户存在性
-            if not self.user_id_exist(user_id):
-                return error.error_non_exist_user_id(user_id) + (order_id,)
-
-            # 验证店铺存在性
-            if not self.store_id_exist(store_id):
-                return error.error_non_exist_store_id(store_id) + (order_id,)
-
-            # 生成唯一订单 ID
-            order_id = f"{user_id}_{store_id}_{uuid.uuid1().hex}"
-
-            # 检查并扣减库存，同时准备订单详情
-            order_details = []
-            for book_id, count in id_and_count:
-                # 查询图书库存
-                book = self.store_col.find_one({
-                    'store_id': store_id,
-                    'book_id': book_id
-                })
-                if not book:
-                    return error.error_non_exist_book_id(book_id) + (order_id,)
-
-                # 检查库存是否充足
-                if book['stock_level'] < count:
-                    return error.error_stock_level_low(book_id) + (order_id,)
-
-                # 扣减库存（原子操作，避免并发问题）
-                result = self.store_col.update_one(
-                    {
-                        'store_id': store_id,
-                        'book_id': book_id,
-                        'stock_level': {'$gte': count}  # 确保扣减前库存充足
-                    },
-                    {'$inc': {'stock_level': -count}}
-                )
-                if result.modified_count == 0:
-                    return error.error_stock_level_low(book_id) + (order_id,)
-
-                # 准备订单详情
-                book_info = json.loads(book['book_info'])
-                order_details.append({
-                    'order_id': order_id,
-                    'book_id': book_id,
-                    'count': count,
-                    'price': book_info.get('price', 0)
-                })
-
-            # 插入订单详情
-            if order_details:
-                self.order_detail_col.insert_many(order_details)
-
-            # 插入订单主记录（状态初始为 'unpaid'）
-            self.order_col.insert_one({
-                'order_id': order_id,
-                'store_id': store_id,
-                'user_id': user_id,
-                'status': 'unpaid'
-            })
-
-            return 200, "ok", order_id
-
-        except Exception as e:
-            logging.error(f"530, {str(e)}")
-            return 530, f"{str(e)}", ""
-
-    def payment(self, user_id: str, password: str, order_id: str) -> (int, str):
-        try:
-            # 查询订单
-            order = self.order_col.find_one({'order_id': order_id})
-            if not order:
-                return error.error_invalid_order_id(order_id)
-
-            # 验证订单状态为未付款
-            if order['status'] != 'unpaid':
-                return error.error_invalid_order_status(order_id, 'unpaid')
-
-            # 验证订单归属
-            buyer_id = order['user_id']
-            if buyer_id != user_id:
-                return error.error_authorization_fail()
-
-            # 验证买家密码
-            buyer = self.user_col.find_one({'user_id': buyer_id})
-            if not buyer:
-                return error.error_non_exist_user_id(buyer_id)
-            if buyer['password'] != password:
-                return error.error_authorization_fail()
-
-            # 查询店铺对应的卖家
-            store = self.user_store_col.find_one({'store_id': order['store_id']})
-            if not store:
-                return error.error_non_exist_store_id(order['store_id'])
-            seller_id = store['user_id']
-
-            # 验证卖家存在
-            if not self.user_id_exist(seller_id):
-                return error.error_non_exist_user_id(seller_id)
-
-            # 计算订单总金额
-            details = self.order_detail_col.find({'order_id': order_id})
-            total_price = sum(d['count'] * d['price'] for d in details)
-
-            # 验证买家余额充足
-            if buyer['balance'] < total_price:
-                return error.error_not_sufficient_funds(order_id)
-
-            # 扣减买家余额（原子操作）
-            buyer_update = self.user_col.update_one(
-                {
-                    'user_id': buyer_id,
-                    'balance': {'$gte': total_price}  # 确保扣减前余额充足
-                },
-                {'$inc': {'balance': -total_price}}
-            )
-            if buyer_update.modified_count == 0:
-                return error.error_not_sufficient_funds(order_id)
-
-            # 增加卖家余额
-            self.user_col.update_one(
-                {'user_id': seller_id},
-                {'$inc': {'balance': total_price}}
-            )
-
-            # 更新订单状态为已付款
-            self.order_col.update_one(
-                {'order_id': order_id},
-                {'$set': {'status': 'paid'}}
-            )
-
-            return 200, "ok"
-
-        except Exception as e:
-            logging.error(f"530, {str(e)}")
-            return 530, f"{str(e)}"
-
-    def add_funds(self, user_id: str, password: str, add_value: int) -> (int, str):
-        try:
-            # 验证用户存在且密码正确
-            user = self.user_col.find_one({
-                'user_id': user_id,
-                'password': password
-            })
-            if not user:
-                return error.error_authorization_fail()
-
-            # 增加余额
-            self.user_col.update_one(
-                {'user_id': user_id},
-                {'$inc': {'balance': add_value}}
-            )
-
-            return 200, "ok"
-
-        except Exception as e:
-            logging.error(f"530, {str(e)}")
-            return 530, f"{str(e)}"
-
-    def receive_order(self, user_id: str, order_id: str, token: str) -> (int, str):
-        try:
-            # 验证 Token 有效性
-            if not self.user.check_token(token, user_id):
-                return error.error_authorization_fail()
-
-            # 查询订单
-            order = self.order_col.find_one({'order_id': order_id})
-            if not order:
-                return error.error_invalid_order_id(order_id)
-
-            # 验证订单归属
-            if order['user_id'] != user_id:
-                return error.error_authorization_fail()
-
-            # 验证订单状态为已发货
-            if order['status'] != 'shipped':
-                return error.error_order_not_shipped(order_id)
-
-            # 更新订单状态为已收货
-            self.order_col.update_one(
-                {'order_id': order_id},
-                {'$set': {'status': 'received'}}
-            )
-
-            return 200, "ok"
-
-        except Exception as e:
-            logging.error(f"530, {str(e)}")
-            return 530, f"{str(e)}"
\ No newline at end of file
+import uuid
+import json
+import time
+import logging
+from pymongo import UpdateOne
+from pymongo.errors import BulkWriteError
+from be.model import error
+from be.model.store import get_db
+from be.model.transaction import (
+    TransactionAbort, order_transaction_enabled, run_in_transaction
+)
+from be.model.user import User, password_cache  # 导入用户类用于 Token 验证
+from be.model.order_state import OrderStateMachine, STATUS_UNPAID
+from be.model.order import schedule_order_expiry, cancel_order_expiry
+
+
+DUPLICATE_KEY_CODE = 11000
+
+
+class Buyer:
+    def __init__(self):
+        # 复用进程共享的 MongoDB 连接池
+        self.db = get_db()
+
+        # 初始化集合（对应原 SQL 表）
+        self.store_col = self.db['store']  # 店铺库存集合
+        self.order_col = self.db['new_order']  # 订单主集合
+        self.order_detail_col = self.db['new_order_detail']  # 订单详情集合
+        self.user_col = self.db['user']  # 用户集合
+        self.user_store_col = self.db['user_store']  # 用户-店铺关联集合
+
+        # 初始化 User 实例用于 Token 验证
+        self.user = User()
+        self.state = OrderStateMachine(self.order_col)
+
+    # 辅助方法：检查用户是否存在
+    def user_id_exist(self, user_id: str) -> bool:
+        return self.user_col.find_one({'user_id': user_id}) is not None
+
+    # 辅助方法：检查店铺是否存在
+    def store_id_exist(self, store_id: str) -> bool:
+        return self.user_store_col.find_one({'store_id': store_id}) is not None
+
+    def _fetch_store_books(self, store_id: str, book_ids: list, session=None) -> dict:
+        """批量查询店铺库存记录，返回 book_id -> 文档"""
+        cursor = self.store_col.find(
+            {'store_id': store_id, 'book_id': {'$in': book_ids}},
+            {'_id': 0, 'book_id': 1, 'stock_level': 1, 'price': 1},
+            session=session
+        )
+        books = {book['book_id']: book for book in cursor}
+
+        # 兼容尚未迁移的旧文档（book_info 为 JSON 字符串、无顶层 price）
+        legacy_ids = [book_id for book_id, book in books.items() if 'price' not in book]
+        if legacy_ids:
+            for legacy in self.store_col.find(
+                {'store_id': store_id, 'book_id': {'$in': legacy_ids}},
+                {'_id': 0, 'book_id': 1, 'book_info': 1},
+                session=session
+            ):
+                book_info = legacy['book_info']
+                if isinstance(book_info, str):
+                    book_info = json.loads(book_info)
+                books[legacy['book_id']]['price'] = book_info.get('price') or 0
+        return books
+
+    @staticmethod
+    def _check_stock(books: dict, book_counts: dict) -> (int, str):
+        """校验订单各行图书存在且库存充足"""
+        for book_id, count in book_counts.items():
+            book = books.get(book_id)
+            if not book:
+                return error.error_non_exist_book_id(book_id)
+            if book['stock_level'] < count:
+                return error.error_stock_level_low(book_id)
+        return 200, "ok"
+
+    @staticmethod
+    def _build_order(
+            order_id: str, user_id: str, store_id: str, seller_id: str,
+            books: dict, book_counts: dict
+    ) -> (list, dict):
+        """
+        构造订单详情和订单主记录（状态初始为 'unpaid'）。
+        主记录冗余保存订单行、总金额和卖家 ID（与 Order.create_order 的 books 结构一致），
+        付款时只需读取这一条文档。
+        """
+        order_details = []
+        order_books = []
+        total_price = 0
+        for book_id, count in book_counts.items():
+            price = books[book_id]['price']
+            order_details.append({
+                'order_id': order_id,
+                'book_id': book_id,
+                'count': count,
+                'price': price
+            })
+            order_books.append({
+                'book_id': book_id,
+                'quantity': count,
+                'price': price
+            })
+            total_price += count * price
+        order = {
+            'order_id': order_id,
+            'store_id': store_id,
+            'seller_id': seller_id,
+            'user_id': user_id,
+            'books': order_books,
+            'total_price': total_price,
+            'status': STATUS_UNPAID,
+            'create_time': time.time()
+        }
+        return order_details, order
+
+    def _reserve_stock(self, store_id: str, book_counts: dict) -> (int, str):
+        """
+        一次有序 bulk_write 扣减订单所有行的库存，每行过滤条件带 stock_level >= count。
+        过滤不匹配时 upsert 会按 (store_id, book_id) 插入新行：行已存在（库存不足）则违反唯一索引，
+        有序执行在该行停止，其前各行即为已扣减的行；行不存在（图书已被删除）则插入的行可由 upserted_ids 识别。
+        只回补实际扣减的行，并删除误插入的行，不在库存文档上保留任何标记。
+        """
+        book_ids = list(book_counts)
+        requests = [
+            UpdateOne(
+                {'store_id': store_id, 'book_id': book_id, 'stock_level': {'$gte': count}},
+                {'$inc': {'stock_level': -count}},
+                upsert=True
+            )
+            for book_id, count in book_counts.items()
+        ]
+        failed = None  # 第一个库存不足的行
+        write_error = None
+        try:
+            result = self.store_col.bulk_write(requests, ordered=True)
+            applied = len(requests)
+            upserted = result.upserted_ids
+        except BulkWriteError as e:
+            error_info = e.details['writeErrors'][0]
+            applied = error_info['index']
+            upserted = {u['index']: u['_id'] for u in e.details.get('upserted', [])}
+            if error_info['code'] == DUPLICATE_KEY_CODE:
+                failed = applied
+            else:
+                write_error = e
+
+        if failed is None and not upserted and write_error is None:
+            return 200, "ok"
+
+        # 回补已扣减的行，删除因图书不存在而插入的行
+        if upserted:
+            self.store_col.delete_many({'_id': {'$in': list(upserted.values())}})
+        reserved = {book_ids[i]: book_counts[book_ids[i]] for i in range(applied) if i not in upserted}
+        if reserved:
+            self._release_stock(store_id, reserved)
+        if write_error is not None:
+            raise write_error
+        if upserted and (failed is None or min(upserted) < failed):
+            return error.error_non_exist_book_id(book_ids[min(upserted)])
+        return error.error_stock_level_low(book_ids[failed])
+
+    def _release_stock(self, store_id: str, book_counts: dict) -> None:
+        """回补库存（_reserve_stock 的补偿操作）"""
+        self.store_col.bulk_write([
+            UpdateOne(
+                {'store_id': store_id, 'book_id': book_id},
+                {'$inc': {'stock_level': count}}
+            )
+            for book_id, count in book_counts.items()
+        ], ordered=False)
+
+    def new_order(
+            self, user_id: str, store_id: str, id_and_count: [(str, int)]
+    ) -> (int, str, str):
+        order_id = ""
+        try:
+            # 验证用户存在性
+            if not self.user_id_exist(user_id):
+                return error.error_non_exist_user_id(user_id) + (order_id,)
+
+            # 验证店铺存在性（同时取出店主，冗余到订单上）
+            store = self.user_store_col.find_one({'store_id': store_id}, {'_id': 0, 'user_id': 1})
+            if not store:
+                return error.error_non_exist_store_id(store_id) + (order_id,)
+            seller_id = store['user_id']
+
+            # 生成唯一订单 ID
+            order_id = f"{user_id}_{store_id}_{uuid.uuid1().hex}"
+
+            # 合并同一本书的多行购买数量
+            book_counts = {}
+            for book_id, count in id_and_count:
+                book_counts[book_id] = book_counts.get(book_id, 0) + count
+
+            # 事务模式：库存扣减与订单写入在同一个多文档事务中完成
+            if order_transaction_enabled():
+                result = run_in_transaction(
+                    lambda session: self._place_order_in_transaction(
+                        session, order_id, user_id, store_id, seller_id, book_counts
+                    )
+                )
+                if result[0] == 200:
+                    schedule_order_expiry(order_id, time.time())
+                return result
+
+            # 一次 $in 查询取回所有订单行对应的库存记录
+            books = self._fetch_store_books(store_id, list(book_counts))
+            code, message = self._check_stock(books, book_counts)
+            if code != 200:
+                return code, message, order_id
+
+            # 一次有序 bulk_write 扣减全部库存，某行失败时回补其前已扣减的行
+            if book_counts:
+                code, message = self._reserve_stock(store_id, book_counts)
+                if code != 200:
+                    return code, message, order_id
+
+            order_details, order = self._build_order(
+                order_id, user_id, store_id, seller_id, books, book_counts
+            )
+            try:
+                # 插入订单详情
+                if order_details:
+                    self.order_detail_col.insert_many(order_details)
+
+                # 插入订单主记录
+                self.order_col.insert_one(order)
+            except Exception:
+                # 订单写入失败：回补已扣减的库存，避免库存泄漏
+                if book_counts:
+                    self._release_stock(store_id, book_counts)
+                raise
+            schedule_order_expiry(order_id, order['create_time'])
+
+            return 200, "ok", order_id
+
+        except Exception as e:
+            logging.error(f"530, {str(e)}")
+            return 530, f"{str(e)}", ""
+
+    def _place_order_in_transaction(
+            self, session, order_id: str, user_id: str, store_id: str, seller_id: str,
+            book_counts: dict
+    ) -> (int, str, str):
+        """事务内下单：任一步失败整体回滚，无需补偿"""
+        books = self._fetch_store_books(store_id, list(book_counts), session=session)
+        code, message = self._check_stock(books, book_counts)
+        if code != 200:
+            raise TransactionAbort((code, message, order_id))
+
+        if book_counts:
+            result = self.store_col.bulk_write([
+                UpdateOne(
+                    {
+                        'store_id': store_id,
+                        'book_id': book_id,
+                        'stock_level': {'$gte': count}
+                    },
+                    {'$inc': {'stock_level': -count}}
+                )
+                for book_id, count in book_counts.items()
+            ], ordered=True, session=session)
+            if result.modified_count < len(book_counts):
+                raise TransactionAbort(
+                    self._unreserved_book(session, store_id, books, book_counts) + (order_id,)
+                )
+
+        order_details, order = self._build_order(
+            order_id, user_id, store_id, seller_id, books, book_counts
+        )
+        if order_details:
+            self.order_detail_col.insert_many(order_details, session=session)
+        self.order_col.insert_one(order, session=session)
+        return 200, "ok", order_id
+
+    def _unreserved_book(self, session, store_id: str, books: dict, book_counts: dict) -> (int, str):
+        """
+        事务内定位未被扣减的订单行：事务读到自己的写入，库存仍等于扣减前快照的行即为失败行，
+        与非事务路径一样区分图书已被删除和库存不足。
+        """
+        current = {
+            book['book_id']: book['stock_level'] for book in self.store_col.find(
+                {'store_id': store_id, 'book_id': {'$in': list(book_counts)}},
+                {'_id': 0, 'book_id': 1, 'stock_level': 1},
+                session=session
+            )
+        }
+        for book_id in book_counts:
+            if book_id not in current:
+                return error.error_non_exist_book_id(book_id)
+            if current[book_id] == books[book_id]['stock_level']:
+                return error.error_stock_level_low(book_id)
+        return error.error_stock_level_low(next(iter(book_counts)))
+
+    def _legacy_order_totals(self, order: dict) -> (int, str, int, str):
+        """旧订单（未回填 total_price/seller_id）按订单详情计算总额并查询卖家"""
+        store = self.user_store_col.find_one({'store_id': order['store_id']})
+        if not store:
+            return error.error_non_exist_store_id(order['store_id']) + (0, "")
+        details = self.order_detail_col.find({'order_id': order['order_id']})
+        total_price = sum(d['count'] * d['price'] for d in details)
+        return 200, "ok", total_price, store['user_id']
+
+    def payment(self, user_id: str, password: str, order_id: str) -> (int, str):
+        try:
+            # 查询订单（订单上已冗余总金额和卖家 ID）
+            order = self.order_col.find_one(
+                {'order_id': order_id},
+                {'_id': 0, 'order_id': 1, 'user_id': 1, 'store_id': 1,
+                 'seller_id': 1, 'total_price': 1, 'status': 1}
+            )
+            if not order:
+                return error.error_invalid_order_id(order_id)
+
+            # 验证订单状态为未付款
+            if order['status'] != STATUS_UNPAID:
+                return error.error_invalid_order_status(order_id, STATUS_UNPAID)
+
+            # 验证订单归属
+            buyer_id = order['user_id']
+            if buyer_id != user_id:
+                return error.error_authorization_fail()
+
+            total_price = order.get('total_price')
+            seller_id = order.get('seller_id')
+            if total_price is None or seller_id is None:
+                code, message, total_price, seller_id = self._legacy_order_totals(order)
+                if code != 200:
+                    return code, message
+
+            # 扣减买家余额：密码哈希和余额校验放在更新条件中（原子操作）
+            code, message = self._debit_buyer(buyer_id, password, total_price, order_id)
+            if code != 200:
+                return code, message
+
+            # 增加卖家余额
+            seller_update = self.user_col.update_one(
+                {'user_id': seller_id},
+                {'$inc': {'balance': total_price}}
+            )
+            if seller_update.matched_count == 0:
+                self._refund(buyer_id, total_price)
+                return error.error_non_exist_user_id(seller_id)
+
+            # 更新订单状态为已付款（仅当仍为未付款，防止并发重复付款）
+            applied, pre = self.state.apply(order_id, 'pay', user_id=buyer_id)
+            if not applied:
+                self._refund(buyer_id, total_price, seller_id)
+                return self.state.derive_error(pre, order_id, 'pay', user_id=buyer_id)
+            cancel_order_expiry(order_id)
+
+            return 200, "ok"
+
+        except Exception as e:
+            logging.error(f"530, {str(e)}")
+            return 530, f"{str(e)}"
+
+    def _debit_buyer(self, buyer_id: str, password: str, amount: int, order_id: str) -> (int, str):
+        """
+        验证密码并扣款。密码验证命中缓存时只有一次条件更新；
+        更新失败时才查询买家区分错误，缓存的哈希已过时（密码被修改）则读库重新验证一次。
+        """
+        for use_cache in (True, False):
+            code, message, stored, cached = self.user.verify_password(buyer_id, password, use_cache)
+            if code != 200:
+                return code, message
+            buyer_update = self.user_col.update_one(
+                {
+                    'user_id': buyer_id,
+                    'password': stored,
+                    'balance': {'$gte': amount}  # 确保扣减前余额充足
+                },
+                {'$inc': {'balance': -amount}}
+            )
+            if buyer_update.modified_count > 0:
+                return 200, "ok"
+            buyer = self.user_col.find_one({'user_id': buyer_id}, {'password': 1})
+            if not buyer:
+                return error.error_non_exist_user_id(buyer_id)
+            if buyer['password'] == stored:
+                return error.error_not_sufficient_funds(order_id)
+            password_cache.invalidate_group(buyer_id)
+            if not cached:
+                break
+        return error.error_authorization_fail()
+
+    def _refund(self, buyer_id: str, amount: int, seller_id: str = None) -> None:
+        """付款失败时的补偿：退回买家余额，必要时扣回卖家已入账金额"""
+        self.user_col.update_one({'user_id': buyer_id}, {'$inc': {'balance': amount}})
+        if seller_id is not None:
+            self.user_col.update_one({'user_id': seller_id}, {'$inc': {'balance': -amount}})
+
+    def add_funds(self, user_id: str, password: str, add_value: int) -> (int, str):
+        try:
+            # 密码哈希作为更新条件（密码验证命中缓存时只需这一次写入）
+            code, message = self.user.guarded_write(user_id, password, lambda stored: self.user_col.update_one(
+                {'user_id': user_id, 'password': stored},
+                {'$inc': {'balance': add_value}}
+            ).matched_count > 0)
+            if code != 200:
+                return code, message
+
+            return 200, "ok"
+
+        except Exception as e:
+            logging.error(f"530, {str(e)}")
+            return 530, f"{str(e)}"
+
+    def receive_order(self, user_id: str, order_id: str, token: str) -> (int, str):
+        try:
+            # 验证 Token 有效性
+            code, _ = self.user.check_token(user_id, token)
+            if code != 200:
+                return error.error_authorization_fail()
+
+            # 一次条件更新完成 已发货 -> 已收货，失败时由 pre-image 推导错误码
+            applied, pre = self.state.apply(order_id, 'receive', user_id=user_id)
+            if not applied:
+                return self.state.derive_error(pre, order_id, 'receive', user_id=user_id)
+
+            return 200, "ok"
+
+        except Exception as e:
+            logging.error(f"530, {str(e)}")
+            return 530, f"{str(e)}"
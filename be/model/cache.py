@@ -0,0 +1,150 @@
+import threading
+import time
+from collections import OrderedDict
+
+
+class TTLCache:
+    """
+    进程内 TTL + LRU 缓存（线程安全）。
+    每个条目有各自的过期时间；条目数超过 max_entries 时淘汰最久未使用的条目。
+    条目可归属一个分组（如 user_id），便于按分组整体失效。
+    """
+
+    def __init__(self, max_entries: int, default_ttl: float = None):
+        self.max_entries = max_entries
+        self.default_ttl = default_ttl
+        self._lock = threading.Lock()
+        self._data = OrderedDict()  # key -> (expire_at, value, group)
+        self._groups = {}           # group -> set(key)
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+        # 每次失效递增；读库前记下 generation，写入时若已变化则放弃，
+        # 避免“读到旧值 -> 其他线程失效 -> 写入旧值”的竞争
+        self.generation = 0
+
+    def __len__(self):
+        return len(self._data)
+
+    def get(self, key, default=None):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                self.misses += 1
+                return default
+            if entry[0] <= time.monotonic():
+                self._remove(key)
+                self.expirations += 1
+                self.misses += 1
+                return default
+            self._data.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def put(self, key, value, ttl: float = None, group=None, generation: int = None):
+        ttl = self.default_ttl if ttl is None else ttl
+        if ttl is None or ttl <= 0 or self.max_entries <= 0:
+            return
+        with self._lock:
+            if generation is not None and generation != self.generation:
+                return
+            if key in self._data:
+                self._remove(key)
+            self._data[key] = (time.monotonic() + ttl, value, group)
+            if group is not None:
+                self._groups.setdefault(group, set()).add(key)
+            while len(self._data) > self.max_entries:
+                self._remove(next(iter(self._data)))
+                self.evictions += 1
+
+    def invalidate(self, key):
+        with self._lock:
+            self.generation += 1
+            if key in self._data:
+                self._remove(key)
+                self.invalidations += 1
+
+    def invalidate_group(self, group):
+        with self._lock:
+            self.generation += 1
+            for key in list(self._groups.get(group, ())):
+                self._remove(key)
+                self.invalidations += 1
+
+    def clear(self):
+        with self._lock:
+            self.generation += 1
+            self._data.clear()
+            self._groups.clear()
+
+    def _remove(self, key):
+        _, _, group = self._data.pop(key)
+        if group is not None:
+            keys = self._groups[group]
+            keys.discard(key)
+            if not keys:
+                del self._groups[group]
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._data),
+                "max_entries": self.max_entries,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "invalidations": self.invalidations,
+            }
+
+
+class SingleFlight:
+    """
+    合并并发的相同请求：同一 key 同时只有一个线程执行 fn，其余线程等待并共享其结果（或异常）。
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls = {}  # key -> [event, result, exception]
+        self.executions = 0
+        self.collapsed = 0
+
+    def do(self, key, fn):
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = [threading.Event(), None, None]
+                self._calls[key] = call
+                self.executions += 1
+            else:
+                self.collapsed += 1
+
+        if not leader:
+            call[0].wait()
+            if call[2] is not None:
+                raise call[2]
+            return call[1]
+
+        try:
+            call[1] = fn()
+        except Exception as e:
+            call[2] = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call[0].set()
+        return call[1]
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {
+                "in_flight": len(self._calls),
+                "executions": self.executions,
+                "collapsed": self.collapsed,
+            }
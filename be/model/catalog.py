@@ -0,0 +1,106 @@
+import json
+import hashlib
+from pymongo import UpdateOne
+from pymongo.database import Database
+from pymongo.errors import BulkWriteError
+
+# 共享图书目录：描述性字段（书名、简介、目录、图片等）按内容哈希只存一份，
+# 店铺库存行只保留 (store_id, book_id, catalog_id, price, stock_level)。
+CATALOG_COLLECTION = 'catalog'
+
+# 库存行上的字段，其余字段需从 catalog 关联读取
+INVENTORY_FIELDS = ('store_id', 'book_id', 'price', 'stock_level')
+
+
+def split_book_info(book_info: dict) -> (dict, int):
+    """拆分 book_info：price 属于店铺库存，其余为共享的描述性内容"""
+    content = {k: v for k, v in book_info.items() if k != 'price'}
+    return content, book_info.get('price') or 0
+
+
+def content_hash(content: dict) -> str:
+    """描述性内容的规范化 JSON 的 sha256，作为 catalog 文档 _id"""
+    canonical = json.dumps(content, sort_keys=True, ensure_ascii=False, separators=(',', ':'))
+    return hashlib.sha256(canonical.encode()).hexdigest()
+
+
+def catalog_upsert(catalog_id: str, content: dict) -> UpdateOne:
+    """内容寻址写入：相同内容只插入一次，已存在时不做修改"""
+    return UpdateOne(
+        {'_id': catalog_id},
+        {'$setOnInsert': {'book_info': content}},
+        upsert=True
+    )
+
+
+def write_catalog(db: Database, contents: dict) -> int:
+    """
+    批量写入目录文档，contents 为 catalog_id -> 描述性内容（同一批内相同内容自然只写一次），
+    返回新插入的文档数。并发 upsert 同一 _id 产生的重复键错误可以忽略：目录文档已由另一方写入。
+    """
+    if not contents:
+        return 0
+    ops = [catalog_upsert(catalog_id, content) for catalog_id, content in contents.items()]
+    try:
+        return db[CATALOG_COLLECTION].bulk_write(ops, ordered=False).upserted_count
+    except BulkWriteError as e:
+        if any(err['code'] != 11000 for err in e.details['writeErrors']):
+            raise
+        return e.details['nUpserted']
+
+
+def make_inventory_row(store_id: str, book_id: str, book_info: dict, stock_level: int) -> (dict, dict):
+    """构造店铺库存行，并返回需写入 catalog 的描述性内容（_id 即行上的 catalog_id）"""
+    content, price = split_book_info(book_info)
+    catalog_id = content_hash(content)
+    row = {
+        'store_id': store_id,
+        'book_id': book_id,
+        'catalog_id': catalog_id,
+        'price': price,
+        'stock_level': stock_level
+    }
+    return row, content
+
+
+def attach_book_info(db: Database, rows: list, fields: list = None) -> list:
+    """
+    按需关联描述性字段：fields 为空时不访问 catalog；否则用一次 $in 查询取回 rows 引用的目录文档，
+    把 book_info 中请求的字段（'*' 表示全部）合并到各行的 book_info 中。
+    尚未迁移的旧行自带 book_info，直接按 fields 裁剪。
+    """
+    if not fields:
+        return rows
+    catalog_ids = list({row['catalog_id'] for row in rows if row.get('catalog_id')})
+    projection = {'book_info': 1} if '*' in fields else {f'book_info.{f}': 1 for f in fields}
+    contents = {
+        doc['_id']: doc.get('book_info', {})
+        for doc in db[CATALOG_COLLECTION].find({'_id': {'$in': catalog_ids}}, projection)
+    } if catalog_ids else {}
+
+    for row in rows:
+        content = contents.get(row.get('catalog_id'), row.get('book_info') or {})
+        if isinstance(content, str):
+            content = json.loads(content)
+        row['book_info'] = content if '*' in fields else {f: content[f] for f in fields if f in content}
+    return rows
+
+
+def get_store_books(db: Database, store_id: str, book_ids: list = None, fields: list = None) -> list:
+    """
+    读取店铺库存：默认只读精简行（price、stock_level），
+    fields 非空时才关联 catalog 取描述性字段（见 attach_book_info）。
+    """
+    query = {'store_id': store_id}
+    if book_ids:
+        query['book_id'] = {'$in': book_ids}
+    projection = dict.fromkeys(INVENTORY_FIELDS, 1)
+    projection['_id'] = 0
+    if fields:
+        projection['catalog_id'] = 1
+        projection['book_info'] = 1  # 尚未迁移的旧行仍内嵌 book_info
+    rows = list(db['store'].find(query, projection).sort('book_id', 1))
+    attach_book_info(db, rows, fields)
+    for row in rows:
+        row.pop('catalog_id', None)
+    return rows
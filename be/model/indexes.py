@@ -0,0 +1,205 @@
+"""
+索引清单：模型层访问的每个集合需要的索引都在这里声明。
+
+    python -m be.model.indexes apply     # 幂等地创建清单中的索引
+    python -m be.model.indexes explain   # 对已知查询形态执行 explain()，发现 COLLSCAN 时返回非零退出码
+"""
+import argparse
+import logging
+import sys
+from bson import ObjectId
+from pymongo import IndexModel, ASCENDING, DESCENDING, TEXT
+from pymongo.database import Database
+from pymongo.errors import DuplicateKeyError, OperationFailure
+
+# 已存在同名/同键但选项不同的索引（IndexOptionsConflict / IndexKeySpecsConflict）
+INDEX_CONFLICT_CODES = (85, 86)
+
+INDEX_MANIFEST = {
+    'user': [
+        IndexModel([('user_id', ASCENDING)], unique=True, background=True),
+    ],
+    'user_store': [
+        IndexModel([('user_id', ASCENDING), ('store_id', ASCENDING)], unique=True, background=True),
+        # 店铺存在性校验、付款查询店主只按 store_id 查询
+        IndexModel([('store_id', ASCENDING)], background=True),
+    ],
+    'store': [
+        # add_book / new_order 均按 (store_id, book_id) 定位库存
+        IndexModel([('store_id', ASCENDING), ('book_id', ASCENDING)], unique=True, background=True),
+        # price 为 book_info 提升出的顶层字段
+        IndexModel([('price', ASCENDING)], background=True),
+        # pictures 迁移按 catalog_id 改写引用旧目录文档的库存行
+        IndexModel([('catalog_id', ASCENDING)], background=True),
+    ],
+    'books': [
+        IndexModel([('store_id', ASCENDING), ('book_id', ASCENDING)], unique=True, background=True),
+        IndexModel(
+            [('title', TEXT), ('tags', TEXT), ('catalog', TEXT), ('content', TEXT)],
+            name='book_search_index',
+            background=True,
+            weights={'title': 10, 'tags': 5, 'catalog': 3, 'content': 1}
+        ),
+    ],
+    'new_order': [
+        IndexModel([('order_id', ASCENDING)], unique=True, background=True),
+        # 订单历史按 (user_id, create_time, order_id) 键集分页
+        IndexModel(
+            [('user_id', ASCENDING), ('create_time', DESCENDING), ('order_id', DESCENDING)],
+            background=True
+        ),
+        # 超时订单清理按 (status, create_time) 范围扫描
+        IndexModel([('status', ASCENDING), ('create_time', ASCENDING)], background=True),
+    ],
+    'new_order_detail': [
+        IndexModel([('order_id', ASCENDING), ('book_id', ASCENDING)], unique=True, background=True),
+    ],
+    # 以下集合只按 _id 访问，默认的 _id 索引即可满足，列出以便 explain 覆盖其查询形态
+    'catalog': [],         # 共享目录：attach_book_info 按 _id（内容哈希）$in 批量读取
+    'search_sync': [],     # 搜索同步检查点
+    'integrity_job': [],   # 完整性检查检查点
+    'token_revocation': [
+        # 吊销记录在对应令牌过期后自动删除
+        IndexModel([('expire_at', ASCENDING)], expireAfterSeconds=0, background=True),
+    ],
+}
+
+# books 唯一索引依赖完整性检查：启动时不创建，由后台任务扫描确认无重复后再建（见 be.model.integrity）
+DEFERRED_INDEXES = {('books', 'store_id_1_book_id_1')}
+
+# 模型层的已知查询形态：(集合, 过滤条件, 排序)
+QUERY_SHAPES = [
+    ('user', {'user_id': 'u'}, None),
+    ('user_store', {'store_id': 's'}, None),
+    ('user_store', {'user_id': 'u', 'store_id': 's'}, None),
+    ('store', {'store_id': 's', 'book_id': 'b'}, None),
+    ('store', {'store_id': 's', 'book_id': {'$in': ['b1', 'b2']}}, None),
+    # get_store_books 按 book_id 排序读取店铺库存，再按 catalog_id 关联 catalog
+    ('store', {'store_id': 's'}, [('book_id', ASCENDING)]),
+    ('store', {'catalog_id': 'c'}, None),
+    # search_sync 轮询模式按 store._id 高水位分批读取
+    ('store', {'_id': {'$gt': ObjectId('0' * 24), '$lt': ObjectId('f' * 24)}}, [('_id', ASCENDING)]),
+    ('catalog', {'_id': {'$in': ['c1', 'c2']}}, None),
+    ('search_sync', {'_id': 'store_to_books'}, None),
+    ('integrity_job', {'_id': 'books_duplicates'}, None),
+    ('books', {'$text': {'$search': 'k'}}, None),
+    ('books', {'store_id': 's', 'book_id': 'b'}, None),
+    # 完整性检查按 (store_id, book_id) 键集分批扫描
+    (
+        'books',
+        {'$or': [{'store_id': {'$gt': 's'}}, {'store_id': 's', 'book_id': {'$gt': 'b'}}]},
+        [('store_id', ASCENDING), ('book_id', ASCENDING)]
+    ),
+    ('new_order', {'order_id': 'o'}, None),
+    ('new_order', {'user_id': 'u'}, [('create_time', DESCENDING), ('order_id', DESCENDING)]),
+    # get_user_orders 按 cursor 继续翻页（键集 $or；缺少 create_time 的旧订单排在最后）
+    (
+        'new_order',
+        {'user_id': 'u', '$or': [
+            {'create_time': {'$lt': 0}},
+            {'create_time': 0, 'order_id': {'$lt': 'o'}},
+            {'create_time': None}
+        ]},
+        [('create_time', DESCENDING), ('order_id', DESCENDING)]
+    ),
+    (
+        'new_order',
+        {'user_id': 'u', '$or': [{'create_time': None, 'order_id': {'$lt': 'o'}}]},
+        [('create_time', DESCENDING), ('order_id', DESCENDING)]
+    ),
+    # 超时扫描：按 (status, create_time) 分批取消、积压计数、时间轮到期的订单按 id 取消
+    (
+        'new_order',
+        {'status': {'$in': ['unpaid', 1]}, 'create_time': {'$lt': 0}},
+        [('create_time', ASCENDING)]
+    ),
+    (
+        'new_order',
+        {'status': {'$in': ['unpaid', 1]}, 'create_time': {'$lt': 0}, 'order_id': {'$in': ['o1', 'o2']}},
+        None
+    ),
+    ('new_order', {'order_id': {'$in': ['o1', 'o2']}, 'expire_sweep': 's'}, None),
+    # 启动时用全部未付款订单重建时间轮
+    ('new_order', {'status': {'$in': ['unpaid', 1]}}, None),
+    ('new_order_detail', {'order_id': 'o'}, None),
+    ('new_order_detail', {'order_id': {'$in': ['o1', 'o2']}}, None),
+    ('token_revocation', {'expire_at': {'$gt': 0}}, None),
+]
+
+
+def apply_indexes(db: Database, collections: list = None, skip: set = ()) -> list:
+    """
+    幂等地创建清单中的索引（已存在的相同索引不会重建）。
+    collections 限定只处理部分集合；skip 为跳过的 (集合, 索引名)。
+    唯一索引因重复数据创建失败时抛出 DuplicateKeyError；选项冲突只记录日志。
+    返回创建失败的 (集合, 索引名, 错误信息) 列表。
+    """
+    failures = []
+    for collection, models in INDEX_MANIFEST.items():
+        if collections is not None and collection not in collections:
+            continue
+        for model in models:
+            name = model.document['name']
+            if (collection, name) in skip:
+                continue
+            try:
+                db[collection].create_indexes([model])
+            except DuplicateKeyError:
+                logging.error(f"{collection} 集合唯一索引 {name} 创建失败：存在重复记录，需手动处理")
+                raise
+            except OperationFailure as e:
+                if e.code not in INDEX_CONFLICT_CODES:
+                    raise
+                logging.warning(f"{collection} 集合已有与 {name} 冲突的索引，未重建：{str(e)}")
+                failures.append((collection, name, str(e)))
+    return failures
+
+
+def _plan_stages(plan: dict):
+    """遍历查询计划树中的全部 stage"""
+    yield plan.get('stage')
+    for key in ('inputStage', 'queryPlan'):
+        if key in plan:
+            yield from _plan_stages(plan[key])
+    for child in plan.get('inputStages', []):
+        yield from _plan_stages(child)
+
+
+def explain_query_shapes(db: Database) -> list:
+    """对每个已知查询形态执行 explain()，返回 (集合, 过滤条件, 是否 COLLSCAN, stage 列表)"""
+    report = []
+    for collection, query, sort in QUERY_SHAPES:
+        cursor = db[collection].find(query)
+        if sort:
+            cursor = cursor.sort(sort)
+        plan = cursor.explain()['queryPlanner']['winningPlan']
+        stages = [stage for stage in _plan_stages(plan) if stage]
+        report.append((collection, query, 'COLLSCAN' in stages, stages))
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description="bookstore 索引清单工具")
+    parser.add_argument('command', choices=['apply', 'explain'])
+    parser.add_argument('--mongo-uri', default=None)
+    args = parser.parse_args()
+
+    from be.model.store import get_client, DB_NAME, DEFAULT_MONGO_URI
+    db = get_client(args.mongo_uri or DEFAULT_MONGO_URI)[DB_NAME]
+
+    if args.command == 'apply':
+        failures = apply_indexes(db)
+        for collection, name, message in failures:
+            print(f"[CONFLICT] {collection}.{name}: {message}")
+        sys.exit(1 if failures else 0)
+
+    collscans = 0
+    for collection, query, collscan, stages in explain_query_shapes(db):
+        flag = "COLLSCAN" if collscan else "ok"
+        collscans += collscan
+        print(f"[{flag}] {collection} {query} -> {' <- '.join(stages)}")
+    sys.exit(1 if collscans else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,280 @@
+"""
+books 集合数据完整性检查（后台执行，可断点续跑）：
+
+    1. 删除 store_id / book_id 为空的记录（这些记录会导致唯一索引创建失败）
+    2. 按 (store_id, book_id) 索引顺序分批扫描，记录重复组（只记录，不删除）
+    3. 未发现重复时创建启动阶段推迟的 books (store_id, book_id) 唯一索引
+
+唯一索引建成前，扫描依赖任务自建的非唯一索引 integrity_scan（唯一索引建成后删除）。
+
+检查点保存在 integrity_job 集合中，服务重启后从上次扫描到的键继续。
+也可手动执行：python -m be.model.integrity [--restart]
+"""
+import argparse
+import logging
+import threading
+import time
+import traceback
+from pymongo import IndexModel, ASCENDING
+from pymongo.database import Database
+from pymongo.errors import DuplicateKeyError, OperationFailure
+from be.model.indexes import apply_indexes
+
+INTEGRITY_JOB_ENABLED = True       # 服务启动后是否在后台运行完整性检查
+INTEGRITY_BATCH_SIZE = 1000        # 每批扫描的记录数
+INTEGRITY_BATCH_PAUSE = 0.05       # 批次之间的停顿（秒），避免与请求线程争抢数据库
+INTEGRITY_DUPLICATE_SAMPLE = 100   # 检查点中最多保存的重复组数
+
+JOB_COLLECTION = 'integrity_job'
+JOB_ID = 'books_duplicates'
+
+SCAN_INDEX_NAME = 'integrity_scan'
+SCAN_INDEX = IndexModel(
+    [('store_id', ASCENDING), ('book_id', ASCENDING), ('_id', ASCENDING)],
+    name=SCAN_INDEX_NAME, background=True
+)
+
+STATUS_RUNNING = 'running'
+STATUS_COMPLETED = 'completed'
+
+
+def delete_null_keys(db: Database) -> int:
+    """
+    删除 store_id / book_id 为空的 books 记录，返回删除条数。
+    book_id 条件不是索引前缀，指定 integrity_scan 索引只遍历索引键，不逐个读取文档；仍为全量遍历，只在后台任务中执行。
+    """
+    null_deleted = db.books.delete_many({
+        '$or': [
+            {'store_id': {'$in': [None, '']}},
+            {'book_id': {'$in': [None, '']}}
+        ]
+    }, hint=SCAN_INDEX_NAME).deleted_count
+    if null_deleted > 0:
+        logging.warning(f"已删除 {null_deleted} 条 store_id/book_id 为空的无效记录（这些记录会导致索引失败）")
+    return null_deleted
+
+
+class IntegrityJob(threading.Thread):
+    """
+    books 集合完整性检查线程。每批处理完把最后一个键写入检查点，
+    上次未完成时从检查点继续，上次已完成时重新开始一轮。
+    """
+
+    def __init__(
+        self,
+        db: Database,
+        batch_size: int = INTEGRITY_BATCH_SIZE,
+        pause: float = INTEGRITY_BATCH_PAUSE
+    ):
+        super().__init__(name="integrity-job", daemon=True)
+        self.db = db
+        self.batch_size = batch_size
+        self.pause = pause
+        self.job_col = db[JOB_COLLECTION]
+        self._stop_event = threading.Event()
+
+    def run(self):
+        try:
+            self.run_once()
+        except Exception as e:
+            self.job_col.update_one(
+                {'_id': JOB_ID},
+                {'$set': {'error': str(e), 'updated_at': time.time()}}
+            )
+            logging.error(f"完整性检查失败：{str(e)}\n{traceback.format_exc()}")
+
+    def stop(self):
+        self._stop_event.set()
+        self.join()
+
+    def run_once(self, restart: bool = False) -> dict:
+        """执行（或继续）一轮检查，返回最终的检查点文档"""
+        if self._has_unique_index():
+            # 唯一索引已建成时不可能有空键或重复记录，无需扫描
+            self._reset_checkpoint(null_deleted=0)
+            return self._finish(skipped=True)
+
+        checkpoint = self.job_col.find_one({'_id': JOB_ID})
+        if restart or checkpoint is None or checkpoint.get('status') != STATUS_RUNNING:
+            checkpoint = self._start_run()
+        else:
+            logging.info(f"完整性检查从检查点继续：已扫描 {checkpoint['scanned']} 条")
+
+        last_key = checkpoint.get('last_key')
+        while not self._stop_event.is_set():
+            batch = self._next_batch(last_key)
+            if not batch:
+                return self._finish(skipped=False)
+            duplicates = self._find_duplicates(batch)
+            last_key = [batch[-1]['store_id'], batch[-1]['book_id']]
+            self._save_progress(last_key, len(batch), duplicates)
+            self._stop_event.wait(self.pause)
+        return self.job_col.find_one({'_id': JOB_ID})
+
+    def _start_run(self) -> dict:
+        # 扫描索引在新一轮开始时创建（幂等），断点续跑时已存在
+        self.db.books.create_indexes([SCAN_INDEX])
+        return self._reset_checkpoint(delete_null_keys(self.db))
+
+    def _reset_checkpoint(self, null_deleted: int) -> dict:
+        checkpoint = {
+            '_id': JOB_ID,
+            'status': STATUS_RUNNING,
+            'last_key': None,
+            'scanned': 0,
+            'total': self.db.books.estimated_document_count(),
+            'null_deleted': null_deleted,
+            'duplicate_groups': 0,
+            'duplicates': [],
+            'started_at': time.time(),
+            'updated_at': time.time(),
+            'finished_at': None,
+        }
+        self.job_col.replace_one({'_id': JOB_ID}, checkpoint, upsert=True)
+        return checkpoint
+
+    def _has_unique_index(self) -> bool:
+        return any(
+            index.get('unique') and index['key'] == [('store_id', 1), ('book_id', 1)]
+            for index in self.db.books.index_information().values()
+        )
+
+    def _next_batch(self, last_key: list) -> list:
+        query = {}
+        if last_key is not None:
+            store_id, book_id = last_key
+            query = {'$or': [
+                {'store_id': {'$gt': store_id}},
+                {'store_id': store_id, 'book_id': {'$gt': book_id}}
+            ]}
+        return list(
+            self.db.books.find(query, {'_id': 0, 'store_id': 1, 'book_id': 1})
+            .sort([('store_id', 1), ('book_id', 1)])
+            .limit(self.batch_size)
+        )
+
+    def _find_duplicates(self, batch: list) -> list:
+        """
+        批内按键计数；最后一个键可能延续到下一批，单独用一次 count 取准确值，
+        下一批从该键之后开始，因此每个键只统计一次。
+        """
+        counts = {}
+        for doc in batch:
+            key = (doc['store_id'], doc['book_id'])
+            counts[key] = counts.get(key, 0) + 1
+        last = (batch[-1]['store_id'], batch[-1]['book_id'])
+        if len(batch) == self.batch_size:
+            counts[last] = self.db.books.count_documents(
+                {'store_id': last[0], 'book_id': last[1]}
+            )
+        duplicates = []
+        for (store_id, book_id), count in counts.items():
+            if count > 1:
+                logging.warning(f"发现重复记录：store_id={store_id}, book_id={book_id}，共{count}条，需手动处理")
+                duplicates.append({'store_id': store_id, 'book_id': book_id, 'count': count})
+        return duplicates
+
+    def _save_progress(self, last_key: list, scanned: int, duplicates: list):
+        update = {
+            '$set': {'last_key': last_key, 'updated_at': time.time()},
+            '$inc': {'scanned': scanned, 'duplicate_groups': len(duplicates)},
+        }
+        if duplicates:
+            update['$push'] = {'duplicates': {
+                '$each': duplicates, '$slice': INTEGRITY_DUPLICATE_SAMPLE
+            }}
+        self.job_col.update_one({'_id': JOB_ID}, update)
+
+    def _build_unique_index(self) -> bool:
+        """扫描未发现重复时创建 books 唯一索引；扫描期间新写入的重复记录会使创建失败"""
+        try:
+            apply_indexes(self.db, collections=['books'])
+        except DuplicateKeyError as e:
+            logging.error(f"books 唯一索引创建失败：扫描期间出现重复记录，需手动处理后重新检查：{str(e)}")
+            return False
+        if not self._has_unique_index():  # 已有同键非唯一索引时只记录冲突，不会替换
+            return False
+        try:
+            self.db.books.drop_index(SCAN_INDEX_NAME)
+        except OperationFailure:
+            pass
+        return True
+
+    def _finish(self, skipped: bool) -> dict:
+        checkpoint = self.job_col.find_one({'_id': JOB_ID})
+        if skipped:
+            index_built = True
+        elif checkpoint['duplicate_groups'] == 0:
+            index_built = self._build_unique_index()
+        else:
+            index_built = False
+            logging.error("存在重复的 (store_id, book_id) 记录，books 唯一索引暂不创建，需手动处理后重新检查")
+        self.job_col.update_one(
+            {'_id': JOB_ID},
+            {'$set': {
+                'status': STATUS_COMPLETED,
+                'skipped': skipped,
+                'unique_index': index_built,
+                'finished_at': time.time(),
+                'updated_at': time.time()
+            }}
+        )
+        checkpoint = self.job_col.find_one({'_id': JOB_ID})
+        logging.info(
+            f"完整性检查完成：扫描 {checkpoint['scanned']} 条，"
+            f"发现 {checkpoint['duplicate_groups']} 组 (store_id, book_id) 重复记录"
+        )
+        return checkpoint
+
+
+integrity_job: IntegrityJob = None
+
+
+def start_integrity_job(db: Database) -> IntegrityJob:
+    global integrity_job
+    if INTEGRITY_JOB_ENABLED and (integrity_job is None or not integrity_job.is_alive()):
+        integrity_job = IntegrityJob(db)
+        integrity_job.start()
+    return integrity_job
+
+
+def stop_integrity_job():
+    global integrity_job
+    if integrity_job is not None:
+        integrity_job.stop()
+        integrity_job = None
+
+
+def get_integrity_progress(db: Database) -> dict:
+    """读取检查点，返回进度（百分比按启动时的文档数估算）"""
+    checkpoint = db[JOB_COLLECTION].find_one({'_id': JOB_ID}, {'_id': 0})
+    if checkpoint is None:
+        return {'status': None}
+    total = checkpoint.get('total') or 0
+    if checkpoint['status'] == STATUS_COMPLETED:
+        percent = 100.0
+    else:
+        percent = round(min(checkpoint['scanned'] / total, 1.0) * 100, 2) if total else 0.0
+    checkpoint['percent'] = percent
+    checkpoint['running'] = integrity_job is not None and integrity_job.is_alive()
+    return checkpoint
+
+
+def main():
+    parser = argparse.ArgumentParser(description="books 集合完整性检查")
+    parser.add_argument('--mongo-uri', default=None)
+    parser.add_argument('--batch-size', type=int, default=INTEGRITY_BATCH_SIZE)
+    parser.add_argument('--restart', action='store_true', help="忽略检查点，重新开始一轮")
+    args = parser.parse_args()
+
+    from be.model.store import get_client, DB_NAME, DEFAULT_MONGO_URI
+    logging.basicConfig(level=logging.INFO)
+    db = get_client(args.mongo_uri or DEFAULT_MONGO_URI)[DB_NAME]
+    checkpoint = IntegrityJob(db, batch_size=args.batch_size, pause=0).run_once(restart=args.restart)
+    print(f"扫描 {checkpoint['scanned']} 条，重复 {checkpoint['duplicate_groups']} 组")
+    for dup in checkpoint['duplicates']:
+        print(f"  store_id={dup['store_id']}, book_id={dup['book_id']}，共{dup['count']}条")
+
+
+if __name__ == "__main__":
+    main()
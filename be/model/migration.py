@@ -0,0 +1,262 @@
+"""
+数据迁移工具（在线执行，可重复运行）：
+
+    python -m be.model.migration book_info [--batch-size 500]
+    python -m be.model.migration order_totals [--batch-size 500]
+    python -m be.model.migration create_time [--batch-size 500]
+    python -m be.model.migration catalog [--batch-size 500]
+    python -m be.model.migration pictures [--batch-size 500]
+"""
+import argparse
+import json
+import logging
+from bson import ObjectId
+from pymongo import UpdateOne, UpdateMany
+from pymongo.database import Database
+from be.model.store import get_client, DB_NAME, DEFAULT_MONGO_URI
+from be.model.catalog import CATALOG_COLLECTION, content_hash, make_inventory_row, write_catalog
+from be.model.picture import PictureStore
+
+MIGRATION_BATCH_SIZE = 500
+
+
+def migrate_book_info(db: Database, batch_size: int = MIGRATION_BATCH_SIZE) -> int:
+    """
+    将 store.book_info 从 JSON 字符串转换为 BSON 子文档，并把 price 提升为顶层字段。
+    按 _id 递增分批处理；更新条件要求 book_info 仍为字符串，与并发写入互不覆盖。
+    返回转换的文档数。
+    """
+    store_col = db['store']
+    converted = 0
+    last_id = None
+    while True:
+        query = {'book_info': {'$type': 'string'}}
+        if last_id is not None:
+            query['_id'] = {'$gt': last_id}
+        batch = list(
+            store_col.find(query, {'book_info': 1}).sort('_id', 1).limit(batch_size)
+        )
+        if not batch:
+            break
+
+        requests = []
+        for doc in batch:
+            try:
+                book_info = json.loads(doc['book_info'])
+            except ValueError:
+                logging.warning(f"store 文档 {doc['_id']} 的 book_info 不是合法 JSON，已跳过")
+                continue
+            requests.append(UpdateOne(
+                {'_id': doc['_id'], 'book_info': {'$type': 'string'}},
+                {'$set': {
+                    'book_info': book_info,
+                    'price': book_info.get('price') or 0
+                }}
+            ))
+        if requests:
+            converted += store_col.bulk_write(requests, ordered=False).modified_count
+        last_id = batch[-1]['_id']
+        logging.info(f"book_info 迁移进度：已转换 {converted} 条")
+    return converted
+
+
+def backfill_order_totals(db: Database, batch_size: int = MIGRATION_BATCH_SIZE) -> int:
+    """
+    为旧订单回填 books（订单行）、total_price 和 seller_id，使付款只需读取订单主记录。
+    每批订单的详情和店主各用一次 $in 查询取回。返回回填的订单数。
+    """
+    order_col = db['new_order']
+    backfilled = 0
+    last_id = None
+    while True:
+        query = {'total_price': {'$exists': False}}
+        if last_id is not None:
+            query['_id'] = {'$gt': last_id}
+        batch = list(
+            order_col.find(query, {'order_id': 1, 'store_id': 1}).sort('_id', 1).limit(batch_size)
+        )
+        if not batch:
+            break
+
+        order_books = {doc['order_id']: [] for doc in batch}
+        for detail in db['new_order_detail'].find(
+            {'order_id': {'$in': list(order_books)}},
+            {'_id': 0, 'order_id': 1, 'book_id': 1, 'count': 1, 'price': 1}
+        ):
+            order_books[detail['order_id']].append({
+                'book_id': detail['book_id'],
+                'quantity': detail['count'],
+                'price': detail['price']
+            })
+        owners = {
+            s['store_id']: s['user_id'] for s in db['user_store'].find(
+                {'store_id': {'$in': list({doc['store_id'] for doc in batch})}},
+                {'_id': 0, 'store_id': 1, 'user_id': 1}
+            )
+        }
+
+        requests = []
+        for doc in batch:
+            books = order_books[doc['order_id']]
+            fields = {
+                'books': books,
+                'total_price': sum(b['quantity'] * b['price'] for b in books)
+            }
+            if doc['store_id'] in owners:
+                fields['seller_id'] = owners[doc['store_id']]
+            requests.append(UpdateOne(
+                {'_id': doc['_id'], 'total_price': {'$exists': False}},
+                {'$set': fields}
+            ))
+        backfilled += order_col.bulk_write(requests, ordered=False).modified_count
+        last_id = batch[-1]['_id']
+        logging.info(f"订单总额回填进度：已回填 {backfilled} 条")
+    return backfilled
+
+
+def backfill_order_create_time(db: Database, batch_size: int = MIGRATION_BATCH_SIZE) -> int:
+    """
+    为缺少 create_time 的旧订单回填下单时间（取自 ObjectId 的生成时间），
+    使其参与订单历史键集分页和超时清理。_id 不是 ObjectId 的订单无法推断，记为 0。返回回填的订单数。
+    """
+    order_col = db['new_order']
+    backfilled = 0
+    last_id = None
+    while True:
+        query = {'create_time': None}
+        if last_id is not None:
+            query['_id'] = {'$gt': last_id}
+        batch = list(order_col.find(query, {'_id': 1}).sort('_id', 1).limit(batch_size))
+        if not batch:
+            break
+        requests = [
+            UpdateOne(
+                {'_id': doc['_id'], 'create_time': None},
+                {'$set': {'create_time': (
+                    doc['_id'].generation_time.timestamp() if isinstance(doc['_id'], ObjectId) else 0
+                )}}
+            )
+            for doc in batch
+        ]
+        backfilled += order_col.bulk_write(requests, ordered=False).modified_count
+        last_id = batch[-1]['_id']
+        logging.info(f"订单下单时间回填进度：已回填 {backfilled} 条")
+    return backfilled
+
+
+def migrate_catalog(db: Database, batch_size: int = MIGRATION_BATCH_SIZE) -> int:
+    """
+    将 store 中内嵌的 book_info 拆分到共享的 catalog 集合（按内容哈希去重），
+    库存行只保留 catalog_id、price、stock_level。兼容 book_info 仍为 JSON 字符串的旧文档。
+    更新条件要求 book_info 仍存在，可与服务同时运行、重复执行。返回转换的库存行数。
+    """
+    store_col = db['store']
+    pictures = PictureStore(db)
+    converted = 0
+    inserted = 0
+    last_id = None
+    while True:
+        query = {'book_info': {'$exists': True}}
+        if last_id is not None:
+            query['_id'] = {'$gt': last_id}
+        batch = list(
+            store_col.find(query, {'store_id': 1, 'book_id': 1, 'book_info': 1, 'stock_level': 1})
+            .sort('_id', 1).limit(batch_size)
+        )
+        if not batch:
+            break
+
+        contents = {}
+        requests = []
+        for doc in batch:
+            book_info = doc['book_info']
+            if isinstance(book_info, str):
+                try:
+                    book_info = json.loads(book_info)
+                except ValueError:
+                    logging.warning(f"store 文档 {doc['_id']} 的 book_info 不是合法 JSON，已跳过")
+                    continue
+            row, content = make_inventory_row(
+                doc['store_id'], doc['book_id'], pictures.externalize(book_info), doc.get('stock_level', 0)
+            )
+            contents[row['catalog_id']] = content
+            requests.append(UpdateOne(
+                {'_id': doc['_id'], 'book_info': {'$exists': True}},
+                {
+                    '$set': {'catalog_id': row['catalog_id'], 'price': row['price']},
+                    '$unset': {'book_info': ''}
+                }
+            ))
+        # 先写目录再改库存行，中途中断时库存行不会引用不存在的目录文档
+        inserted += write_catalog(db, contents)
+        if requests:
+            converted += store_col.bulk_write(requests, ordered=False).modified_count
+        last_id = batch[-1]['_id']
+        logging.info(f"catalog 迁移进度：已转换 {converted} 行，新增目录文档 {inserted} 个")
+    return converted
+
+
+def migrate_pictures(db: Database, batch_size: int = MIGRATION_BATCH_SIZE) -> int:
+    """
+    将 catalog 中仍内嵌 base64 图片的目录文档改为引用图片存储：图片写入 GridFS 后内容变化，
+    按新内容哈希写入新目录文档，把引用旧文档的库存行改指新文档，最后删除旧文档。
+    新上架的图书不会再引用旧文档，可与服务同时运行、重复执行。返回转换的目录文档数。
+    """
+    catalog_col = db[CATALOG_COLLECTION]
+    pictures = PictureStore(db)
+    converted = 0
+    last_id = None
+    while True:
+        query = {'book_info.pictures': {'$exists': True}}
+        if last_id is not None:
+            query['_id'] = {'$gt': last_id}
+        batch = list(catalog_col.find(query).sort('_id', 1).limit(batch_size))
+        if not batch:
+            break
+
+        # 整批先写新目录文档，再用一次 bulk_write 改写库存行引用，最后删除旧文档，中断时不会出现悬空引用
+        contents = {}
+        remap = {}
+        for doc in batch:
+            content = pictures.externalize(doc['book_info'])
+            catalog_id = content_hash(content)
+            contents[catalog_id] = content
+            if catalog_id != doc['_id']:
+                remap[doc['_id']] = catalog_id
+        write_catalog(db, contents)
+        if remap:
+            db['store'].bulk_write([
+                UpdateMany({'catalog_id': old_id}, {'$set': {'catalog_id': new_id}})
+                for old_id, new_id in remap.items()
+            ], ordered=False)
+            catalog_col.delete_many({'_id': {'$in': list(remap)}})
+        converted += len(batch)
+        last_id = batch[-1]['_id']
+        logging.info(f"pictures 迁移进度：已转换 {converted} 个目录文档")
+    return converted
+
+
+MIGRATIONS = {
+    'book_info': migrate_book_info,
+    'order_totals': backfill_order_totals,
+    'create_time': backfill_order_create_time,
+    'catalog': migrate_catalog,
+    'pictures': migrate_pictures,
+}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="bookstore 数据迁移工具")
+    parser.add_argument('name', choices=sorted(MIGRATIONS))
+    parser.add_argument('--mongo-uri', default=DEFAULT_MONGO_URI)
+    parser.add_argument('--batch-size', type=int, default=MIGRATION_BATCH_SIZE)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    db = get_client(args.mongo_uri)[DB_NAME]
+    count = MIGRATIONS[args.name](db, batch_size=args.batch_size)
+    print(f"{args.name}: 处理 {count} 条记录")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,173 +1,569 @@
-from be.model import error
-from be.model.store import get_db
-import uuid
-import time
-import traceback
-
-
-class Order:
-    # 订单状态常量
-    STATUS_UNPAID = 1       # 未付款
-    STATUS_CANCELED = 0     # 已取消
-    STATUS_TIMEOUT = -1     # 超时取消
-    STATUS_PAID = 2         # 已付款
-    STATUS_SHIPPED = 3      # 已发货
-    STATUS_RECEIVED = 4     # 已收货
-
-    def __init__(self):
-        self.db = get_db()
-        # 数据库集合（与store.py保持一致）
-        self.user_store_col = self.db['user_store']  # 店铺归属
-        self.store_col = self.db['store']            # 图书库存
-        self.order_col = self.db['new_order']        # 订单集合
-        self.user_col = self.db['user']              # 用户集合
-
-    def store_id_exist(self, store_id: str) -> bool:
-        """检查店铺是否存在"""
-        return self.user_store_col.find_one({'store_id': store_id}) is not None
-
-    def create_order(
-        self,
-        user_id: str,
-        store_id: str,
-        book_ids: list,
-        quantities: list
-    ) -> (int, str, str):
-        try:
-            # 1. 验证店铺存在
-            if not self.store_id_exist(store_id):
-                return error.error_non_exist_store_id(store_id) + ("",)
-
-            # 2. 验证用户存在
-            if self.user_col.find_one({'user_id': user_id}) is None:
-                return error.error_non_exist_user_id(user_id) + ("",)
-
-            # 3. 验证图书ID与数量长度匹配
-            if len(book_ids) != len(quantities):
-                return error.error_invalid_parameter("book_ids与quantities长度不匹配") + ("",)
-
-            # 4. 验证图书存在且库存充足
-            total_price = 0
-            order_books = []
-            for book_id, quantity in zip(book_ids, quantities):
-                # 查询图书（关联店铺和库存）
-                book = self.store_col.find_one({
-                    'store_id': store_id,
-                    'book_id': book_id
-                })
-                if not book:
-                    return error.error_non_exist_book_id(book_id) + ("",)
-                # 检查库存（字段名为stock_level）
-                if book.get('stock_level', 0) < quantity:
-                    return error.error_stock_level_low(book_id) + ("",)
-
-                # 计算总价
-                total_price += book['price'] * quantity
-                order_books.append({
-                    'book_id': book_id,
-                    'quantity': quantity,
-                    'price': book['price']
-                })
-
-            # 5. 创建订单记录
-            order_id = f"order_{uuid.uuid1().hex[:16]}"
-            self.order_col.insert_one({
-                'order_id': order_id,
-                'user_id': user_id,
-                'store_id': store_id,
-                'books': order_books,
-                'total_price': total_price,
-                'status': self.STATUS_UNPAID,
-                'create_time': time.time()
-            })
-
-            # 6. 扣减库存
-            for book_id, quantity in zip(book_ids, quantities):
-                self.store_col.update_one(
-                    {'store_id': store_id, 'book_id': book_id},
-                    {'$inc': {'stock_level': -quantity}}
-                )
-
-            return 200, "ok", order_id
-
-        except Exception as e:
-            err_msg = f"创建订单失败：{str(e)}\n{traceback.format_exc()}"
-            return 530, err_msg, ""
-
-    def get_user_orders(self, user_id: str) -> (int, str, list):
-        try:
-            if self.user_col.find_one({'user_id': user_id}) is None:
-                return error.error_non_exist_user_id(user_id) + ([],)
-
-            orders = list(self.order_col.find({'user_id': user_id}))
-            # 转换ObjectId为字符串（避免JSON序列化错误）
-            order_list = []
-            for order in orders:
-                order['_id'] = str(order['_id'])
-                order_list.append(order)
-            return 200, "ok", order_list
-        except Exception as e:
-            err_msg = f"查询订单失败：{str(e)}\n{traceback.format_exc()}"
-            return 530, err_msg, []
-
-    def cancel_order(self, user_id: str, order_id: str) -> (int, str):
-        try:
-            order = self.order_col.find_one({
-                'order_id': order_id,
-                'user_id': user_id
-            })
-            if not order:
-                return error.error_invalid_order_id(order_id)
-
-            # 只有未付款订单可取消
-            if order['status'] != self.STATUS_UNPAID:
-                return error.error_invalid_order_status(order_id, f"未付款（{self.STATUS_UNPAID}）")
-
-            # 恢复库存
-            store_id = order['store_id']
-            for book in order['books']:
-                self.store_col.update_one(
-                    {'store_id': store_id, 'book_id': book['book_id']},
-                    {'$inc': {'stock_level': book['quantity']}}
-                )
-
-            # 更新订单状态为已取消
-            self.order_col.update_one(
-                {'order_id': order_id},
-                {'$set': {'status': self.STATUS_CANCELED}}
-            )
-            return 200, "ok"
-        except Exception as e:
-            err_msg = f"取消订单失败：{str(e)}\n{traceback.format_exc()}"
-            return 530, err_msg
-
-    def check_timeout_orders(self) -> (int, str):
-        try:
-            timeout_seconds = 30 * 60  # 30分钟超时
-            current_time = time.time()
-            # 查询所有未付款且超时的订单
-            timeout_orders = self.order_col.find({
-                'status': self.STATUS_UNPAID,
-                'create_time': {'$lt': current_time - timeout_seconds}
-            })
-
-            count = 0
-            for order in timeout_orders:
-                # 恢复库存
-                store_id = order['store_id']
-                for book in order['books']:
-                    self.store_col.update_one(
-                        {'store_id': store_id, 'book_id': book['book_id']},
-                        {'$inc': {'stock_level': book['quantity']}}
-                    )
-                # 更新订单状态为“超时取消”
-                self.order_col.update_one(
-                    {'order_id': order['order_id']},
-                    {'$set': {'status': self.STATUS_TIMEOUT}}
-                )
-                count += 1
-
-            return count, f"处理了 {count} 个超时未付款订单"
-        except Exception as e:
-            err_msg = f"检查超时订单失败：{str(e)}\n{traceback.format_exc()}"
-            return 0, err_msg
\ No newline at end of file
+from be.model import error
+from be.model.store import get_db
+from be.model.order_state import OrderStateMachine, TRANSITIONS, UNPAID_STATUSES
+from be.utils import (
+    ORDER_TIMEOUT, ORDER_EXPIRY_SWEEP_INTERVAL, ORDER_EXPIRY_BATCH_SIZE,
+    ORDER_EXPIRY_MAX_BATCHES, ORDER_EXPIRY_BATCH_PAUSE,
+    ORDER_TIMER_WHEEL_ENABLED, ORDER_TIMER_WHEEL_TICK, ORDER_TIMER_WHEEL_SLOTS,
+    ORDER_TIMER_WHEEL_SAFETY_SWEEP
+)
+from pymongo import UpdateOne
+import uuid
+import json
+import base64
+import math
+import time
+import logging
+import threading
+import traceback
+
+
+# 订单查询可选择返回的字段
+ORDER_FIELDS = (
+    'order_id', 'user_id', 'store_id', 'seller_id', 'status',
+    'total_price', 'create_time', 'books'
+)
+ORDER_PAGE_SIZE = 50       # 订单分页默认页大小（只传 cursor 时）
+ORDER_PAGE_SIZE_MAX = 200  # 订单分页最大页大小
+
+# 超时处理只需读取的订单字段
+EXPIRE_PROJECTION = {'_id': 0, 'order_id': 1, 'store_id': 1, 'status': 1, 'books': 1}
+
+
+class Order:
+    # 订单状态常量
+    STATUS_UNPAID = 1       # 未付款
+    STATUS_CANCELED = 0     # 已取消
+    STATUS_TIMEOUT = -1     # 超时取消
+    STATUS_PAID = 2         # 已付款
+    STATUS_SHIPPED = 3      # 已发货
+    STATUS_RECEIVED = 4     # 已收货
+
+    def __init__(self):
+        self.db = get_db()
+        # 数据库集合（与store.py保持一致）
+        self.user_store_col = self.db['user_store']  # 店铺归属
+        self.store_col = self.db['store']            # 图书库存
+        self.order_col = self.db['new_order']        # 订单集合
+        self.user_col = self.db['user']              # 用户集合
+        self.order_detail_col = self.db['new_order_detail']  # 订单详情集合
+        self.state = OrderStateMachine(self.order_col)
+
+    def store_id_exist(self, store_id: str) -> bool:
+        """检查店铺是否存在"""
+        return self.user_store_col.find_one({'store_id': store_id}) is not None
+
+    def create_order(
+        self,
+        user_id: str,
+        store_id: str,
+        book_ids: list,
+        quantities: list
+    ) -> (int, str, str):
+        try:
+            # 1. 验证店铺存在
+            if not self.store_id_exist(store_id):
+                return error.error_non_exist_store_id(store_id) + ("",)
+
+            # 2. 验证用户存在
+            if self.user_col.find_one({'user_id': user_id}) is None:
+                return error.error_non_exist_user_id(user_id) + ("",)
+
+            # 3. 验证图书ID与数量长度匹配
+            if len(book_ids) != len(quantities):
+                return error.error_invalid_parameter("book_ids与quantities长度不匹配") + ("",)
+
+            # 4. 验证图书存在且库存充足
+            total_price = 0
+            order_books = []
+            for book_id, quantity in zip(book_ids, quantities):
+                # 查询图书（关联店铺和库存）
+                book = self.store_col.find_one({
+                    'store_id': store_id,
+                    'book_id': book_id
+                })
+                if not book:
+                    return error.error_non_exist_book_id(book_id) + ("",)
+                # 检查库存（字段名为stock_level）
+                if book.get('stock_level', 0) < quantity:
+                    return error.error_stock_level_low(book_id) + ("",)
+
+                # 计算总价
+                total_price += book['price'] * quantity
+                order_books.append({
+                    'book_id': book_id,
+                    'quantity': quantity,
+                    'price': book['price']
+                })
+
+            # 5. 创建订单记录
+            order_id = f"order_{uuid.uuid1().hex[:16]}"
+            create_time = time.time()
+            self.order_col.insert_one({
+                'order_id': order_id,
+                'user_id': user_id,
+                'store_id': store_id,
+                'books': order_books,
+                'total_price': total_price,
+                'status': self.STATUS_UNPAID,
+                'create_time': create_time
+            })
+            schedule_order_expiry(order_id, create_time)
+
+            # 6. 扣减库存
+            for book_id, quantity in zip(book_ids, quantities):
+                self.store_col.update_one(
+                    {'store_id': store_id, 'book_id': book_id},
+                    {'$inc': {'stock_level': -quantity}}
+                )
+
+            return 200, "ok", order_id
+
+        except Exception as e:
+            err_msg = f"创建订单失败：{str(e)}\n{traceback.format_exc()}"
+            return 530, err_msg, ""
+
+    @staticmethod
+    def encode_cursor(order: dict) -> str:
+        """把一页最后一条订单的 (create_time, order_id) 编码为不透明游标"""
+        raw = json.dumps([order.get('create_time'), order['order_id']])
+        return base64.urlsafe_b64encode(raw.encode()).decode()
+
+    @staticmethod
+    def decode_cursor(cursor: str) -> (float, str):
+        create_time, order_id = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        return create_time, order_id
+
+    def get_user_orders(
+        self,
+        user_id: str,
+        limit: int = None,
+        cursor: str = None,
+        fields: list = None,
+        statuses: list = None
+    ) -> (int, str, list, str):
+        """
+        按 (create_time, order_id) 倒序的键集分页查询用户订单（走 (user_id, create_time, order_id) 索引），
+        缺少 create_time 的旧订单排在最后（可用 python -m be.model.migration create_time 回填）。
+        limit 和 cursor 都不传时与原接口一致，返回全部订单（next_cursor 为 None）；只传 cursor 时每页 ORDER_PAGE_SIZE 条。
+        cursor 为上一页返回的 next_cursor；fields 为要返回的字段（order_id、create_time 总会返回）；
+        statuses 为状态过滤。返回 (code, msg, 订单列表, 下一页游标或 None)。
+        """
+        try:
+            if self.user_col.find_one({'user_id': user_id}) is None:
+                return error.error_non_exist_user_id(user_id) + ([], None)
+
+            paginated = limit is not None or cursor is not None
+            if paginated:
+                limit = max(1, min(limit or ORDER_PAGE_SIZE, ORDER_PAGE_SIZE_MAX))
+            if fields:
+                invalid = [f for f in fields if f not in ORDER_FIELDS]
+                if invalid:
+                    return error.error_invalid_parameter(f"不支持的字段 {invalid}") + ([], None)
+                projection = dict.fromkeys(set(fields) | {'order_id', 'create_time'}, 1)
+            else:
+                projection = dict.fromkeys(ORDER_FIELDS, 1)
+            projection['_id'] = 0
+
+            query = {'user_id': user_id}
+            if statuses:
+                query['status'] = {'$in': statuses}
+            if cursor:
+                try:
+                    last_time, last_id = self.decode_cursor(cursor)
+                except (ValueError, TypeError):
+                    return error.error_invalid_parameter("cursor 无效") + ([], None)
+                # create_time 为空（或缺失）的旧订单在倒序中排在最后，同样按 order_id 继续
+                if last_time is None:
+                    query['$or'] = [{'create_time': None, 'order_id': {'$lt': last_id}}]
+                else:
+                    query['$or'] = [
+                        {'create_time': {'$lt': last_time}},
+                        {'create_time': last_time, 'order_id': {'$lt': last_id}},
+                        {'create_time': None}
+                    ]
+
+            orders = self.order_col.find(query, projection).sort(
+                [('create_time', -1), ('order_id', -1)]
+            )
+            if paginated:
+                orders = orders.limit(limit + 1)  # 多取一条用于判断是否还有下一页
+            orders = list(orders)
+            next_cursor = None
+            if paginated and len(orders) > limit:
+                orders = orders[:limit]
+                next_cursor = self.encode_cursor(orders[-1])
+            return 200, "ok", orders, next_cursor
+        except Exception as e:
+            err_msg = f"查询订单失败：{str(e)}\n{traceback.format_exc()}"
+            return 530, err_msg, [], None
+
+    def cancel_order(self, user_id: str, order_id: str) -> (int, str):
+        try:
+            # 一次条件更新完成 未付款 -> 已取消（兼容字符串与整数两种状态）
+            applied, pre = self.state.apply(order_id, 'cancel', user_id=user_id)
+            if not applied:
+                if pre is None or pre.get('user_id') != user_id:
+                    return error.error_invalid_order_id(order_id)
+                return error.error_invalid_order_status(order_id, f"未付款（{self.STATUS_UNPAID}）")
+
+            # 恢复库存（一次 bulk_write）并移出超时时间轮
+            self.restore_stock(pre)
+            cancel_order_expiry(order_id)
+            return 200, "ok"
+        except Exception as e:
+            err_msg = f"取消订单失败：{str(e)}\n{traceback.format_exc()}"
+            return 530, err_msg
+
+    def restore_stock(self, order: dict) -> None:
+        """按订单行回补库存"""
+        self.restore_stock_many([order])
+
+    def restore_stock_many(self, orders: list) -> None:
+        """
+        批量回补多个订单的库存：按 (store_id, book_id) 合并数量后一次 bulk_write。
+        旧订单未冗余 books 时，用一次 $in 查询从订单详情读取。
+        """
+        legacy_ids = [o['order_id'] for o in orders if o.get('books') is None]
+        legacy_books = {order_id: [] for order_id in legacy_ids}
+        if legacy_ids:
+            for d in self.order_detail_col.find({'order_id': {'$in': legacy_ids}}):
+                legacy_books[d['order_id']].append({'book_id': d['book_id'], 'quantity': d['count']})
+
+        restock = {}
+        for order in orders:
+            books = order.get('books')
+            if books is None:
+                books = legacy_books[order['order_id']]
+            for book in books:
+                key = (order['store_id'], book['book_id'])
+                restock[key] = restock.get(key, 0) + book['quantity']
+        if not restock:
+            return
+        self.store_col.bulk_write([
+            UpdateOne(
+                {'store_id': store_id, 'book_id': book_id},
+                {'$inc': {'stock_level': quantity}}
+            )
+            for (store_id, book_id), quantity in restock.items()
+        ], ordered=False)
+
+    def _expired_query(self, cutoff: float) -> dict:
+        return {'status': {'$in': UNPAID_STATUSES}, 'create_time': {'$lt': cutoff}}
+
+    def expire_orders_batch(self, cutoff: float, batch_size: int) -> (int, int):
+        """
+        取消一批创建时间早于 cutoff 的未付款订单（走 (status, create_time) 索引）。
+        返回 (本批读取的订单数, 实际取消的订单数)。
+        """
+        batch = list(self.order_col.find(
+            self._expired_query(cutoff), EXPIRE_PROJECTION
+        ).sort('create_time', 1).limit(batch_size))
+        return len(batch), self._expire_orders(batch)
+
+    def expire_orders_by_id(self, order_ids: list, cutoff: float) -> int:
+        """取消时间轮到期的订单（仍需未付款且已超时），返回实际取消的订单数"""
+        query = self._expired_query(cutoff)
+        query['order_id'] = {'$in': order_ids}
+        return self._expire_orders(list(self.order_col.find(query, EXPIRE_PROJECTION)))
+
+    def _expire_orders(self, batch: list) -> int:
+        """
+        状态迁移用一次 bulk_write 完成，每条更新都以原状态为条件，与并发付款/取消互不覆盖；
+        仅在部分更新未生效时，按本批标记回查实际被取消的订单。
+        """
+        if not batch:
+            return 0
+
+        sweep_id = uuid.uuid4().hex
+        expire = TRANSITIONS['expire']
+        result = self.order_col.bulk_write([
+            UpdateOne(
+                {'order_id': o['order_id'], 'status': o['status']},
+                {'$set': {'status': expire[o['status']], 'expire_sweep': sweep_id}}
+            )
+            for o in batch
+        ], ordered=False)
+
+        expired = batch
+        if result.modified_count < len(batch):
+            flipped = {
+                o['order_id'] for o in self.order_col.find(
+                    {'order_id': {'$in': [o['order_id'] for o in batch]}, 'expire_sweep': sweep_id},
+                    {'_id': 0, 'order_id': 1}
+                )
+            }
+            expired = [o for o in batch if o['order_id'] in flipped]
+
+        self.restore_stock_many(expired)
+        return len(expired)
+
+    def load_pending_timers(self, wheel: 'OrderTimerWheel') -> int:
+        """启动时用全部未付款订单重建时间轮，返回载入的订单数"""
+        count = 0
+        for o in self.order_col.find(
+            {'status': {'$in': UNPAID_STATUSES}},
+            {'_id': 0, 'order_id': 1, 'create_time': 1}
+        ).batch_size(5000):
+            create_time = o.get('create_time')
+            if create_time is None:
+                continue
+            wheel.add(o['order_id'], create_time + ORDER_TIMEOUT)
+            count += 1
+        return count
+
+    def count_expired(self, cutoff: float) -> int:
+        """超时未处理的订单积压数（索引计数）"""
+        return self.order_col.count_documents(self._expired_query(cutoff))
+
+    def check_timeout_orders(self) -> (int, str):
+        try:
+            cutoff = time.time() - ORDER_TIMEOUT
+            count = 0
+            while True:
+                fetched, expired = self.expire_orders_batch(cutoff, ORDER_EXPIRY_BATCH_SIZE)
+                count += expired
+                if fetched < ORDER_EXPIRY_BATCH_SIZE:
+                    break
+            return count, f"处理了 {count} 个超时未付款订单"
+        except Exception as e:
+            err_msg = f"检查超时订单失败：{str(e)}\n{traceback.format_exc()}"
+            return 0, err_msg
+
+
+class OrderTimerWheel:
+    """
+    哈希时间轮：按截止时间刻度 t 放入 t % slots 号槽位，指针每走一格只检查一个槽位。
+    add / cancel 均为 O(1)（order_id -> 槽位 的索引字典），advance 只返回恰好到期的订单。
+
+    内存：每个待支付订单约 100 字节（两个字典条目 + 截止刻度整数，tracemalloc 实测，
+    20 万订单取平均），另加 order_id 字符串本身（Buyer.new_order 生成的 ID 约 140 字节），
+    合计约 240 字节/订单，即每百万待支付订单约 240MB。
+    """
+
+    def __init__(self, tick: float = ORDER_TIMER_WHEEL_TICK, slots: int = ORDER_TIMER_WHEEL_SLOTS):
+        self.tick = tick
+        self.n_slots = slots
+        self._slots = [{} for _ in range(slots)]  # 槽位：order_id -> 截止刻度
+        self._index = {}                          # order_id -> 所在槽位
+        self._lock = threading.Lock()
+        self._current = int(time.time() // tick)
+
+    def __len__(self) -> int:
+        return len(self._index)
+
+    def add(self, order_id: str, deadline: float) -> None:
+        # 向上取整，保证触发时订单一定已超过截止时间
+        t = math.ceil(deadline / self.tick)
+        with self._lock:
+            old = self._index.pop(order_id, None)
+            if old is not None:
+                old.pop(order_id, None)
+            t = max(t, self._current + 1)
+            slot = self._slots[t % self.n_slots]
+            slot[order_id] = t
+            self._index[order_id] = slot
+
+    def cancel(self, order_id: str) -> bool:
+        with self._lock:
+            slot = self._index.pop(order_id, None)
+            if slot is None:
+                return False
+            del slot[order_id]
+            return True
+
+    def advance(self, now: float) -> list:
+        """指针走到 now 所在刻度，返回途经槽位中已到期的订单 ID"""
+        target = int(now // self.tick)
+        due = []
+        with self._lock:
+            while self._current < target:
+                self._current += 1
+                slot = self._slots[self._current % self.n_slots]
+                if not slot:
+                    continue
+                fired = [order_id for order_id, t in slot.items() if t <= self._current]
+                for order_id in fired:
+                    del slot[order_id]
+                    del self._index[order_id]
+                due.extend(fired)
+        return due
+
+    def snapshot(self) -> dict:
+        return {"pending": len(self), "tick": self.tick, "slots": self.n_slots}
+
+
+class ExpiryStats:
+    """超时清理统计：每轮耗时、批大小、累计取消数和积压"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.sweeps = 0
+        self.errors = 0
+        self.expired_total = 0
+        self.last_sweep_ms = 0.0
+        self.max_sweep_ms = 0.0
+        self.last_batch_sizes = []
+        self.backlog = 0
+        self.last_sweep_at = None
+
+    def record(self, duration: float, batch_sizes: list, expired: int, backlog: int):
+        with self._lock:
+            self.sweeps += 1
+            self.expired_total += expired
+            self.last_sweep_ms = round(duration * 1000, 3)
+            self.max_sweep_ms = max(self.max_sweep_ms, self.last_sweep_ms)
+            self.last_batch_sizes = batch_sizes
+            self.backlog = backlog
+            self.last_sweep_at = time.time()
+
+    def record_error(self):
+        with self._lock:
+            self.errors += 1
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {
+                "sweeps": self.sweeps,
+                "errors": self.errors,
+                "expired_total": self.expired_total,
+                "last_sweep_ms": self.last_sweep_ms,
+                "max_sweep_ms": self.max_sweep_ms,
+                "last_batch_sizes": list(self.last_batch_sizes),
+                "backlog": self.backlog,
+                "last_sweep_at": self.last_sweep_at,
+            }
+
+
+class OrderExpiryScheduler(threading.Thread):
+    """
+    服务进程内的超时订单清理线程（由 be.serve.be_run 启动）。
+    每轮最多处理 max_batches 批，批次之间短暂停顿，剩余积压留到下一轮，避免占满连接池。
+    """
+
+    def __init__(
+        self,
+        interval: float = ORDER_EXPIRY_SWEEP_INTERVAL,
+        batch_size: int = ORDER_EXPIRY_BATCH_SIZE,
+        max_batches: int = ORDER_EXPIRY_MAX_BATCHES,
+        wheel: OrderTimerWheel = None,
+        safety_interval: float = ORDER_TIMER_WHEEL_SAFETY_SWEEP
+    ):
+        super().__init__(name="order-expiry", daemon=True)
+        self.interval = interval
+        self.batch_size = batch_size
+        self.max_batches = max_batches
+        self.wheel = wheel
+        # 时间轮模式下周期性执行一次范围扫描，兜底漏触发的订单（如进程内未登记的订单）
+        self.safety_interval = safety_interval
+        self._next_safety_sweep = time.monotonic() + safety_interval
+        self.stats = ExpiryStats()
+        self._stop_event = threading.Event()
+
+    def run(self):
+        # 时间轮模式按刻度推进，只处理到期订单；否则周期性扫描
+        interval = self.wheel.tick if self.wheel is not None else self.interval
+        sweep = self.sweep_due if self.wheel is not None else self.sweep
+        while not self._stop_event.wait(interval):
+            try:
+                sweep()
+            except Exception as e:
+                self.stats.record_error()
+                logging.error(f"超时订单清理失败：{str(e)}\n{traceback.format_exc()}")
+
+    def sweep(self) -> int:
+        order = Order()
+        start = time.perf_counter()
+        cutoff = time.time() - ORDER_TIMEOUT
+        batch_sizes = []
+        expired_total = 0
+        for _ in range(self.max_batches):
+            fetched, expired = order.expire_orders_batch(cutoff, self.batch_size)
+            batch_sizes.append(fetched)
+            expired_total += expired
+            if fetched < self.batch_size or self._stop_event.is_set():
+                break
+            self._stop_event.wait(ORDER_EXPIRY_BATCH_PAUSE)
+        backlog = order.count_expired(cutoff)
+        self.stats.record(time.perf_counter() - start, batch_sizes, expired_total, backlog)
+        return expired_total
+
+    def sweep_due(self) -> int:
+        """
+        时间轮模式：取消本刻度到期的订单。某批取消失败时把该批重新放回时间轮，
+        ORDER_EXPIRY_SWEEP_INTERVAL 秒后重试，不会因一次数据库错误而丢失。
+        """
+        expired_total = 0
+        due = self.wheel.advance(time.time())
+        if due:
+            order = Order()
+            start = time.perf_counter()
+            cutoff = time.time() - ORDER_TIMEOUT
+            batch_sizes = []
+            for i in range(0, len(due), self.batch_size):
+                chunk = due[i:i + self.batch_size]
+                batch_sizes.append(len(chunk))
+                try:
+                    expired_total += order.expire_orders_by_id(chunk, cutoff)
+                except Exception as e:
+                    retry_at = time.time() + ORDER_EXPIRY_SWEEP_INTERVAL
+                    for order_id in chunk:
+                        self.wheel.add(order_id, retry_at)
+                    self.stats.record_error()
+                    logging.error(f"超时订单取消失败，{len(chunk)} 个订单稍后重试：{str(e)}")
+            self.stats.record(time.perf_counter() - start, batch_sizes, expired_total, 0)
+
+        if self.safety_interval and time.monotonic() >= self._next_safety_sweep:
+            self._next_safety_sweep = time.monotonic() + self.safety_interval
+            expired_total += self.sweep()
+        return expired_total
+
+    def stop(self, timeout: float = 5):
+        self._stop_event.set()
+        if self.is_alive():
+            self.join(timeout)
+
+
+expiry_scheduler: OrderExpiryScheduler = None
+timer_wheel: OrderTimerWheel = None
+
+
+def start_expiry_scheduler() -> OrderExpiryScheduler:
+    global expiry_scheduler, timer_wheel
+    if expiry_scheduler is None or not expiry_scheduler.is_alive():
+        if ORDER_TIMER_WHEEL_ENABLED:
+            timer_wheel = OrderTimerWheel()
+            loaded = Order().load_pending_timers(timer_wheel)
+            logging.info(f"订单时间轮重建完成，载入 {loaded} 个未付款订单")
+        expiry_scheduler = OrderExpiryScheduler(wheel=timer_wheel)
+        expiry_scheduler.start()
+    return expiry_scheduler
+
+
+def stop_expiry_scheduler():
+    global expiry_scheduler, timer_wheel
+    if expiry_scheduler is not None:
+        expiry_scheduler.stop()
+        expiry_scheduler = None
+    timer_wheel = None
+
+
+def schedule_order_expiry(order_id: str, create_time: float) -> None:
+    """新订单加入时间轮（未启用时间轮时为空操作）"""
+    if timer_wheel is not None:
+        timer_wheel.add(order_id, create_time + ORDER_TIMEOUT)
+
+
+def cancel_order_expiry(order_id: str) -> None:
+    """订单付款或取消后移出时间轮"""
+    if timer_wheel is not None:
+        timer_wheel.cancel(order_id)
+
+
+def get_expiry_stats() -> dict:
+    if expiry_scheduler is None:
+        return {"running": False}
+    stats = dict(expiry_scheduler.stats.snapshot(), running=expiry_scheduler.is_alive())
+    if expiry_scheduler.wheel is not None:
+        stats["timer_wheel"] = expiry_scheduler.wheel.snapshot()
+    return stats
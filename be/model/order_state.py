@@ -0,0 +1,96 @@
+from pymongo import ReturnDocument
+from pymongo.collection import Collection
+from be.model import error
+
+# 订单状态（Buyer.new_order 创建的订单使用字符串状态）
+STATUS_UNPAID = 'unpaid'
+STATUS_PAID = 'paid'
+STATUS_SHIPPED = 'shipped'
+STATUS_RECEIVED = 'received'
+STATUS_CANCELLED = 'cancelled'
+
+# Order.create_order 创建的订单使用整数状态（见 Order.STATUS_*）
+LEGACY_STATUS_UNPAID = 1
+LEGACY_STATUS_CANCELED = 0
+LEGACY_STATUS_TIMEOUT = -1
+
+# 状态迁移表：动作 -> {原状态: 新状态}
+TRANSITIONS = {
+    'pay': {STATUS_UNPAID: STATUS_PAID},
+    'ship': {STATUS_PAID: STATUS_SHIPPED},
+    'receive': {STATUS_SHIPPED: STATUS_RECEIVED},
+    'cancel': {
+        STATUS_UNPAID: STATUS_CANCELLED,
+        LEGACY_STATUS_UNPAID: LEGACY_STATUS_CANCELED,
+    },
+    # 超时取消：字符串状态订单记为已取消，整数状态订单记为超时取消
+    'expire': {
+        STATUS_UNPAID: STATUS_CANCELLED,
+        LEGACY_STATUS_UNPAID: LEGACY_STATUS_TIMEOUT,
+    },
+}
+
+UNPAID_STATUSES = list(TRANSITIONS['expire'])
+
+# 原状态不满足时各动作返回的错误
+STATUS_ERRORS = {
+    'pay': lambda order_id: error.error_invalid_order_status(order_id, STATUS_UNPAID),
+    'ship': error.error_order_not_paid,
+    'receive': error.error_order_not_shipped,
+    'cancel': lambda order_id: error.error_invalid_order_status(order_id, STATUS_UNPAID),
+    'expire': lambda order_id: error.error_invalid_order_status(order_id, STATUS_UNPAID),
+}
+
+PRE_IMAGE_PROJECTION = {
+    '_id': 0, 'order_id': 1, 'user_id': 1, 'store_id': 1,
+    'seller_id': 1, 'status': 1, 'books': 1,
+}
+
+
+class OrderStateMachine:
+    """
+    订单状态迁移：每次迁移是一条 find_one_and_update。
+    过滤条件只有 order_id，状态和归属谓词放在流水线更新的 $switch 里，
+    因此无论成功与否都能拿到更新前的文档（pre-image），失败原因直接由它推导，无需额外查询。
+    """
+
+    def __init__(self, order_col: Collection):
+        self.order_col = order_col
+
+    def apply(self, order_id: str, action: str, session=None, **owner) -> (bool, dict):
+        """
+        执行一次状态迁移。owner 为归属谓词（如 user_id=... 或 store_id=..., seller_id=...）。
+        返回 (是否迁移成功, pre-image)；订单不存在时 pre-image 为 None。
+        """
+        owner_conds = [{'$eq': ['$' + field, {'$literal': value}]} for field, value in owner.items()]
+        branches = [
+            {
+                'case': {'$and': [{'$eq': ['$status', from_status]}] + owner_conds},
+                'then': to_status,
+            }
+            for from_status, to_status in TRANSITIONS[action].items()
+        ]
+        pre = self.order_col.find_one_and_update(
+            {'order_id': order_id},
+            [{'$set': {'status': {'$switch': {'branches': branches, 'default': '$status'}}}}],
+            projection=PRE_IMAGE_PROJECTION,
+            return_document=ReturnDocument.BEFORE,
+            session=session
+        )
+        return self.applied(pre, action, **owner), pre
+
+    @staticmethod
+    def applied(pre: dict, action: str, **owner) -> bool:
+        """按 pre-image 判断迁移是否生效（与 $switch 中的条件一致）"""
+        if pre is None or pre.get('status') not in TRANSITIONS[action]:
+            return False
+        return all(pre.get(field) == value for field, value in owner.items())
+
+    @staticmethod
+    def derive_error(pre: dict, order_id: str, action: str, **owner) -> (int, str):
+        """迁移失败时由 pre-image 推导错误码：订单不存在 / 越权 / 状态不符"""
+        if pre is None:
+            return error.error_invalid_order_id(order_id)
+        if any(pre.get(field) != value for field, value in owner.items()):
+            return error.error_authorization_fail()
+        return STATUS_ERRORS[action](order_id)
@@ -0,0 +1,97 @@
+import base64
+import hashlib
+import binascii
+import gridfs
+from pymongo.database import Database
+from pymongo.errors import DuplicateKeyError
+
+# 图书图片存放在 GridFS（bucket: pictures）中，文件 _id 为内容的 sha256，相同图片只存一份。
+# 目录中的 book_info 只保存 picture_ids，下单、搜索路径不会读到图片字节。
+PICTURE_BUCKET = 'pictures'
+PICTURE_CHUNK_SIZE = 255 * 1024   # GridFS 分块大小，也是下载时每次读取的字节数
+
+# 按文件头识别常见图片格式
+PICTURE_SIGNATURES = (
+    (b'\x89PNG\r\n\x1a\n', 'image/png'),
+    (b'\xff\xd8\xff', 'image/jpeg'),
+    (b'GIF87a', 'image/gif'),
+    (b'GIF89a', 'image/gif'),
+    (b'RIFF', 'image/webp'),
+)
+
+
+def picture_id(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+
+def sniff_content_type(data: bytes) -> str:
+    for signature, content_type in PICTURE_SIGNATURES:
+        if data.startswith(signature):
+            return content_type
+    return 'application/octet-stream'
+
+
+class PictureStore:
+    def __init__(self, db: Database):
+        self.bucket = gridfs.GridFSBucket(db, bucket_name=PICTURE_BUCKET, chunk_size_bytes=PICTURE_CHUNK_SIZE)
+        self.files_col = db[f'{PICTURE_BUCKET}.files']
+
+    def exists(self, pid: str) -> bool:
+        return self.files_col.find_one({'_id': pid}, {'_id': 1}) is not None
+
+    def put(self, data: bytes) -> str:
+        """按内容哈希写入，已存在时直接返回 id；并发写入同一图片时以先完成者为准"""
+        pid = picture_id(data)
+        if self.exists(pid):
+            return pid
+        try:
+            self.bucket.upload_from_stream_with_id(
+                pid, pid, data, metadata={'contentType': sniff_content_type(data)}
+            )
+        except (gridfs.errors.FileExists, DuplicateKeyError):
+            pass
+        return pid
+
+    def open(self, pid: str):
+        """返回可 seek/read 的 GridOut；图片不存在时返回 None"""
+        try:
+            return self.bucket.open_download_stream(pid)
+        except gridfs.errors.NoFile:
+            return None
+
+    def externalize(self, book_info: dict) -> dict:
+        """
+        把 book_info 中内嵌的 base64 图片（pictures）写入 GridFS，替换为 picture_ids。
+        客户端可以只传一次不重复的图片内容，再用 picture_ids 按顺序列出每张图片的 sha256
+        （可重复，也可引用之前已写入的图片）；未给出 picture_ids 时按 pictures 的顺序生成，
+        重复的图片只解码、写入一次。无法解码的图片和无法解析的引用丢弃。
+        """
+        pictures = book_info.get('pictures')
+        refs = book_info.get('picture_ids')
+        if pictures is None and refs is None:
+            return book_info
+        book_info = {k: v for k, v in book_info.items() if k not in ('pictures', 'picture_ids')}
+        decoded = {}
+        for encoded in pictures or []:
+            if encoded not in decoded:
+                try:
+                    decoded[encoded] = self.put(base64.b64decode(encoded, validate=True))
+                except (binascii.Error, ValueError, TypeError):
+                    decoded[encoded] = None
+        if refs is None:
+            ids = [decoded[encoded] for encoded in pictures if decoded[encoded] is not None]
+        else:
+            known = {pid for pid in decoded.values() if pid is not None}
+            unknown = set()
+            ids = []
+            for pid in refs:
+                if not isinstance(pid, str) or pid in unknown:
+                    continue
+                if pid not in known:
+                    if not self.exists(pid):
+                        unknown.add(pid)
+                        continue
+                    known.add(pid)
+                ids.append(pid)
+        book_info['picture_ids'] = ids
+        return book_info
@@ -0,0 +1,176 @@
+import hashlib
+import logging
+import threading
+import time
+import traceback
+from datetime import datetime, timezone
+from pymongo.database import Database
+
+# 吊销过滤器配置（无状态令牌模式使用，见 be.model.user）
+REVOCATION_COLLECTION = 'token_revocation'
+REVOCATION_REFRESH_INTERVAL = 5     # 从吊销集合重新加载的间隔（秒）
+REVOCATION_BLOOM_BITS = 1 << 20     # 布隆过滤器位数（128 KB）
+REVOCATION_BLOOM_HASHES = 7         # 哈希函数个数
+
+
+class BloomFilter:
+    """定长位数组布隆过滤器：k 个位置由 sha256 摘要的两段做双重哈希得出"""
+
+    def __init__(self, n_bits: int = REVOCATION_BLOOM_BITS, n_hashes: int = REVOCATION_BLOOM_HASHES):
+        self.n_bits = n_bits
+        self.n_hashes = n_hashes
+        self.bits = bytearray(n_bits // 8)
+        self.count = 0
+
+    def _positions(self, item: str):
+        digest = hashlib.sha256(item.encode()).digest()
+        h1 = int.from_bytes(digest[:8], 'little')
+        h2 = int.from_bytes(digest[8:16], 'little') | 1
+        return [(h1 + i * h2) % self.n_bits for i in range(self.n_hashes)]
+
+    def add(self, item: str):
+        for pos in self._positions(item):
+            self.bits[pos >> 3] |= 1 << (pos & 7)
+        self.count += 1
+
+    def __contains__(self, item: str) -> bool:
+        return all(self.bits[pos >> 3] & (1 << (pos & 7)) for pos in self._positions(item))
+
+
+class RevocationFilter:
+    """
+    已吊销令牌的内存过滤器：
+      - 单个令牌吊销（登出）按 jti 记录
+      - 用户级吊销（改密、注销）记录时间点，之前签发的该用户令牌全部失效
+    先查布隆过滤器，绝大多数未吊销的令牌到此即可放行；命中时再用精确集合确认，排除误判。
+    吊销记录带过期时间（等于令牌最长寿命），吊销集合上的 TTL 索引负责清理，内存中的集合随重新加载收缩。
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._bloom = BloomFilter()
+        self._tokens = set()   # 已吊销的 jti
+        self._users = {}       # user_id -> 吊销时间点
+        self._local = []       # 本进程最近的吊销，重新加载时补回（加载查询可能早于其写入）
+        self.bloom_hits = 0
+        self.false_positives = 0
+        self.refreshes = 0
+        self.refresh_errors = 0
+        self.last_refresh_at = None
+
+    def _add(self, bloom: BloomFilter, tokens: set, users: dict, doc: dict):
+        if doc.get('jti'):
+            tokens.add(doc['jti'])
+            bloom.add('jti:' + doc['jti'])
+        elif doc.get('user_id'):
+            users[doc['user_id']] = max(users.get(doc['user_id'], 0), doc['revoked_at'])
+            bloom.add('user:' + doc['user_id'])
+
+    def add(self, doc: dict):
+        """本进程产生的吊销立即生效，不必等下次重新加载"""
+        with self._lock:
+            self._add(self._bloom, self._tokens, self._users, doc)
+            self._local.append(doc)
+
+    def is_revoked(self, jti: str, user_id: str, issued_at: float) -> bool:
+        with self._lock:
+            jti_maybe = ('jti:' + jti) in self._bloom
+            user_maybe = ('user:' + user_id) in self._bloom
+            if not jti_maybe and not user_maybe:
+                return False
+            self.bloom_hits += 1
+            if jti in self._tokens or issued_at <= self._users.get(user_id, -1):
+                return True
+            self.false_positives += 1
+            return False
+
+    def load(self, db: Database):
+        """从吊销集合全量重建（集合只保存未过期的吊销记录，规模很小）"""
+        bloom, tokens, users = BloomFilter(), set(), {}
+        now = time.time()
+        for doc in db[REVOCATION_COLLECTION].find(
+            {'expire_at': {'$gt': datetime.fromtimestamp(now, timezone.utc)}},
+            {'_id': 0, 'jti': 1, 'user_id': 1, 'revoked_at': 1}
+        ):
+            self._add(bloom, tokens, users, doc)
+        with self._lock:
+            self._local = [doc for doc in self._local if doc['revoked_at'] >= now - 1]
+            for doc in self._local:
+                self._add(bloom, tokens, users, doc)
+            self._bloom, self._tokens, self._users = bloom, tokens, users
+            self.refreshes += 1
+            self.last_refresh_at = now
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {
+                "revoked_tokens": len(self._tokens),
+                "revoked_users": len(self._users),
+                "bloom_bits": self._bloom.n_bits,
+                "bloom_items": self._bloom.count,
+                "bloom_hits": self.bloom_hits,
+                "false_positives": self.false_positives,
+                "refreshes": self.refreshes,
+                "refresh_errors": self.refresh_errors,
+                "last_refresh_at": self.last_refresh_at,
+            }
+
+
+revocation_filter = RevocationFilter()
+
+
+def revoke(db: Database, expire_at: float, jti: str = None, user_id: str = None):
+    """写入吊销集合并立即更新本进程过滤器；jti 吊销单个令牌，user_id 吊销该用户此前签发的全部令牌"""
+    # expire_at 存为日期类型，供 TTL 索引清理
+    doc = {'revoked_at': time.time(), 'expire_at': datetime.fromtimestamp(expire_at, timezone.utc)}
+    if jti is not None:
+        doc['jti'] = jti
+    else:
+        doc['user_id'] = user_id
+    db[REVOCATION_COLLECTION].insert_one(dict(doc))
+    revocation_filter.add(doc)
+
+
+class RevocationRefresher(threading.Thread):
+    """周期性从吊销集合重新加载过滤器，使其他进程的吊销在一个刷新间隔内生效"""
+
+    def __init__(self, db: Database, interval: float = REVOCATION_REFRESH_INTERVAL):
+        super().__init__(name="token-revocation", daemon=True)
+        self.db = db
+        self.interval = interval
+        self._stop_event = threading.Event()
+
+    def run(self):
+        while not self._stop_event.wait(self.interval):
+            try:
+                revocation_filter.load(self.db)
+            except Exception as e:
+                revocation_filter.refresh_errors += 1
+                logging.error(f"吊销列表刷新失败：{str(e)}\n{traceback.format_exc()}")
+
+    def stop(self):
+        self._stop_event.set()
+        self.join()
+
+
+revocation_refresher: RevocationRefresher = None
+
+
+def start_revocation_refresher(db: Database) -> RevocationRefresher:
+    global revocation_refresher
+    if revocation_refresher is None or not revocation_refresher.is_alive():
+        revocation_filter.load(db)
+        revocation_refresher = RevocationRefresher(db)
+        revocation_refresher.start()
+    return revocation_refresher
+
+
+def stop_revocation_refresher():
+    global revocation_refresher
+    if revocation_refresher is not None:
+        revocation_refresher.stop()
+        revocation_refresher = None
+
+
+def get_revocation_stats() -> dict:
+    return revocation_filter.snapshot()
@@ -0,0 +1,200 @@
+import base64
+from bson import json_util
+from pymongo.database import Database
+from be.model.cache import TTLCache, SingleFlight
+from be.model.search_engine import search_index
+
+# 搜索结果缓存：键为 (keyword, store_id, page_num, page_size, total_limit, cursor)。
+# 限定店铺的结果按 store_id 分组，全站结果归入 GLOBAL_GROUP；
+# 任一店铺图书变化时该店铺的分组和全站分组一起失效，其他店铺的结果不受影响。
+SEARCH_CACHE_TTL = 30
+SEARCH_CACHE_MAX_ENTRIES = 10000
+search_cache = TTLCache(SEARCH_CACHE_MAX_ENTRIES, default_ttl=SEARCH_CACHE_TTL)
+_search_flight = SingleFlight()
+GLOBAL_GROUP = ('global',)  # 元组不会与 store_id 冲突
+
+# 搜索引擎："memory" 在内存索引加载完成后由内存倒排索引应答（中文按二元组切分），"mongo" 始终使用 $text
+SEARCH_ENGINE = "memory"
+
+# page_num 只用于浅分页：跳过的条数超过该值时需改用 cursor（上一页返回的 next_cursor）
+SEARCH_MAX_OFFSET = 10000
+
+
+def get_search_cache_stats() -> dict:
+    stats = search_cache.snapshot()
+    stats.update(_search_flight.snapshot())
+    return stats
+
+
+def invalidate_store(store_id: str) -> None:
+    """店铺图书变化后调用（在写入完成之后），使该店铺及全站的搜索结果缓存失效"""
+    search_cache.invalidate_group(store_id)
+    search_cache.invalidate_group(GLOBAL_GROUP)
+
+
+def encode_cursor(engine: str, book: dict) -> str:
+    """
+    把一页最后一条结果的 (score, _id) 编码为不透明游标。
+    两种引擎的 _id 含义不同（Mongo 为文档 ObjectId，内存索引为文档序号），游标中记录生成它的引擎。
+    """
+    raw = json_util.dumps([engine, book.get('score'), book['_id']])
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+
+def decode_cursor(cursor: str, engine: str) -> (float, object):
+    """解析游标，格式不正确或不是由 engine 生成时抛出 ValueError"""
+    try:
+        cursor_engine, score, last_id = json_util.loads(base64.urlsafe_b64decode(cursor.encode()))
+    except (TypeError, ValueError, IndexError) as e:
+        raise ValueError("cursor 无效") from e
+    if cursor_engine != engine:
+        raise ValueError("cursor 与当前搜索引擎不匹配，请从第一页重新翻页")
+    if score is not None and not isinstance(score, (int, float)):
+        raise ValueError("cursor 无效")
+    return score, last_id
+
+
+def run_search(db: Database, keyword: str, store_id: str, page_num: int, page_size: int,
+               total_limit: int = 0, cursor: str = None) -> dict:
+    """
+    直接查询 MongoDB（不经缓存）：一次聚合中用 $facet 同时取当前页和总数，$text 只计算一次。
+    total_limit > 0 时总数最多计到 total_limit，超过则返回 total_limit 并标记 total_capped（显示为 "10000+"）。
+    结果按 (score 降序, _id 升序) 排列；传入 cursor 时从上一页最后一条之后继续（忽略 page_num），
+    不再跳过前面的结果。有下一页时返回 next_cursor。
+    """
+    query = {}
+    if keyword:
+        query["$text"] = {"$search": keyword}
+    if store_id:
+        query["store_id"] = store_id
+
+    pipeline = [{"$match": query}]
+    if keyword:
+        pipeline.append({"$addFields": {"score": {"$meta": "textScore"}}})
+        sort = {"score": -1, "_id": 1}
+    else:
+        sort = {"_id": 1}
+
+    page_stages = []
+    if cursor:
+        last_score, last_id = decode_cursor(cursor, "mongo")
+        if keyword:
+            page_stages.append({"$match": {"$or": [
+                {"score": {"$lt": last_score}},
+                {"score": last_score, "_id": {"$gt": last_id}}
+            ]}})
+        else:
+            page_stages.append({"$match": {"_id": {"$gt": last_id}}})
+        page_stages.append({"$sort": sort})
+    else:
+        skip = (page_num - 1) * page_size
+        if skip > SEARCH_MAX_OFFSET:
+            raise ValueError(f"page_num 过大，请使用 cursor 翻页（最多跳过 {SEARCH_MAX_OFFSET} 条）")
+        page_stages.append({"$sort": sort})
+        page_stages.append({"$skip": skip})
+    # 多取一条用于判断是否还有下一页
+    page_stages.append({"$limit": page_size + 1})
+    page_stages.append({"$project": {
+        "score": 1,
+        "store_id": 1,
+        "book_id": "$id",  # 映射id为book_id
+        "title": 1,
+        "tags": 1,
+        "price": 1
+    }})
+
+    count_stage = [{"$count": "n"}]
+    if total_limit > 0:
+        count_stage.insert(0, {"$limit": total_limit + 1})
+
+    pipeline.append({"$facet": {"books": page_stages, "total": count_stage}})
+
+    result = next(db.books.aggregate(pipeline), {"books": [], "total": []})
+    total = result["total"][0]["n"] if result["total"] else 0
+    total_capped = 0 < total_limit < total
+    if total_capped:
+        total = total_limit
+
+    books = result["books"]
+    next_cursor = None
+    if len(books) > page_size:
+        books = books[:page_size]
+        next_cursor = encode_cursor("mongo", books[-1])
+    for book in books:
+        book.pop("_id", None)
+
+    return {
+        "total": total,
+        "total_capped": total_capped,
+        "total_display": f"{total}+" if total_capped else str(total),
+        "page_num": page_num,
+        "page_size": page_size,
+        "books": books,
+        "next_cursor": next_cursor
+    }
+
+
+def run_memory_search(keyword: str, store_id: str, page_num: int, page_size: int,
+                      total_limit: int = 0, cursor: str = None) -> dict:
+    """由内存倒排索引应答，响应结构与 run_search 相同（游标中的 _id 为索引内的文档序号）"""
+    after = None
+    offset = 0
+    if cursor:
+        after = decode_cursor(cursor, "memory")
+        if not isinstance(after[1], int) or after[0] is None:
+            raise ValueError("cursor 无效")
+    else:
+        offset = (page_num - 1) * page_size
+        if offset > SEARCH_MAX_OFFSET:
+            raise ValueError(f"page_num 过大，请使用 cursor 翻页（最多跳过 {SEARCH_MAX_OFFSET} 条）")
+
+    total, hits = search_index.search(keyword, store_id, limit=page_size + 1, offset=offset, after=after)
+    books = [{
+        "score": score,
+        "store_id": meta[0],
+        "book_id": meta[1],
+        "title": meta[2],
+        "tags": meta[3],
+        "price": meta[4],
+    } for score, _, meta in hits[:page_size]]
+    next_cursor = None
+    if len(hits) > page_size:
+        score, doc, _ = hits[page_size - 1]
+        next_cursor = encode_cursor("memory", {"score": score, "_id": doc})
+
+    total_capped = 0 < total_limit < total
+    if total_capped:
+        total = total_limit
+    return {
+        "total": total,
+        "total_capped": total_capped,
+        "total_display": f"{total}+" if total_capped else str(total),
+        "page_num": page_num,
+        "page_size": page_size,
+        "books": books,
+        "next_cursor": next_cursor
+    }
+
+
+def search_books(db: Database, keyword: str, store_id: str, page_num: int, page_size: int,
+                 total_limit: int = 0, cursor: str = None) -> dict:
+    """
+    带缓存的搜索：命中直接返回；未命中时相同参数的并发请求只查询一次数据库（singleflight）。
+    查询前记下缓存 generation，期间发生失效则不回填，避免缓存失效前读到的旧结果。
+    cursor 或 page_num 无效时抛出 ValueError；游标只能用于生成它的引擎（如内存索引加载完成前后切换了引擎）。
+    """
+    key = (keyword, store_id, page_num, page_size, total_limit, cursor)
+    data = search_cache.get(key)
+    if data is not None:
+        return data
+
+    def load():
+        generation = search_cache.generation
+        if SEARCH_ENGINE == "memory" and search_index.ready:
+            result = run_memory_search(keyword, store_id, page_num, page_size, total_limit, cursor)
+        else:
+            result = run_search(db, keyword, store_id, page_num, page_size, total_limit, cursor)
+        search_cache.put(key, result, group=store_id or GLOBAL_GROUP, generation=generation)
+        return result
+
+    return _search_flight.do(key, load)
@@ -0,0 +1,389 @@
+import ast
+import re
+import logging
+import threading
+import time
+from array import array
+from collections import Counter
+import numpy as np
+from pymongo.database import Database
+
+# 内存倒排索引：中文按字二元组（bigram）切分并另建单字词项（支持单字查询），英文/数字按词切分，
+# 标签另建整词索引（"#标签"）。
+# 倒排表为 array('I')（文档序号递增）及各字段词频 array('H')，文档只追加不修改，
+# 同一 (store_id, book_id) 重新加入时旧序号记为删除。查询时用 NumPy 向量化求交集、打分和取 top-k。
+SEARCH_FIELDS = ('title', 'tags', 'catalog', 'content')
+SEARCH_WEIGHTS = {'title': 10, 'tags': 5, 'catalog': 3, 'content': 1}  # 默认与 book_search_index 一致
+SEARCH_RANKING = 'bm25'   # 'bm25'（BM25F）或 'tf'（加权词频）
+BM25_K1 = 1.2
+BM25_B = 0.75
+SEARCH_INDEX_LOAD_BATCH = 1000
+
+TOKEN_PATTERN = re.compile(r'[\u3400-\u9fff\uf900-\ufaff]+|[0-9a-z]+')
+TAG_PREFIX = '#'
+STORE_PREFIX = '@'
+TF_MAX = 65535
+
+
+def is_cjk(run: str) -> bool:
+    return run[0] >= '\u3400'
+
+
+def tokenize(text: str) -> list:
+    """中文连续片段切为二元组（单字片段保留单字），其他按词切分"""
+    tokens = []
+    for run in TOKEN_PATTERN.findall(text.lower()):
+        if is_cjk(run) and len(run) > 1:
+            tokens.extend(run[i:i + 2] for i in range(len(run) - 1))
+        else:
+            tokens.append(run)
+    return tokens
+
+
+def unigrams(text: str) -> list:
+    """中文长度大于 1 的片段逐字切分（单字片段已由 tokenize 保留），供单字查询命中"""
+    return [char for run in TOKEN_PATTERN.findall(text.lower()) if is_cjk(run) and len(run) > 1 for char in run]
+
+
+def parse_tags(tags) -> list:
+    """tags 可能是列表、列表的字符串形式或换行分隔的字符串"""
+    if not tags:
+        return []
+    if isinstance(tags, str):
+        try:
+            value = ast.literal_eval(tags)
+            tags = value if isinstance(value, (list, tuple)) else tags.split('\n')
+        except (ValueError, SyntaxError):
+            tags = tags.split('\n')
+    return [str(tag).strip() for tag in tags if str(tag).strip()]
+
+
+def field_text(value) -> str:
+    if isinstance(value, (list, tuple)):
+        return '\n'.join(str(v) for v in value)
+    return str(value) if value is not None else ''
+
+
+class Posting:
+    """
+    倒排表：docs 为文档序号，tfs 为按文档交错存放的各字段词频（长度为 len(docs) * 字段数）。
+    查询读取只读的 ndarray 副本，倒排表追加时才失效重建，避免每次查询复制整条倒排表。
+    """
+    __slots__ = ('docs', 'tfs', '_frozen')
+
+    def __init__(self):
+        self.docs = array('I')
+        self.tfs = array('H')
+        self._frozen = None
+
+    def append(self, ordinal: int, row: list) -> None:
+        self.docs.append(ordinal)
+        self.tfs.extend(row)
+        self._frozen = None
+
+    def frozen(self) -> (np.ndarray, np.ndarray):
+        """返回 (文档序号, 词频矩阵) 的只读副本（词频矩阵行：文档，列：字段）"""
+        if self._frozen is None:
+            docs = np.frombuffer(self.docs, dtype=np.uint32).copy()
+            tfs = np.frombuffer(self.tfs, dtype=np.uint16).reshape(-1, len(SEARCH_FIELDS)).copy()
+            docs.setflags(write=False)
+            tfs.setflags(write=False)
+            self._frozen = (docs, tfs)
+        return self._frozen
+
+
+class IndexView:
+    """
+    查询用的索引快照：在锁内取出本次查询涉及的倒排表只读副本和打分所需的统计量，
+    求交集、打分在锁外进行，不阻塞并发的 add。快照之后加入的文档对本次查询不可见。
+    """
+    __slots__ = ('postings', 'deleted', 'n', 'lengths', 'total_lengths', 'weights', 'ranking', 'k1', 'b')
+
+    def __init__(self, index: 'SearchIndex', terms: list):
+        self.postings = {term: index.postings[term].frozen() for term in terms if term in index.postings}
+        self.deleted = index.deleted_array()
+        self.n = max(len(index.keys), 1)
+        # lengths 扩容时整体替换，已有文档的列不再修改，直接引用即可；total_lengths 原地累加，需复制
+        self.lengths = index.lengths
+        self.total_lengths = index.total_lengths.copy()
+        self.weights = index.weights
+        self.ranking = index.ranking
+        self.k1 = index.k1
+        self.b = index.b
+
+    def live(self, docs: np.ndarray) -> np.ndarray:
+        """过滤已被替换的旧文档序号"""
+        if self.deleted is None:
+            return np.ones(len(docs), dtype=bool)
+        return ~np.isin(docs, self.deleted)
+
+    def match(self, terms: list) -> (np.ndarray, list):
+        """
+        求所有词项倒排表的交集（从最短的倒排表开始逐个 intersect1d），
+        返回候选文档序号及其在各倒排表中的位置数组。
+        """
+        postings = [self.postings.get(term) for term in terms]
+        if any(p is None for p in postings):
+            return np.empty(0, dtype=np.uint32), []
+        order = sorted(range(len(postings)), key=lambda i: len(postings[i][0]))
+        docs = postings[order[0]][0]
+        positions = {order[0]: np.arange(len(docs))}
+        for i in order[1:]:
+            docs, left, right = np.intersect1d(docs, postings[i][0], assume_unique=True, return_indices=True)
+            for k in positions:
+                positions[k] = positions[k][left]
+            positions[i] = right
+            if not len(docs):
+                break
+        keep = self.live(docs)
+        return docs[keep], [positions[i][keep] for i in range(len(terms))]
+
+    def score(self, terms: list, positions: list, docs: np.ndarray) -> np.ndarray:
+        """
+        bm25：BM25F，各字段词频按字段长度归一化后加权求和，再经 k1 饱和、乘以 idf；
+        tf：按字段权重加权的词频之和（与 MongoDB textScore 的字段权重一致）。
+        """
+        scores = np.zeros(len(docs), dtype=np.float64)
+        if not len(docs):
+            return scores
+        if self.ranking == 'bm25':
+            # 各字段长度归一化因子（行：文档，列：字段）；空字段的平均长度按 1 计，其词频必为 0
+            avg = np.maximum(self.total_lengths / self.n, 1e-9)
+            norms = 1 - self.b + self.b * self.lengths[:, docs].T / avg
+        for term, pos in zip(terms, positions):
+            posting_docs, tfs = self.postings[term]
+            tf = tfs[pos].astype(np.float64)
+            if self.ranking == 'bm25':
+                tf = tf / norms
+            weighted = tf @ self.weights
+            if self.ranking == 'bm25':
+                df = len(posting_docs)
+                idf = np.log(1 + (self.n - df + 0.5) / (df + 0.5))
+                weighted = idf * weighted * (self.k1 + 1) / (weighted + self.k1)
+            scores += weighted
+        return scores
+
+
+class SearchIndex:
+    def __init__(self, weights: dict = None, ranking: str = None, k1: float = None, b: float = None):
+        self.weights = np.array([(weights or SEARCH_WEIGHTS).get(f, 0) for f in SEARCH_FIELDS], dtype=np.float64)
+        self.ranking = ranking or SEARCH_RANKING
+        self.k1 = BM25_K1 if k1 is None else k1
+        self.b = BM25_B if b is None else b
+        self._lock = threading.Lock()
+        self.postings = {}       # term -> Posting
+        self.meta = []           # 文档序号 -> (store_id, book_id, title, tags, price)
+        self.keys = {}           # (store_id, book_id) -> 当前文档序号
+        self.deleted = set()
+        self._deleted_array = None
+        # 各字段长度（词项数），按文档序号存放，容量不足时倍增
+        self.lengths = np.zeros((len(SEARCH_FIELDS), 1024), dtype=np.uint32)
+        self.total_lengths = np.zeros(len(SEARCH_FIELDS), dtype=np.float64)
+        self.ready = False
+        self.loaded_at = None
+        self.load_seconds = None
+
+    def __len__(self):
+        return len(self.keys)
+
+    def contains(self, store_id: str, book_id: str) -> bool:
+        with self._lock:
+            return (store_id, book_id) in self.keys
+
+    def set_weights(self, weights: dict) -> None:
+        """调整字段权重（未列出的字段权重为 0），立即作用于之后的查询"""
+        with self._lock:
+            self.weights = np.array([weights.get(f, 0) for f in SEARCH_FIELDS], dtype=np.float64)
+
+    def add(self, doc: dict, since: int = None) -> int:
+        """
+        加入一本书（books 文档结构：store_id、id、title、tags、catalog、content、price），返回文档序号。
+        since 不为空时，若同一本书已在序号 since 之后加入（加载期间由 index_book 写入的更新），保留已有的。
+        """
+        store_id = doc.get('store_id') or ''
+        book_id = doc.get('id') or doc.get('book_id')
+        tags = parse_tags(doc.get('tags'))
+
+        # 词项 -> 各字段词频
+        rows = {}
+        field_lengths = []
+        for f, field in enumerate(SEARCH_FIELDS):
+            text = '\n'.join(tags) if field == 'tags' else field_text(doc.get(field))
+            tokens = tokenize(text)
+            field_lengths.append(len(tokens))
+            counts = Counter(tokens)
+            counts.update(unigrams(text))
+            for term, tf in counts.items():
+                row = rows.get(term)
+                if row is None:
+                    row = rows[term] = [0] * len(SEARCH_FIELDS)
+                row[f] = tf if tf < TF_MAX else TF_MAX
+        # 标签整词及店铺也作为词项，店铺内搜索与关键字求交集即可
+        tag_column = SEARCH_FIELDS.index('tags')
+        for tag in tags:
+            row = [0] * len(SEARCH_FIELDS)
+            row[tag_column] = 1
+            rows[TAG_PREFIX + tag.lower()] = row
+        rows[STORE_PREFIX + store_id] = [0] * len(SEARCH_FIELDS)
+
+        with self._lock:
+            old = self.keys.get((store_id, book_id))
+            if since is not None and old is not None and old >= since:
+                return old
+            ordinal = len(self.meta)
+            self.meta.append((store_id, book_id, doc.get('title'), doc.get('tags'), doc.get('price')))
+            if ordinal >= self.lengths.shape[1]:
+                grown = np.zeros((len(SEARCH_FIELDS), self.lengths.shape[1] * 2), dtype=np.uint32)
+                grown[:, :ordinal] = self.lengths[:, :ordinal]
+                self.lengths = grown
+            self.lengths[:, ordinal] = field_lengths
+            self.total_lengths += field_lengths
+            if old is not None:
+                self.deleted.add(old)
+                self._deleted_array = None
+                self.total_lengths -= self.lengths[:, old]
+            self.keys[(store_id, book_id)] = ordinal
+            postings = self.postings
+            for term, row in rows.items():
+                posting = postings.get(term)
+                if posting is None:
+                    posting = postings[term] = Posting()
+                posting.append(ordinal, row)
+        return ordinal
+
+    def load(self, db: Database, batch_size: int = SEARCH_INDEX_LOAD_BATCH) -> int:
+        """从 books 集合全量构建索引，返回读取的文档数（加载期间已增量写入的图书不会被旧数据覆盖）"""
+        started = time.monotonic()
+        projection = dict.fromkeys(('store_id', 'id', 'price') + SEARCH_FIELDS, 1)
+        with self._lock:
+            since = len(self.meta)
+        count = 0
+        for doc in db.books.find({}, projection).sort('_id', 1).batch_size(batch_size):
+            self.add(doc, since=since)
+            count += 1
+        self.load_seconds = round(time.monotonic() - started, 3)
+        self.loaded_at = time.time()
+        self.ready = True
+        return count
+
+    def deleted_array(self) -> np.ndarray:
+        """已被替换的旧文档序号（调用方需持有 _lock），没有时返回 None"""
+        if not self.deleted:
+            return None
+        if self._deleted_array is None:
+            self._deleted_array = np.fromiter(self.deleted, dtype=np.uint32, count=len(self.deleted))
+        return self._deleted_array
+
+    @staticmethod
+    def top_k(docs: np.ndarray, scores: np.ndarray, k: int) -> np.ndarray:
+        """
+        取 (score 降序, 文档序号升序) 的前 k 个下标：先 argpartition 找出第 k 大的分数，
+        只对高于该分数的候选及同分中文档序号最小者排序（保证分页边界确定），避免全量排序。
+        """
+        if k <= 0 or not len(docs):
+            return np.empty(0, dtype=np.int64)
+        if k < len(docs):
+            kth = np.partition(scores, len(scores) - k)[len(scores) - k]
+            above = np.flatnonzero(scores > kth)
+            ties = np.flatnonzero(scores == kth)
+            need = k - len(above)
+            if len(ties) > need:
+                # 宽泛查询常有大量同分文档，只保留其中文档序号最小的 need 个
+                ties = ties[np.argpartition(docs[ties], need - 1)[:need]]
+            candidates = np.concatenate([above, ties])
+        else:
+            candidates = np.arange(len(docs))
+        order = np.lexsort((docs[candidates], -scores[candidates]))
+        return candidates[order[:k]]
+
+    def search(self, keyword: str, store_id: str = '', limit: int = 20, offset: int = 0,
+               after: tuple = None) -> (int, list):
+        """
+        关键字二元组（单字关键字为单字词项）全部命中（AND）或与某个标签完全相同即为匹配，按相关度降序、文档序号升序排列。
+        after 为上一页最后一条的 (score, 文档序号)，传入时从其后继续（忽略 offset）。
+        返回 (总数, [(score, 文档序号, meta)])。
+        """
+        keyword = (keyword or '').strip()
+        text_terms = list(dict.fromkeys(tokenize(keyword)))
+        scope = [STORE_PREFIX + store_id] if store_id else []
+        tag_term = TAG_PREFIX + keyword.lower()
+        if keyword and not text_terms:
+            return 0, []
+
+        # 锁内只取快照，求交集、打分、取 top-k 在锁外进行
+        with self._lock:
+            view = IndexView(self, text_terms + scope + [tag_term] if text_terms else scope)
+            if not text_terms and not scope:
+                docs = np.fromiter(self.keys.values(), dtype=np.uint32, count=len(self.keys))
+            meta = self.meta
+
+        if text_terms:
+            docs, positions = view.match(text_terms + scope)
+            scores = view.score(text_terms, positions[:len(text_terms)], docs)
+            if tag_term in view.postings:
+                tag_docs, tag_positions = view.match([tag_term] + scope)
+                extra = ~np.isin(tag_docs, docs)
+                tag_scores = view.score([tag_term], [tag_positions[0][extra]], tag_docs[extra])
+                docs = np.concatenate([docs, tag_docs[extra]])
+                scores = np.concatenate([scores, tag_scores])
+        else:
+            # 无关键字：列出全部（或店铺内）图书
+            if scope:
+                docs, _ = view.match(scope)
+            scores = np.zeros(len(docs), dtype=np.float64)
+
+        total = len(docs)
+        if after is not None:
+            last_score, last_doc = after
+            keep = (scores < last_score) | ((scores == last_score) & (docs > last_doc))
+            docs, scores = docs[keep], scores[keep]
+            offset = 0
+        top = self.top_k(docs, scores, offset + limit)[offset:]
+        return total, [(float(scores[i]), int(docs[i]), meta[docs[i]]) for i in top]
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {
+                "ready": self.ready,
+                "ranking": self.ranking,
+                "weights": dict(zip(SEARCH_FIELDS, self.weights.tolist())),
+                "documents": len(self.keys),
+                "deleted": len(self.deleted),
+                "terms": len(self.postings),
+                "postings": sum(len(p.docs) for p in self.postings.values()),
+                "load_seconds": self.load_seconds,
+                "loaded_at": self.loaded_at,
+            }
+
+
+search_index = SearchIndex()
+_loader_thread = None
+
+
+def start_search_index_loader(db: Database) -> threading.Thread:
+    """后台从 books 加载内存索引；加载完成前搜索仍走 MongoDB"""
+    global _loader_thread
+
+    def run():
+        try:
+            count = search_index.load(db)
+            logging.info(f"内存搜索索引加载完成：{count} 本图书，耗时 {search_index.load_seconds}s")
+        except Exception as e:
+            logging.error(f"内存搜索索引加载失败: {str(e)}")
+
+    if _loader_thread is None or not _loader_thread.is_alive():
+        _loader_thread = threading.Thread(target=run, name="search-index-loader", daemon=True)
+        _loader_thread.start()
+    return _loader_thread
+
+
+def index_book(store_id: str, book_id: str, book_info: dict) -> None:
+    """上架后增量更新内存索引（索引尚未加载完成时也可写入，加载时同一本书以后加入者为准）"""
+    doc = dict(book_info)
+    doc['store_id'] = store_id
+    doc['id'] = book_id
+    search_index.add(doc)
+
+
+def get_search_index_stats() -> dict:
+    return search_index.snapshot()
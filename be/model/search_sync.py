@@ -0,0 +1,284 @@
+"""
+搜索索引同步：把卖家上架到 store 的图书投影到搜索集合 books（并补充内存搜索索引）。
+
+    1. change_stream：部署支持时（副本集 / 分片集群）监听 store 的插入、更新和替换事件，
+       价格、库存或目录变化也会同步，恢复令牌保存在检查点中；
+    2. poll：按 store._id 高水位分批轮询，只同步生成时间早于 SEARCH_SYNC_SETTLE 秒前的行，
+       避免并发插入的行以乱序提交而被跳过（只能发现新插入的行，更新需 change stream）。
+
+投影保留目录的完整字段（图片除外），与 books 原有文档结构一致，并以 synced_from 标记来源，
+读取原始图书数据的一方（如 fe.access.book.BookDB）据此排除同步写入的文档。
+写入 books 以 (store_id, book_id) upsert，重复同步是幂等的。
+新鲜度延迟 = 同步完成时间 - 库存行插入时间（由 ObjectId 得出），见 /metrics/search_sync。
+也可手动补齐：python -m be.model.search_sync
+"""
+import argparse
+import logging
+import threading
+import time
+import traceback
+from datetime import datetime, timedelta, timezone
+from bson import ObjectId
+from pymongo import UpdateOne
+from pymongo.database import Database
+from pymongo.errors import PyMongoError
+from be.model.catalog import attach_book_info
+from be.model.search import invalidate_store
+from be.model.search_engine import search_index
+from be.model.transaction import transactions_supported
+
+SEARCH_SYNC_ENABLED = True
+SEARCH_SYNC_MODE = 'auto'        # 'auto'（支持时用 change stream）、'change_stream' 或 'poll'
+SEARCH_SYNC_BATCH_SIZE = 500
+SEARCH_SYNC_INTERVAL = 1.0       # 轮询间隔 / change stream 空闲等待（秒）
+SEARCH_SYNC_SETTLE = 2.0         # 轮询模式下只同步插入时间早于该秒数的行
+
+SYNC_COLLECTION = 'search_sync'
+SYNC_ID = 'store_to_books'
+SYNC_SOURCE_FIELD = 'synced_from'
+SYNC_SOURCE = 'store'
+SEARCH_SYNC_EXCLUDED = ('pictures', 'picture_ids', 'picture')  # 图片不进入搜索集合
+
+# 只改变库存的更新（下单、补货）：只需刷新 books 中的 stock_level
+STOCK_ONLY_FIELDS = {'stock_level'}
+
+
+def project_rows(db: Database, rows: list) -> list:
+    """把库存行投影为 books 文档：关联共享目录取全部描述性字段（图片除外），保留 price、stock_level 等库存字段"""
+    attach_book_info(db, rows, ['*'])
+    docs = []
+    for row in rows:
+        info = row.get('book_info') or {}
+        doc = {k: v for k, v in info.items() if k not in SEARCH_SYNC_EXCLUDED and v is not None}
+        doc.update({
+            'store_id': row['store_id'],
+            'book_id': row['book_id'],
+            'id': row['book_id'],
+            'price': row.get('price') or 0,
+            'stock_level': row.get('stock_level', 0),
+            SYNC_SOURCE_FIELD: SYNC_SOURCE,
+        })
+        docs.append(doc)
+    return docs
+
+
+def change_kind(change: dict) -> str:
+    """change stream 事件分类：insert（新上架）、stock（只有库存变化）、update（价格或目录等变化）"""
+    if change['operationType'] == 'insert':
+        return 'insert'
+    if change['operationType'] == 'update':
+        updated = set(change.get('updateDescription', {}).get('updatedFields', {}))
+        removed = set(change.get('updateDescription', {}).get('removedFields', []))
+        if not removed and updated <= STOCK_ONLY_FIELDS:
+            return 'stock'
+    return 'update'
+
+
+class SearchSync(threading.Thread):
+    """同步线程：每批写入 books 后推进检查点（高水位 _id 或 change stream 恢复令牌）"""
+
+    def __init__(self, db: Database, mode: str = None, batch_size: int = SEARCH_SYNC_BATCH_SIZE,
+                 interval: float = SEARCH_SYNC_INTERVAL, settle: float = SEARCH_SYNC_SETTLE,
+                 sync_id: str = SYNC_ID):
+        super().__init__(name="search-sync", daemon=True)
+        self.db = db
+        self.sync_id = sync_id  # 检查点文档 _id，不同的同步任务互不影响
+        self.store_col = db['store']
+        self.sync_col = db[SYNC_COLLECTION]
+        self.mode = mode or SEARCH_SYNC_MODE
+        self.batch_size = batch_size
+        self.interval = interval
+        self.settle = settle
+        self._stop_event = threading.Event()
+        self._lock = threading.Lock()
+        self.stats = {
+            'mode': None if self.mode == 'auto' else self.mode,
+            'synced': 0,
+            'batches': 0,
+            'last_lag_seconds': None,
+            'max_lag_seconds': 0.0,
+            'last_synced_at': None,
+            'errors': 0,
+        }
+
+    def run(self):
+        mode = self.mode
+        if mode == 'auto':
+            mode = 'change_stream' if transactions_supported() else 'poll'
+        self.stats['mode'] = mode
+        while not self._stop_event.is_set():
+            try:
+                if mode == 'change_stream':
+                    self._follow_change_stream()
+                else:
+                    self.sync_once()
+                    self._stop_event.wait(self.interval)
+            except PyMongoError as e:
+                self.stats['errors'] += 1
+                logging.error(f"搜索索引同步失败：{str(e)}\n{traceback.format_exc()}")
+                self._stop_event.wait(self.interval)
+
+    def stop(self):
+        self._stop_event.set()
+        self.join()
+
+    def sync_once(self) -> int:
+        """轮询模式：从高水位之后分批同步到 (now - settle) 为止，返回同步的行数"""
+        state = self.sync_col.find_one({'_id': self.sync_id}) or {}
+        last_id = state.get('last_id')
+        # settle 为 0 时（手动补齐、change stream 启动时补齐）不设上界
+        upper = None
+        if self.settle > 0:
+            upper = ObjectId.from_datetime(datetime.now(timezone.utc) - timedelta(seconds=self.settle))
+        synced = 0
+        while not self._stop_event.is_set():
+            id_range = {}
+            if upper is not None:
+                id_range['$lt'] = upper
+            if last_id is not None:
+                id_range['$gt'] = last_id
+            query = {'_id': id_range} if id_range else {}
+            rows = list(
+                self.store_col.find(query).sort('_id', 1).limit(self.batch_size)
+            )
+            if not rows:
+                break
+            self.apply_rows(rows)
+            last_id = rows[-1]['_id']
+            self.sync_col.update_one(
+                {'_id': self.sync_id},
+                {'$set': {'last_id': last_id, 'updated_at': time.time()}},
+                upsert=True
+            )
+            synced += len(rows)
+        return synced
+
+    def _follow_change_stream(self):
+        """change stream 模式：先打开监听再补齐历史数据，两者重叠的行幂等 upsert"""
+        state = self.sync_col.find_one({'_id': self.sync_id}) or {}
+        pipeline = [{'$match': {'operationType': {'$in': ['insert', 'update', 'replace']}}}]
+        with self.store_col.watch(
+            pipeline, full_document='updateLookup', resume_after=state.get('resume_token')
+        ) as stream:
+            if state.get('resume_token') is None:
+                self.settle = 0
+                self.sync_once()
+            while not self._stop_event.is_set() and stream.alive:
+                batches = {'insert': [], 'update': [], 'stock': []}
+                received = 0
+                deadline = time.monotonic() + self.interval
+                while received < self.batch_size and time.monotonic() < deadline:
+                    change = stream.try_next()
+                    if change is None:
+                        if received:
+                            break
+                        self._stop_event.wait(0.05)
+                        continue
+                    received += 1
+                    # 更新事件读取的是当前完整文档，期间已被删除时为空
+                    if change.get('fullDocument') is not None:
+                        batches[change_kind(change)].append(change['fullDocument'])
+                for kind, rows in batches.items():
+                    if rows:
+                        self.apply_rows(rows, kind)
+                self.sync_col.update_one(
+                    {'_id': self.sync_id},
+                    {'$set': {'resume_token': stream.resume_token, 'updated_at': time.time()}},
+                    upsert=True
+                )
+
+    def apply_rows(self, rows: list, kind: str = 'insert'):
+        """
+        投影并 upsert 到 books，按事件类型维护内存索引和搜索缓存：
+        insert 补充内存索引、失效店铺缓存并记录新鲜度延迟；update 重建内存索引条目并失效缓存；
+        stock 只刷新 books 中的库存（搜索结果不含库存，内存索引和缓存不受影响）。
+        """
+        docs = project_rows(self.db, rows)
+        self.db.books.bulk_write([
+            UpdateOne({'store_id': doc['store_id'], 'book_id': doc['book_id']}, {'$set': doc}, upsert=True)
+            for doc in docs
+        ], ordered=False)
+        if kind != 'stock':
+            for doc in docs:
+                if kind == 'update':
+                    search_index.add(doc)
+                # 本进程上架的图书已由 Seller 加入内存索引，只补充其他途径写入的；
+                # since=0 使 add 在锁内再确认一次，检查之后并发写入的新版本不会被覆盖
+                elif not search_index.contains(doc['store_id'], doc['book_id']):
+                    search_index.add(doc, since=0)
+            for store_id in {doc['store_id'] for doc in docs}:
+                invalidate_store(store_id)
+
+        now = time.time()
+        lags = []
+        if kind == 'insert':
+            lags = [now - row['_id'].generation_time.timestamp() for row in rows if isinstance(row['_id'], ObjectId)]
+        with self._lock:
+            self.stats['synced'] += len(rows)
+            self.stats['batches'] += 1
+            self.stats['last_synced_at'] = now
+            if lags:
+                self.stats['last_lag_seconds'] = round(max(lags), 3)
+                self.stats['max_lag_seconds'] = round(max(self.stats['max_lag_seconds'], max(lags)), 3)
+
+    def snapshot(self) -> dict:
+        state = self.sync_col.find_one({'_id': self.sync_id}, {'resume_token': 0}) or {}
+        last_id = state.get('last_id')
+        # 积压：高水位之后尚未同步的库存行（change stream 模式下以事件为准，不统计）
+        pending = None
+        if self.stats['mode'] == 'poll':
+            query = {'_id': {'$gt': last_id}} if last_id is not None else {}
+            pending = self.store_col.count_documents(query)
+        with self._lock:
+            stats = dict(self.stats)
+        stats['high_water_mark'] = str(last_id) if last_id is not None else None
+        stats['pending'] = pending
+        stats['running'] = self.is_alive()
+        # 当前新鲜度：最早一条未同步行已等待的时间
+        if pending:
+            oldest = self.store_col.find_one(query, {'_id': 1}, sort=[('_id', 1)])
+            stats['freshness_lag_seconds'] = round(time.time() - oldest['_id'].generation_time.timestamp(), 3)
+        else:
+            stats['freshness_lag_seconds'] = 0.0
+        return stats
+
+
+search_sync: SearchSync = None
+
+
+def start_search_sync(db: Database) -> SearchSync:
+    global search_sync
+    if SEARCH_SYNC_ENABLED and (search_sync is None or not search_sync.is_alive()):
+        search_sync = SearchSync(db)
+        search_sync.start()
+    return search_sync
+
+
+def stop_search_sync():
+    global search_sync
+    if search_sync is not None:
+        search_sync.stop()
+        search_sync = None
+
+
+def get_search_sync_stats() -> dict:
+    if search_sync is None:
+        return {'running': False}
+    return search_sync.snapshot()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="把 store 中的图书同步到搜索集合 books")
+    parser.add_argument('--mongo-uri', default=None)
+    parser.add_argument('--batch-size', type=int, default=SEARCH_SYNC_BATCH_SIZE)
+    args = parser.parse_args()
+
+    from be.model.store import get_client, DB_NAME, DEFAULT_MONGO_URI
+    logging.basicConfig(level=logging.INFO)
+    db = get_client(args.mongo_uri or DEFAULT_MONGO_URI)[DB_NAME]
+    count = SearchSync(db, mode='poll', batch_size=args.batch_size, settle=0).sync_once()
+    print(f"同步 {count} 条库存记录到 books")
+
+
+if __name__ == "__main__":
+    main()
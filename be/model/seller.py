@@ -1,174 +1,305 @@
-from pymongo import MongoClient
-from be.model import error
-from be.model.user import User  # 导入用户类用于 Token 验证
-
-
-class Seller:
-    def __init__(self):
-        # 连接本地 MongoDB（默认端口 27017）
-        self.client = MongoClient('mongodb://localhost:27017/')
-        self.db = self.client['bookstore']  # 使用 bookstore 数据库
-
-        # 初始化集合（对应原 SQL 表）
-        self.store_col = self.db['store']  # 店铺库存集合
-        self.user_store_col = self.db['user_store']  # 用户-店铺关联集合
-        self.order_col = self.db['new_order']  # 订单集合
-        self.user_col = self.db['user']  # 用户集合
-
-        # 初始化 User 实例用于 Token 验证
-        self.user = User()
-
-    # 辅助方法：检查用户是否存在
-    def user_id_exist(self, user_id: str) -> bool:
-        return self.user_col.find_one({'user_id': user_id}) is not None
-
-    # 辅助方法：检查店铺是否存在
-    def store_id_exist(self, store_id: str) -> bool:
-        return self.user_store_col.find_one({'store_id': store_id}) is not None
-
-    # 辅助方法：检查图书是否存在于店铺
-    def book_id_exist(self, store_id: str, book_id: str) -> bool:
-        return self.store_col.find_one({
-            'store_id': store_id,
-            'book_id': book_id
-        }) is not None
-
-    def add_book(
-            self,
-            user_id: str,
-            store_id: str,
-            book_id: str,
-            book_json_str: str,
-            stock_level: int,
-    ) -> (int, str):
-        try:
-            # 验证用户存在
-            if not self.user_id_exist(user_id):
-                return error.error_non_exist_user_id(user_id)
-
-            # 验证店铺存在
-            if not self.store_id_exist(store_id):
-                return error.error_non_exist_store_id(store_id)
-
-            # 验证图书不存在于店铺
-            if self.book_id_exist(store_id, book_id):
-                return error.error_exist_book_id(book_id)
-
-            # 插入图书到店铺库存
-            self.store_col.insert_one({
-                'store_id': store_id,
-                'book_id': book_id,
-                'book_info': book_json_str,  # 保留原 JSON 字符串格式
-                'stock_level': stock_level
-            })
-
-            return 200, "ok"
-
-        except Exception as e:
-            return 530, f"系统错误：{str(e)}"
-
-    def add_stock_level(
-            self, user_id: str, store_id: str, book_id: str, add_stock_level: int
-    ) -> (int, str):
-        try:
-            # 验证用户存在
-            if not self.user_id_exist(user_id):
-                return error.error_non_exist_user_id(user_id)
-
-            # 验证店铺存在
-            if not self.store_id_exist(store_id):
-                return error.error_non_exist_store_id(store_id)
-
-            # 验证图书存在于店铺
-            if not self.book_id_exist(store_id, book_id):
-                return error.error_non_exist_book_id(book_id)
-
-            # 增加库存（原子操作）
-            self.store_col.update_one(
-                {
-                    'store_id': store_id,
-                    'book_id': book_id
-                },
-                {'$inc': {'stock_level': add_stock_level}}  # 累加库存
-            )
-
-            return 200, "ok"
-
-        except Exception as e:
-            return 530, f"系统错误：{str(e)}"
-
-    def create_store(self, user_id: str, store_id: str) -> (int, str):
-        try:
-            # 验证用户存在
-            if not self.user_id_exist(user_id):
-                return error.error_non_exist_user_id(user_id)
-
-            # 验证店铺不存在
-            if self.store_id_exist(store_id):
-                return error.error_exist_store_id(store_id)
-
-            # 创建店铺（关联用户-店铺）
-            self.user_store_col.insert_one({
-                'store_id': store_id,
-                'user_id': user_id
-            })
-
-            return 200, "ok"
-
-        except Exception as e:
-            return 530, f"系统错误：{str(e)}"
-
-    def ship_order(self, seller_id: str, store_id: str, order_id: str, token: str) -> (int, str):
-        try:
-            # 1. 验证 Token 有效性
-            if not self.user.check_token(token, seller_id):
-                return error.error_authorization_fail()
-
-            # 2. 验证店铺存在
-            if not self.store_id_exist(store_id):
-                return error.error_non_exist_store_id(store_id)
-
-            # 3. 验证卖家是否为店铺所有者
-            if not self._is_store_owner(seller_id, store_id):
-                return error.error_authorization_fail()
-
-            # 4. 查询订单并验证存在性
-            order = self.get_order(order_id)
-            if not order:
-                return error.error_invalid_order_id(order_id)
-
-            # 5. 验证订单状态为已付款
-            if order['status'] != "paid":
-                return error.error_order_not_paid(order_id)
-
-            # 6. 验证订单归属当前店铺
-            if order['store_id'] != store_id:
-                return error.error_authorization_fail()
-
-            # 7. 更新订单状态为已发货
-            self.update_order_status(order_id, "shipped")
-
-            return 200, "ok"
-
-        except Exception as e:
-            return 530, f"系统错误：{str(e)}"
-
-    def get_order(self, order_id: str) -> dict:
-        """查询订单信息（返回字典格式，适配 MongoDB）"""
-        return self.order_col.find_one({
-            'order_id': order_id
-        })
-
-    def update_order_status(self, order_id: str, status: str) -> None:
-        """更新订单状态（原子操作）"""
-        self.order_col.update_one(
-            {'order_id': order_id},
-            {'$set': {'status': status}}
-        )
-
-    def _is_store_owner(self, user_id: str, store_id: str) -> bool:
-        """验证用户是否为店铺所有者"""
-        return self.user_store_col.find_one({
-            'user_id': user_id,
-            'store_id': store_id
+import json
+from pymongo import UpdateOne
+from pymongo.errors import BulkWriteError
+from be.model import error
+from be.model.store import get_db
+from be.model.user import User  # 导入用户类用于 Token 验证
+from be.model.order_state import OrderStateMachine
+from be.model.catalog import make_inventory_row, write_catalog
+from be.model.picture import PictureStore
+from be.model.search import invalidate_store
+from be.model.search_engine import index_book
+
+
+ADD_BOOKS_CHUNK_SIZE = 1000  # 批量上架时每次 insert_many 的文档数
+STOCK_CHUNK_SIZE = 1000      # 批量调整库存时每次 bulk_write 的行数
+DUPLICATE_KEY_CODE = 11000
+
+
+def make_store_book(store_id: str, book_id: str, book_info, stock_level: int,
+                    pictures: PictureStore = None) -> (dict, dict):
+    """
+    构造店铺库存行及其共享目录内容；兼容旧调用方传入的 JSON 字符串。
+    传入 pictures 时，内嵌的 base64 图片先写入图片存储，目录内容中只保留 picture_ids。
+    """
+    if isinstance(book_info, str):
+        book_info = json.loads(book_info)
+    if pictures is not None:
+        book_info = pictures.externalize(book_info)
+    return make_inventory_row(store_id, book_id, book_info, stock_level)
+
+
+class Seller:
+    def __init__(self):
+        # 复用进程共享的 MongoDB 连接池
+        self.db = get_db()
+
+        # 初始化集合（对应原 SQL 表）
+        self.store_col = self.db['store']  # 店铺库存集合
+        self.user_store_col = self.db['user_store']  # 用户-店铺关联集合
+        self.order_col = self.db['new_order']  # 订单集合
+        self.user_col = self.db['user']  # 用户集合
+        self.pictures = PictureStore(self.db)  # 图书图片（按内容哈希去重）
+
+        # 初始化 User 实例用于 Token 验证
+        self.user = User()
+        self.state = OrderStateMachine(self.order_col)
+
+    # 辅助方法：检查用户是否存在
+    def user_id_exist(self, user_id: str) -> bool:
+        return self.user_col.find_one({'user_id': user_id}) is not None
+
+    # 辅助方法：检查店铺是否存在
+    def store_id_exist(self, store_id: str) -> bool:
+        return self.user_store_col.find_one({'store_id': store_id}) is not None
+
+    # 辅助方法：检查图书是否存在于店铺
+    def book_id_exist(self, store_id: str, book_id: str) -> bool:
+        return self.store_col.find_one({
+            'store_id': store_id,
+            'book_id': book_id
+        }) is not None
+
+    def add_book(
+            self,
+            user_id: str,
+            store_id: str,
+            book_id: str,
+            book_info: dict,
+            stock_level: int,
+    ) -> (int, str):
+        try:
+            # 验证用户存在
+            if not self.user_id_exist(user_id):
+                return error.error_non_exist_user_id(user_id)
+
+            # 验证店铺存在
+            if not self.store_id_exist(store_id):
+                return error.error_non_exist_store_id(store_id)
+
+            # 验证图书不存在于店铺
+            if self.book_id_exist(store_id, book_id):
+                return error.error_exist_book_id(book_id)
+
+            # 描述性内容写入共享目录（相同内容只存一份），店铺库存只保存精简行
+            row, content = make_store_book(store_id, book_id, book_info, stock_level, self.pictures)
+            write_catalog(self.db, {row['catalog_id']: content})
+            self.store_col.insert_one(row)
+            index_book(store_id, book_id, dict(content, price=row['price']))
+            invalidate_store(store_id)
+
+            return 200, "ok"
+
+        except Exception as e:
+            return 530, f"系统错误：{str(e)}"
+
+    def add_books(self, user_id: str, store_id: str, books) -> (int, str, list):
+        """
+        批量上架：books 为可迭代的 {"book_info": {...}, "stock_level": n}（可以是流式解析的生成器）。
+        用户和店铺只校验一次，按 ADD_BOOKS_CHUNK_SIZE 分块写入共享目录并 insert_many(ordered=False)，
+        重复图书由 (store_id, book_id) 唯一索引拒绝，缺少 id 或库存不是非负整数的条目返回 400。
+        返回与输入顺序一致的逐条结果。
+        """
+        try:
+            if not self.user_id_exist(user_id):
+                return error.error_non_exist_user_id(user_id) + ([],)
+            if not self.store_id_exist(store_id):
+                return error.error_non_exist_store_id(store_id) + ([],)
+
+            results = []
+            chunk = []  # (结果下标, 库存行, 目录内容)
+            for item in books:
+                book_info = item.get('book_info') if isinstance(item, dict) else None
+                book_id = book_info.get('id') if isinstance(book_info, dict) else None
+                # 格式错误的条目逐条报错，不影响其余条目（也不会中断已开始的分块写入）
+                invalid = self._invalid_item(book_id, item)
+                if invalid is None:
+                    try:
+                        row, content = make_store_book(
+                            store_id, book_id, book_info, item.get('stock_level', 0), self.pictures
+                        )
+                    except (TypeError, ValueError, AttributeError):
+                        invalid = "book_info"
+                if invalid is not None:
+                    code, message = error.error_invalid_parameter(invalid)
+                    results.append({'book_id': book_id, 'code': code, 'message': message})
+                    continue
+                results.append({'book_id': book_id, 'code': 200, 'message': "ok"})
+                chunk.append((len(results) - 1, row, content))
+                if len(chunk) >= ADD_BOOKS_CHUNK_SIZE:
+                    self._insert_books(chunk, results)
+                    chunk = []
+            if chunk:
+                self._insert_books(chunk, results)
+            invalidate_store(store_id)
+
+            return 200, "ok", results
+
+        except Exception as e:
+            return 530, f"系统错误：{str(e)}", []
+
+    @staticmethod
+    def _invalid_item(book_id, item: dict) -> str:
+        """返回批量上架条目中无效的字段名，有效时返回 None"""
+        if not book_id or not isinstance(book_id, str):
+            return "book_info.id"
+        stock_level = item.get('stock_level', 0)
+        if not isinstance(stock_level, int) or isinstance(stock_level, bool) or stock_level < 0:
+            return "stock_level"
+        return None
+
+    def _insert_books(self, chunk: list, results: list) -> None:
+        """先写共享目录，再无序批量插入库存行，失败的条目按 writeErrors 中的下标回填到结果中，成功的条目加入搜索索引"""
+        write_catalog(self.db, {row['catalog_id']: content for _, row, content in chunk})
+        try:
+            self.store_col.insert_many([row for _, row, _ in chunk], ordered=False)
+        except BulkWriteError as e:
+            for write_error in e.details['writeErrors']:
+                result = results[chunk[write_error['index']][0]]
+                if write_error['code'] == DUPLICATE_KEY_CODE:
+                    result['code'], result['message'] = error.error_exist_book_id(result['book_id'])
+                else:
+                    result['code'], result['message'] = 530, write_error['errmsg']
+        # 插入成功的图书增量加入内存搜索索引
+        for idx, row, content in chunk:
+            if results[idx]['code'] == 200:
+                index_book(row['store_id'], row['book_id'], dict(content, price=row['price']))
+
+    def add_stock_level(
+            self, user_id: str, store_id: str, book_id: str, add_stock_level: int
+    ) -> (int, str):
+        try:
+            # 验证用户存在
+            if not self.user_id_exist(user_id):
+                return error.error_non_exist_user_id(user_id)
+
+            # 验证店铺存在
+            if not self.store_id_exist(store_id):
+                return error.error_non_exist_store_id(store_id)
+
+            # 验证图书存在于店铺
+            if not self.book_id_exist(store_id, book_id):
+                return error.error_non_exist_book_id(book_id)
+
+            # 增加库存（原子操作）
+            self.store_col.update_one(
+                {
+                    'store_id': store_id,
+                    'book_id': book_id
+                },
+                {'$inc': {'stock_level': add_stock_level}}  # 累加库存
+            )
+
+            return 200, "ok"
+
+        except Exception as e:
+            return 530, f"系统错误：{str(e)}"
+
+    def add_stock_levels(self, user_id: str, store_id: str, rows) -> (int, str, dict):
+        """
+        批量调整库存：rows 为可迭代的 (book_id, delta)（可以是流式解析的生成器）。
+        用户和店铺只校验一次；每 STOCK_CHUNK_SIZE 行用一次 $in 查询找出店铺中存在的图书，
+        同一图书的多行合并为一次 $inc，再用一次 bulk_write 写入。
+        返回 {"updated": 生效行数, "missing": 店铺中不存在的图书, "invalid": 格式错误行的序号（从 1 开始）}。
+        """
+        try:
+            if not self.user_id_exist(user_id):
+                return error.error_non_exist_user_id(user_id) + ({},)
+            if not self.store_id_exist(store_id):
+                return error.error_non_exist_store_id(store_id) + ({},)
+
+            report = {'updated': 0, 'missing': [], 'invalid': []}
+            chunk = []
+            for row_no, (book_id, delta) in enumerate(rows, 1):
+                if not book_id or not isinstance(delta, int) or isinstance(delta, bool):
+                    report['invalid'].append(row_no)
+                    continue
+                chunk.append((book_id, delta))
+                if len(chunk) >= STOCK_CHUNK_SIZE:
+                    self._apply_stock_chunk(store_id, chunk, report)
+                    chunk = []
+            if chunk:
+                self._apply_stock_chunk(store_id, chunk, report)
+            # 同一图书出现在多个分块中时只报告一次，保持首次出现的顺序
+            report['missing'] = list(dict.fromkeys(report['missing']))
+
+            return 200, "ok", report
+
+        except Exception as e:
+            return 530, f"系统错误：{str(e)}", {}
+
+    def _apply_stock_chunk(self, store_id: str, chunk: list, report: dict) -> None:
+        deltas = {}
+        for book_id, delta in chunk:
+            deltas[book_id] = deltas.get(book_id, 0) + delta
+        existing = {
+            doc['book_id'] for doc in self.store_col.find(
+                {'store_id': store_id, 'book_id': {'$in': list(deltas)}},
+                {'_id': 0, 'book_id': 1}
+            )
+        }
+        requests = [
+            UpdateOne({'store_id': store_id, 'book_id': book_id}, {'$inc': {'stock_level': delta}})
+            for book_id, delta in deltas.items() if book_id in existing
+        ]
+        if requests:
+            self.store_col.bulk_write(requests, ordered=False)
+        report['updated'] += sum(1 for book_id, _ in chunk if book_id in existing)
+        report['missing'].extend(book_id for book_id in deltas if book_id not in existing)
+
+    def create_store(self, user_id: str, store_id: str) -> (int, str):
+        try:
+            # 验证用户存在
+            if not self.user_id_exist(user_id):
+                return error.error_non_exist_user_id(user_id)
+
+            # 验证店铺不存在
+            if self.store_id_exist(store_id):
+                return error.error_exist_store_id(store_id)
+
+            # 创建店铺（关联用户-店铺）
+            self.user_store_col.insert_one({
+                'store_id': store_id,
+                'user_id': user_id
+            })
+
+            return 200, "ok"
+
+        except Exception as e:
+            return 530, f"系统错误：{str(e)}"
+
+    def ship_order(self, seller_id: str, store_id: str, order_id: str, token: str) -> (int, str):
+        try:
+            # 1. 验证 Token 有效性
+            code, _ = self.user.check_token(seller_id, token)
+            if code != 200:
+                return error.error_authorization_fail()
+
+            # 2. 一次条件更新完成 已付款 -> 已发货（状态、店铺、卖家归属均在条件中）
+            owner = {'store_id': store_id, 'seller_id': seller_id}
+            applied, pre = self.state.apply(order_id, 'ship', **owner)
+            if applied:
+                return 200, "ok"
+
+            # 旧订单未冗余 seller_id：按店铺归属校验后再迁移
+            if pre is not None and pre.get('seller_id') is None \
+                    and pre['store_id'] == store_id and self._is_store_owner(seller_id, store_id):
+                owner = {'store_id': store_id}
+                applied, pre = self.state.apply(order_id, 'ship', **owner)
+                if applied:
+                    return 200, "ok"
+
+            # 3. 失败路径：店铺不存在优先报告，其余错误由 pre-image 推导
+            if not self.store_id_exist(store_id):
+                return error.error_non_exist_store_id(store_id)
+            return self.state.derive_error(pre, order_id, 'ship', **owner)
+
+        except Exception as e:
+            return 530, f"系统错误：{str(e)}"
+
+    def _is_store_owner(self, user_id: str, store_id: str) -> bool:
+        """验证用户是否为店铺所有者"""
+        return self.user_store_col.find_one({
+            'user_id': user_id,
+            'store_id': store_id
         }) is not None
\ No newline at end of file
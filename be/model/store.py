@@ -1,158 +1,239 @@
-import logging
-import threading
-from pymongo import MongoClient
-from pymongo.database import Database
-from pymongo.errors import OperationFailure, DuplicateKeyError
-
-class Store:
-    db: Database
-
-    def __init__(self, mongo_uri: str = "mongodb://localhost:27017/"):
-        try:
-            self.client = MongoClient(
-                mongo_uri,
-                serverSelectionTimeoutMS=5000
-            )
-            self.client.admin.command('ping')  # 验证连接
-            self.db = self.client['bookstore']
-            self.clean_critical_invalid_data()  # 仅清理关键无效数据（不删有效记录）
-            self.init_collections()
-            logging.info("MongoDB 初始化成功")
-        except Exception as e:
-            logging.error(f"MongoDB 初始化失败: {str(e)}")
-            raise
-
-    def clean_critical_invalid_data(self):
-        """仅清理会导致索引创建失败的关键无效数据，保留所有有效记录"""
-        try:
-            # 1. 只删除 store_id 或 book_id 为 null/空字符串的记录（这些记录一定会导致索引失败）
-            null_count = self.db.books.delete_many({
-                "$or": [
-                    {"store_id": {"$in": [None, ""]}},  # 严格匹配空值
-                    {"book_id": {"$in": [None, ""]}}
-                ]
-            }).deleted_count
-            if null_count > 0:
-                logging.warning(f"已删除 {null_count} 条 store_id/book_id 为空的无效记录（这些记录会导致索引失败）")
-            else:
-                logging.info("未发现 store_id/book_id 为空的无效记录")
-
-            # 2. 重复记录处理：只记录重复项，不自动删除（避免误删有效数据）
-            duplicates = list(self.db.books.aggregate([
-                {
-                    "$group": {
-                        "_id": {"store_id": "$store_id", "book_id": "$book_id"},
-                        "count": {"$sum": 1},
-                        "ids": {"$push": "$_id"}
-                    }
-                },
-                {"$match": {"count": {"$gt": 1}}}
-            ]))
-
-            if duplicates:
-                logging.warning(f"发现 {len(duplicates)} 组 (store_id, book_id) 重复记录，需手动处理：")
-                for i, dup in enumerate(duplicates, 1):
-                    store_id = dup["_id"]["store_id"]
-                    book_id = dup["_id"]["book_id"]
-                    logging.warning(f"  第{i}组：store_id={store_id}, book_id={book_id}，共{dup['count']}条重复")
-            else:
-                logging.info("未发现 (store_id, book_id) 重复记录")
-
-        except Exception as e:
-            logging.error(f"清理关键无效数据时出错: {str(e)}")
-            raise
-
-    def init_collections(self):
-        # 1. 用户相关索引
-        self.db.user.create_index('user_id', unique=True, background=True)
-        self.db.user_store.create_index(
-            [('user_id', 1), ('store_id', 1)],
-            unique=True,
-            background=True
-        )
-
-        # 2. 图书相关索引（安全模式：不自动删除旧索引，避免影响数据）
-        # 尝试创建唯一索引（若仍有重复会报错，但保留数据）
-        try:
-            self.db.books.create_index(
-                [('store_id', 1), ('book_id', 1)],
-                unique=True,
-                background=True
-            )
-            logging.info("books 集合 (store_id, book_id) 唯一索引创建成功")
-        except DuplicateKeyError as e:
-            logging.error(
-                "\n===== 索引创建失败：存在重复的 (store_id, book_id) 记录 ====="
-                "\n请手动处理上述警告中列出的重复记录，处理方式："
-                "\n1. 保留一条有效记录，删除其余重复项"
-                "\n2. 确保保留的记录中 store_id 和 book_id 不为空"
-                "\n错误详情：%s", e
-            )
-            raise  # 终止初始化，需手动处理重复数据
-
-        # 全文搜索索引（仅创建，不删除旧索引）
-        try:
-            self.db.books.create_index(
-                [
-                    ("title", "text"),
-                    ("tags", "text"),
-                    ("catalog", "text"),
-                    ("content", "text")
-                ],
-                name="book_search_index",
-                background=True,
-                weights={
-                    "title": 10,
-                    "tags": 5,
-                    "catalog": 3,
-                    "content": 1
-                }
-            )
-            logging.info("books 集合全文索引创建成功")
-        except OperationFailure as e:
-            if e.code == 85:
-                logging.info("books 集合全文索引已存在，无需重复创建")
-            else:
-                logging.error(f"全文索引创建失败: {str(e)}")
-                raise
-
-        # 3. 订单相关索引
-        self.db.new_order.create_index('order_id', unique=True, background=True)
-        self.db.new_order_detail.create_index(
-            [('order_id', 1), ('book_id', 1)],
-            unique=True,
-            background=True
-        )
-
-    def get_db(self) -> Database:
-        return self.db
-
-    def close(self):
-        if hasattr(self, 'client'):
-            self.client.close()
-            logging.info("MongoDB 连接关闭")
-
-# 全局实例管理
-database_instance: Store = None
-init_completed_event = threading.Event()
-
-def init_database(mongo_uri: str = "mongodb://localhost:27017/"):
-    global database_instance
-    if database_instance is None:
-        database_instance = Store(mongo_uri)
-        init_completed_event.set()
-    return database_instance
-
-def get_db() -> Database:
-    init_completed_event.wait()
-    if database_instance is None:
-        raise Exception("数据库未初始化")
-    return database_instance.get_db()
-
-def close_database():
-    global database_instance
-    if database_instance:
-        database_instance.close()
-        database_instance = None
-        init_completed_event.clear()
-
+import logging
+import threading
+import time
+from pymongo import MongoClient, monitoring
+from pymongo.database import Database
+from pymongo.errors import DuplicateKeyError
+from be.model.indexes import apply_indexes, DEFERRED_INDEXES
+
+DEFAULT_MONGO_URI = "mongodb://localhost:27017/"
+DB_NAME = "bookstore"
+
+# 连接池配置（所有模型类共用一个 MongoClient）
+POOL_MAX_SIZE = 100       # 连接池最大连接数
+POOL_MIN_SIZE = 10        # 连接池常驻最小连接数
+POOL_WARM_UP_TIMEOUT = 5  # 启动预热等待最小连接数建立的超时时间（秒）
+
+# 启动时是否同步执行 books 完整性检查（默认由后台任务执行，不阻塞启动）
+INTEGRITY_SCAN_ON_STARTUP = False
+
+
+class PoolStatsListener(monitoring.ConnectionPoolListener):
+    """连接池监听器：统计连接数量及连接借出（checkout）等待时间"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._local = threading.local()  # 同一线程内 check_out_started -> checked_out 成对出现
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.connections_open = 0
+            self.checked_out = 0
+            self.checkout_count = 0
+            self.checkout_failed = 0
+            self.checkout_wait_total = 0.0
+            self.checkout_wait_max = 0.0
+            self.pool_clear_count = 0
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            avg = self.checkout_wait_total / self.checkout_count if self.checkout_count else 0.0
+            return {
+                "max_pool_size": pool_options["max_pool_size"],
+                "min_pool_size": pool_options["min_pool_size"],
+                "connections_open": self.connections_open,
+                "connections_in_use": self.checked_out,
+                "checkout_count": self.checkout_count,
+                "checkout_failed": self.checkout_failed,
+                "checkout_wait_avg_ms": round(avg * 1000, 3),
+                "checkout_wait_max_ms": round(self.checkout_wait_max * 1000, 3),
+                "pool_cleared": self.pool_clear_count,
+            }
+
+    def _wait_elapsed(self) -> float:
+        start = getattr(self._local, "checkout_start", None)
+        self._local.checkout_start = None
+        return time.perf_counter() - start if start is not None else 0.0
+
+    def connection_check_out_started(self, event):
+        self._local.checkout_start = time.perf_counter()
+
+    def connection_checked_out(self, event):
+        waited = self._wait_elapsed()
+        with self._lock:
+            self.checked_out += 1
+            self.checkout_count += 1
+            self.checkout_wait_total += waited
+            self.checkout_wait_max = max(self.checkout_wait_max, waited)
+
+    def connection_check_out_failed(self, event):
+        self._wait_elapsed()
+        with self._lock:
+            self.checkout_failed += 1
+
+    def connection_checked_in(self, event):
+        with self._lock:
+            self.checked_out -= 1
+
+    def connection_created(self, event):
+        with self._lock:
+            self.connections_open += 1
+
+    def connection_closed(self, event):
+        with self._lock:
+            self.connections_open -= 1
+
+    def pool_cleared(self, event):
+        with self._lock:
+            self.pool_clear_count += 1
+
+    def connection_ready(self, event):
+        pass
+
+    def pool_created(self, event):
+        pass
+
+    def pool_ready(self, event):
+        pass
+
+    def pool_closed(self, event):
+        pass
+
+
+# 全局连接注册表：进程内唯一的 MongoClient
+pool_stats = PoolStatsListener()
+pool_options = {"max_pool_size": POOL_MAX_SIZE, "min_pool_size": POOL_MIN_SIZE}
+_client: MongoClient = None
+_client_lock = threading.Lock()
+
+
+def get_client(
+        mongo_uri: str = DEFAULT_MONGO_URI,
+        max_pool_size: int = POOL_MAX_SIZE,
+        min_pool_size: int = POOL_MIN_SIZE
+) -> MongoClient:
+    """获取进程共享的 MongoClient（首次调用时创建，之后所有模型类复用同一连接池）"""
+    global _client
+    with _client_lock:
+        if _client is None:
+            pool_options["max_pool_size"] = max_pool_size
+            pool_options["min_pool_size"] = min_pool_size
+            _client = MongoClient(
+                mongo_uri,
+                maxPoolSize=max_pool_size,
+                minPoolSize=min_pool_size,
+                serverSelectionTimeoutMS=5000,
+                event_listeners=[pool_stats]
+            )
+        return _client
+
+
+def warm_up_client(client: MongoClient, timeout: float = POOL_WARM_UP_TIMEOUT):
+    """预热连接池：等待后台建立 minPoolSize 个连接，避免首批请求承担建连开销"""
+    client.admin.command('ping')
+    deadline = time.time() + timeout
+    while pool_stats.connections_open < pool_options["min_pool_size"] and time.time() < deadline:
+        time.sleep(0.05)
+    logging.info(f"MongoDB 连接池预热完成，当前连接数 {pool_stats.connections_open}")
+
+
+def close_client():
+    global _client
+    with _client_lock:
+        if _client is not None:
+            _client.close()
+            _client = None
+
+
+def get_pool_stats() -> dict:
+    return pool_stats.snapshot()
+
+
+class Store:
+    db: Database
+
+    def __init__(
+            self,
+            mongo_uri: str = DEFAULT_MONGO_URI,
+            max_pool_size: int = POOL_MAX_SIZE,
+            min_pool_size: int = POOL_MIN_SIZE
+    ):
+        try:
+            self.client = get_client(mongo_uri, max_pool_size, min_pool_size)
+            warm_up_client(self.client)  # 验证连接并预热连接池
+            self.db = self.client[DB_NAME]
+            if INTEGRITY_SCAN_ON_STARTUP:
+                self.clean_critical_invalid_data()  # 仅清理关键无效数据（不删有效记录）
+                self.init_collections()
+            else:
+                # 空键清理、重复扫描及 books 唯一索引交给后台任务，启动时不扫描集合
+                from be.model.integrity import INTEGRITY_JOB_ENABLED
+                self.init_collections(skip=DEFERRED_INDEXES if INTEGRITY_JOB_ENABLED else ())
+            logging.info("MongoDB 初始化成功")
+        except Exception as e:
+            logging.error(f"MongoDB 初始化失败: {str(e)}")
+            raise
+
+    def clean_critical_invalid_data(self):
+        """
+        同步执行 books 完整性检查（清理空键记录、记录重复项，无重复时创建唯一索引）。
+        全量扫描在大数据量下耗时很长，默认改由服务启动后的后台任务执行（见 be.model.integrity）。
+        """
+        from be.model.integrity import IntegrityJob
+        IntegrityJob(self.db, pause=0).run_once()
+
+    def init_collections(self, skip: set = ()):
+        """按 be.model.indexes 中的索引清单幂等地创建索引（已存在的索引不会重建，skip 中的索引推迟创建）"""
+        try:
+            apply_indexes(self.db, skip=skip)
+        except DuplicateKeyError as e:
+            logging.error(
+                "\n===== 索引创建失败：存在重复的 (store_id, book_id) 记录 ====="
+                "\n执行 python -m be.model.integrity 列出重复记录并手动处理，处理方式："
+                "\n1. 保留一条有效记录，删除其余重复项"
+                "\n2. 确保保留的记录中 store_id 和 book_id 不为空"
+                "\n错误详情：%s", e
+            )
+            raise  # 终止初始化，需手动处理重复数据
+
+    def get_db(self) -> Database:
+        return self.db
+
+    def close(self):
+        if hasattr(self, 'client'):
+            close_client()
+            logging.info("MongoDB 连接关闭")
+
+# 全局实例管理
+database_instance: Store = None
+init_completed_event = threading.Event()
+
+def init_database(
+        mongo_uri: str = DEFAULT_MONGO_URI,
+        max_pool_size: int = POOL_MAX_SIZE,
+        min_pool_size: int = POOL_MIN_SIZE
+):
+    global database_instance
+    if database_instance is None:
+        database_instance = Store(mongo_uri, max_pool_size, min_pool_size)
+        init_completed_event.set()
+    return database_instance
+
+def is_ready() -> bool:
+    """就绪信号：连接池预热完成、索引就绪后即可接收流量（完整性检查在后台进行）"""
+    return database_instance is not None and init_completed_event.is_set()
+
+def get_db() -> Database:
+    init_completed_event.wait()
+    if database_instance is None:
+        raise Exception("数据库未初始化")
+    return database_instance.get_db()
+
+def close_database():
+    global database_instance
+    if database_instance:
+        database_instance.close()
+        database_instance = None
+        init_completed_event.clear()
+
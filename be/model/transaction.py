@@ -0,0 +1,135 @@
+import logging
+import random
+import threading
+import time
+from pymongo.errors import PyMongoError
+from pymongo.read_concern import ReadConcern
+from pymongo.write_concern import WriteConcern
+from be.model.store import get_client
+
+# 下单是否走多文档事务（需要副本集或分片集群，单机 mongod 不支持事务）
+ORDER_TRANSACTION_ENABLED = False
+
+# 事务重试配置
+TXN_MAX_RETRIES = 5        # 瞬时错误最大重试次数
+TXN_BACKOFF_BASE = 0.01    # 退避基数（秒），按 2^n 增长
+TXN_BACKOFF_MAX = 0.5      # 单次退避上限（秒）
+
+WRITE_CONFLICT_CODE = 112
+
+
+class TransactionAbort(Exception):
+    """回调中主动中止事务（业务校验失败），result 作为 run_in_transaction 的返回值"""
+
+    def __init__(self, result):
+        super().__init__(result)
+        self.result = result
+
+
+class TransactionStats:
+    """事务计数器：提交、中止及各类重试次数"""
+
+    FIELDS = (
+        "started", "committed", "aborted",
+        "retry_transient", "retry_write_conflict", "retry_commit_unknown",
+        "retry_exhausted",
+    )
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counts = dict.fromkeys(self.FIELDS, 0)
+
+    def incr(self, name: str):
+        with self._lock:
+            self._counts[name] += 1
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return dict(self._counts)
+
+
+txn_stats = TransactionStats()
+_supported: bool = None
+
+
+def transactions_supported() -> bool:
+    """检测当前部署是否支持事务（副本集返回 setName，mongos 返回 isdbgrid）"""
+    global _supported
+    if _supported is None:
+        hello = get_client().admin.command("hello")
+        _supported = "setName" in hello or hello.get("msg") == "isdbgrid"
+        if not _supported:
+            logging.warning("当前 MongoDB 为单机部署，不支持多文档事务")
+    return _supported
+
+
+def order_transaction_enabled() -> bool:
+    return ORDER_TRANSACTION_ENABLED and transactions_supported()
+
+
+def _backoff(attempt: int):
+    delay = min(TXN_BACKOFF_BASE * (2 ** attempt), TXN_BACKOFF_MAX)
+    time.sleep(delay * random.uniform(0.5, 1.0))  # 加抖动，避免冲突方同时重试
+
+
+def _is_transient(e: PyMongoError) -> bool:
+    return e.has_error_label("TransientTransactionError") or \
+        getattr(e, "code", None) == WRITE_CONFLICT_CODE
+
+
+def _commit_with_retry(session, max_retries: int):
+    attempt = 0
+    while True:
+        try:
+            session.commit_transaction()
+            return
+        except PyMongoError as e:
+            if not e.has_error_label("UnknownTransactionCommitResult") or attempt >= max_retries:
+                raise
+            attempt += 1
+            txn_stats.incr("retry_commit_unknown")
+            _backoff(attempt)
+
+
+def run_in_transaction(callback, max_retries: int = TXN_MAX_RETRIES):
+    """
+    在一个会话事务中执行 callback(session)，返回其结果。
+    遇到 TransientTransactionError / WriteConflict 时整体重试（有上限，指数退避）；
+    callback 抛出 TransactionAbort 时回滚事务并返回其携带的结果。
+    """
+    with get_client().start_session() as session:
+        attempt = 0
+        while True:
+            txn_stats.incr("started")
+            session.start_transaction(
+                read_concern=ReadConcern("snapshot"),
+                write_concern=WriteConcern("majority")
+            )
+            try:
+                result = callback(session)
+                _commit_with_retry(session, max_retries)
+                txn_stats.incr("committed")
+                return result
+            except TransactionAbort as abort:
+                session.abort_transaction()
+                txn_stats.incr("aborted")
+                return abort.result
+            except PyMongoError as e:
+                if session.in_transaction:
+                    session.abort_transaction()
+                txn_stats.incr("aborted")
+                if not _is_transient(e):
+                    raise
+                if attempt >= max_retries:
+                    txn_stats.incr("retry_exhausted")
+                    raise
+                attempt += 1
+                txn_stats.incr(
+                    "retry_write_conflict" if getattr(e, "code", None) == WRITE_CONFLICT_CODE
+                    else "retry_transient"
+                )
+                _backoff(attempt)
+
+
+def get_transaction_stats() -> dict:
+    return txn_stats.snapshot()
@@ -1,214 +1,383 @@
-import jwt
-import time
-import logging
-from pymongo import MongoClient
-from be.model import error
-from be.model.store import get_db  # 复用 MongoDB 数据库连接
-
-
-# JWT 编码（保持不变）
-def jwt_encode(user_id: str, terminal: str) -> str:
-    encoded = jwt.encode(
-        {"user_id": user_id, "terminal": terminal, "timestamp": time.time()},
-        key=user_id,
-        algorithm="HS256",
-    )
-    return encoded
-
-
-# JWT 解码（保持不变）
-def jwt_decode(encoded_token, user_id: str) -> dict:
-    decoded = jwt.decode(encoded_token, key=user_id, algorithms=["HS256"])
-    return decoded
-
-
-class User:
-    token_lifetime: int = 3600  # 令牌有效期（3600秒）
-
-    def __init__(self):
-        # 通过全局方法获取 MongoDB 数据库实例
-        self.db = get_db()
-        # 用户集合（对应原 SQL user 表）
-        self.user_col = self.db['user']
-
-    def __check_token(self, user_id: str, db_token: str, token: str) -> bool:
-        """验证令牌有效性（内部方法）"""
-        try:
-            # 令牌不匹配直接失败
-            if db_token != token:
-                return False
-            # 解码令牌
-            jwt_text = jwt_decode(encoded_token=token, user_id=user_id)
-            # 验证令牌有效期
-            ts = jwt_text.get("timestamp")
-            if ts is None:
-                return False
-            now = time.time()
-            # 令牌在有效期内（0 <= 现在-时间戳 <= 有效期）
-            return 0 <= now - ts <= self.token_lifetime
-        except jwt.exceptions.InvalidSignatureError as e:
-            logging.error(f"令牌签名错误: {str(e)}")
-            return False
-        except Exception as e:
-            logging.error(f"令牌验证失败: {str(e)}")
-            return False
-
-    def register(self, user_id: str, password: str) -> (int, str):
-        """用户注册"""
-        try:
-            # 检查用户是否已存在
-            if self.user_col.find_one({"user_id": user_id}):
-                return error.error_exist_user_id(user_id)
-
-            # 生成初始终端和令牌
-            terminal = f"terminal_{time.time()}"
-            token = jwt_encode(user_id, terminal)
-
-            # 插入新用户
-            self.user_col.insert_one({
-                "user_id": user_id,
-                "password": password,
-                "balance": 0,  # 初始余额为0
-                "token": token,
-                "terminal": terminal
-            })
-            return 200, "ok"
-        except Exception as e:
-            logging.error(f"注册失败: {str(e)}")
-            return 530, f"系统错误: {str(e)}"
-
-    def check_token(self, user_id: str, token: str) -> (int, str):
-        """验证令牌"""
-        try:
-            # 查询用户
-            user = self.user_col.find_one({"user_id": user_id})
-            if not user:
-                return error.error_authorization_fail()
-
-            # 验证令牌
-            db_token = user["token"]
-            if not self.__check_token(user_id, db_token, token):
-                return error.error_authorization_fail()
-
-            return 200, "ok"
-        except Exception as e:
-            logging.error(f"令牌检查失败: {str(e)}")
-            return 530, f"系统错误: {str(e)}"
-
-    def check_password(self, user_id: str, password: str) -> (int, str):
-        """验证密码"""
-        try:
-            # 查询用户
-            user = self.user_col.find_one({"user_id": user_id})
-            if not user:
-                return error.error_authorization_fail()
-
-            # 验证密码
-            if user["password"] != password:
-                return error.error_authorization_fail()
-
-            return 200, "ok"
-        except Exception as e:
-            logging.error(f"密码检查失败: {str(e)}")
-            return 530, f"系统错误: {str(e)}"
-
-    def login(self, user_id: str, password: str, terminal: str) -> (int, str, str):
-        """用户登录"""
-        token = ""
-        try:
-            # 验证密码
-            code, message = self.check_password(user_id, password)
-            if code != 200:
-                return code, message, ""
-
-            # 生成新令牌
-            token = jwt_encode(user_id, terminal)
-
-            # 更新用户令牌和终端
-            result = self.user_col.update_one(
-                {"user_id": user_id},
-                {"$set": {"token": token, "terminal": terminal}}
-            )
-            if result.modified_count == 0:
-                return error.error_authorization_fail() + ("",)
-
-            return 200, "ok", token
-        except Exception as e:
-            logging.error(f"登录失败: {str(e)}")
-            return 530, f"系统错误: {str(e)}", ""
-
-    def logout(self, user_id: str, token: str) -> (int, str):
-        """用户登出"""
-        try:
-            # 验证令牌
-            code, message = self.check_token(user_id, token)
-            if code != 200:
-                return code, message
-
-            # 生成无效令牌（登出后令牌失效）
-            terminal = f"terminal_{time.time()}"
-            dummy_token = jwt_encode(user_id, terminal)
-
-            # 更新令牌为无效值
-            result = self.user_col.update_one(
-                {"user_id": user_id},
-                {"$set": {"token": dummy_token, "terminal": terminal}}
-            )
-            if result.modified_count == 0:
-                return error.error_authorization_fail()
-
-            return 200, "ok"
-        except Exception as e:
-            logging.error(f"登出失败: {str(e)}")
-            return 530, f"系统错误: {str(e)}"
-
-    def unregister(self, user_id: str, password: str) -> (int, str):
-        """用户注销"""
-        try:
-            # 验证密码
-            code, message = self.check_password(user_id, password)
-            if code != 200:
-                return code, message
-
-            # 删除用户
-            result = self.user_col.delete_one({"user_id": user_id})
-            if result.deleted_count == 0:
-                return error.error_authorization_fail()
-
-            return 200, "ok"
-        except Exception as e:
-            logging.error(f"注销失败: {str(e)}")
-            return 530, f"系统错误: {str(e)}"
-
-    def change_password(
-            self, user_id: str, old_password: str, new_password: str
-    ) -> (int, str):
-        """修改密码"""
-        try:
-            # 验证旧密码
-            code, message = self.check_password(user_id, old_password)
-            if code != 200:
-                return code, message
-
-            # 生成新终端和令牌（密码修改后旧令牌失效）
-            terminal = f"terminal_{time.time()}"
-            token = jwt_encode(user_id, terminal)
-
-            # 更新密码和令牌
-            result = self.user_col.update_one(
-                {"user_id": user_id},
-                {
-                    "$set": {
-                        "password": new_password,
-                        "token": token,
-                        "terminal": terminal
-                    }
-                }
-            )
-            if result.modified_count == 0:
-                return error.error_authorization_fail()
-
-            return 200, "ok"
-        except Exception as e:
-            logging.error(f"密码修改失败: {str(e)}")
+import os
+import jwt
+import time
+import uuid
+import secrets
+import hmac
+import base64
+import hashlib
+import logging
+from pymongo import MongoClient
+from be.model import error
+from be.model.cache import TTLCache
+from be.model.revocation import revoke, revocation_filter
+from be.model.store import get_db  # 复用 MongoDB 数据库连接
+
+# 无状态令牌模式：令牌用服务端密钥签名并携带过期时间，验证时不访问数据库；
+# 登出、改密、注销写入吊销集合，由 be.model.revocation 的内存过滤器判定。
+# 该模式下重新登录不会使同一用户的旧令牌失效（各终端令牌独立，直到过期或被吊销）。
+STATELESS_TOKEN_ENABLED = False
+# 多进程部署必须通过环境变量配置同一密钥，否则各进程签发的令牌互不认可
+TOKEN_SECRET = os.environ.get("BOOKSTORE_TOKEN_SECRET") or secrets.token_hex(32)
+
+# 令牌验证缓存：缓存验证成功的 (user_id, 令牌摘要)，有效期为令牌剩余寿命。
+# 每个条目约 300 字节（user_id + 32 字节摘要 + 字典/有序表开销），默认上限约占 30 MB。
+# 缓存为进程内缓存，多进程部署时其他进程的登出/改密要等到条目过期才生效。
+TOKEN_CACHE_MAX_ENTRIES = 100000
+token_cache = TTLCache(TOKEN_CACHE_MAX_ENTRIES)
+
+
+def token_digest(token: str) -> bytes:
+    return hashlib.sha256(token.encode()).digest()
+
+
+# 密码存储：PBKDF2-HMAC-SHA256 加盐哈希，格式 pbkdf2_sha256$迭代次数$盐$哈希（base64）。
+# 旧的明文密码在首次验证成功时改写为哈希（惰性迁移）。
+PASSWORD_SCHEME = "pbkdf2_sha256"
+PASSWORD_KDF_ITERATIONS = 100000   # 单次哈希约数十毫秒，见 fe/bench/bench_password.py
+PASSWORD_SALT_BYTES = 16
+
+# 密码验证缓存：缓存验证成功的 (user_id, 密码摘要) -> 存储的哈希，命中时免去 KDF 和读库。
+# 摘要用进程内随机密钥做 HMAC，内存中不保留可离线爆破的无盐摘要。
+# 使用方以缓存的哈希作为写入条件，密码已被修改时条件不匹配，缓存条目随即失效。
+PASSWORD_CACHE_TTL = 300            # 条目有效期（秒）
+PASSWORD_CACHE_MAX_ENTRIES = 10000  # 每个条目约 400 字节（含哈希字符串）
+password_cache = TTLCache(PASSWORD_CACHE_MAX_ENTRIES, default_ttl=PASSWORD_CACHE_TTL)
+_PASSWORD_CACHE_KEY = secrets.token_bytes(32)
+
+
+def hash_password(password: str, iterations: int = PASSWORD_KDF_ITERATIONS) -> str:
+    salt = secrets.token_bytes(PASSWORD_SALT_BYTES)
+    dk = hashlib.pbkdf2_hmac("sha256", password.encode(), salt, iterations)
+    return "$".join([
+        PASSWORD_SCHEME, str(iterations),
+        base64.b64encode(salt).decode(), base64.b64encode(dk).decode()
+    ])
+
+
+def is_password_hashed(stored: str) -> bool:
+    return stored.startswith(PASSWORD_SCHEME + "$")
+
+
+def check_password_hash(stored: str, password: str) -> bool:
+    """校验密码；stored 为尚未迁移的明文时直接做常量时间比较"""
+    if not is_password_hashed(stored):
+        return hmac.compare_digest(stored.encode(), password.encode())
+    _, iterations, salt, expected = stored.split("$")
+    dk = hashlib.pbkdf2_hmac("sha256", password.encode(), base64.b64decode(salt), int(iterations))
+    return hmac.compare_digest(dk, base64.b64decode(expected))
+
+
+def password_cache_key(user_id: str, password: str) -> tuple:
+    return user_id, hmac.new(_PASSWORD_CACHE_KEY, password.encode(), hashlib.sha256).digest()
+
+
+def get_password_cache_stats() -> dict:
+    return password_cache.snapshot()
+
+
+def get_token_cache_stats() -> dict:
+    return token_cache.snapshot()
+
+
+# JWT 编码（保持不变）
+def jwt_encode(user_id: str, terminal: str) -> str:
+    encoded = jwt.encode(
+        {"user_id": user_id, "terminal": terminal, "timestamp": time.time()},
+        key=user_id,
+        algorithm="HS256",
+    )
+    return encoded
+
+
+# JWT 解码（保持不变）
+def jwt_decode(encoded_token, user_id: str) -> dict:
+    decoded = jwt.decode(encoded_token, key=user_id, algorithms=["HS256"])
+    return decoded
+
+
+# 无状态令牌：服务端密钥签名，exp 由 jwt.decode 校验，jti 用于单个令牌的吊销
+def stateless_encode(user_id: str, terminal: str, lifetime: int) -> str:
+    now = time.time()
+    return jwt.encode(
+        {
+            "user_id": user_id, "terminal": terminal, "timestamp": now,
+            "exp": int(now + lifetime), "jti": uuid.uuid4().hex
+        },
+        key=TOKEN_SECRET,
+        algorithm="HS256",
+    )
+
+
+def stateless_decode(encoded_token) -> dict:
+    return jwt.decode(encoded_token, key=TOKEN_SECRET, algorithms=["HS256"])
+
+
+class User:
+    token_lifetime: int = 3600  # 令牌有效期（3600秒）
+
+    def __init__(self):
+        # 通过全局方法获取 MongoDB 数据库实例
+        self.db = get_db()
+        # 用户集合（对应原 SQL user 表）
+        self.user_col = self.db['user']
+
+    def __check_token(self, user_id: str, db_token: str, token: str) -> float:
+        """验证令牌有效性（内部方法），有效时返回令牌剩余寿命（秒），无效时返回 0"""
+        try:
+            # 令牌不匹配直接失败
+            if db_token != token:
+                return 0
+            # 解码令牌
+            jwt_text = jwt_decode(encoded_token=token, user_id=user_id)
+            # 验证令牌有效期
+            ts = jwt_text.get("timestamp")
+            if ts is None:
+                return 0
+            now = time.time()
+            # 令牌在有效期内（0 <= 现在-时间戳 <= 有效期）
+            if not 0 <= now - ts <= self.token_lifetime:
+                return 0
+            return ts + self.token_lifetime - now
+        except jwt.exceptions.InvalidSignatureError as e:
+            logging.error(f"令牌签名错误: {str(e)}")
+            return 0
+        except Exception as e:
+            logging.error(f"令牌验证失败: {str(e)}")
+            return 0
+
+    def __check_stateless_token(self, user_id: str, token: str) -> (int, str):
+        """无状态令牌验证：校验签名、过期时间和吊销过滤器，不访问数据库"""
+        try:
+            claims = stateless_decode(token)
+        except jwt.exceptions.InvalidTokenError as e:
+            logging.error(f"令牌验证失败: {str(e)}")
+            return error.error_authorization_fail()
+        if claims.get("user_id") != user_id:
+            return error.error_authorization_fail()
+        if revocation_filter.is_revoked(claims["jti"], user_id, claims["timestamp"]):
+            return error.error_authorization_fail()
+        return 200, "ok"
+
+    def issue_token(self, user_id: str, terminal: str) -> str:
+        if STATELESS_TOKEN_ENABLED:
+            return stateless_encode(user_id, terminal, self.token_lifetime)
+        return jwt_encode(user_id, terminal)
+
+    def revoke_user_tokens(self, user_id: str):
+        """无状态令牌模式下吊销该用户此前签发的全部令牌（改密、注销时调用）"""
+        if STATELESS_TOKEN_ENABLED:
+            revoke(self.db, time.time() + self.token_lifetime, user_id=user_id)
+
+    def verify_password(self, user_id: str, password: str, use_cache: bool = True) -> (int, str, str, bool):
+        """
+        验证密码，返回 (code, message, 存储的密码哈希, 是否来自缓存)。
+        调用方以返回的哈希作为写入条件；来自缓存的哈希可能已过时，写入不匹配时应以 use_cache=False 重试。
+        """
+        key = password_cache_key(user_id, password)
+        if use_cache:
+            stored = password_cache.get(key)
+            if stored is not None:
+                return 200, "ok", stored, True
+        generation = password_cache.generation
+
+        user = self.user_col.find_one({"user_id": user_id}, {"_id": 0, "password": 1})
+        if not user:
+            return error.error_non_exist_user_id(user_id) + (None, False)
+        stored = user["password"]
+        if not check_password_hash(stored, password):
+            return error.error_authorization_fail() + (None, False)
+
+        if not is_password_hashed(stored):
+            # 惰性迁移：明文密码改写为哈希（条件为仍是该明文，并发迁移只有一个生效）
+            hashed = hash_password(password)
+            result = self.user_col.update_one(
+                {"user_id": user_id, "password": stored},
+                {"$set": {"password": hashed}}
+            )
+            if result.matched_count == 0:
+                return self.verify_password(user_id, password, use_cache=False)
+            stored = hashed
+
+        password_cache.put(key, stored, group=user_id, generation=generation)
+        return 200, "ok", stored, False
+
+    def guarded_write(self, user_id: str, password: str, write) -> (int, str):
+        """
+        验证密码后执行 write(stored_hash)，write 以密码哈希作为更新条件，返回是否匹配。
+        缓存命中时只需一次写入；不匹配说明缓存过时，清除后读库重试一次。
+        """
+        for use_cache in (True, False):
+            code, message, stored, cached = self.verify_password(user_id, password, use_cache)
+            if code != 200:
+                return error.error_authorization_fail()
+            if write(stored):
+                return 200, "ok"
+            password_cache.invalidate_group(user_id)
+            if not cached:
+                break
+        return error.error_authorization_fail()
+
+    def register(self, user_id: str, password: str) -> (int, str):
+        """用户注册"""
+        try:
+            # 检查用户是否已存在
+            if self.user_col.find_one({"user_id": user_id}):
+                return error.error_exist_user_id(user_id)
+
+            # 生成初始终端和令牌
+            terminal = f"terminal_{time.time()}"
+            token = jwt_encode(user_id, terminal)
+
+            # 插入新用户
+            self.user_col.insert_one({
+                "user_id": user_id,
+                "password": hash_password(password),
+                "balance": 0,  # 初始余额为0
+                "token": token,
+                "terminal": terminal
+            })
+            return 200, "ok"
+        except Exception as e:
+            logging.error(f"注册失败: {str(e)}")
+            return 530, f"系统错误: {str(e)}"
+
+    def check_token(self, user_id: str, token: str) -> (int, str):
+        """验证令牌（验证成功的结果缓存到令牌过期为止）"""
+        if STATELESS_TOKEN_ENABLED:
+            return self.__check_stateless_token(user_id, token)
+        try:
+            key = (user_id, token_digest(token))
+            if token_cache.get(key):
+                return 200, "ok"
+            generation = token_cache.generation
+
+            # 查询用户
+            user = self.user_col.find_one({"user_id": user_id}, {"_id": 0, "token": 1})
+            if not user:
+                return error.error_authorization_fail()
+
+            # 验证令牌
+            db_token = user["token"]
+            remaining = self.__check_token(user_id, db_token, token)
+            if not remaining:
+                return error.error_authorization_fail()
+
+            token_cache.put(key, True, ttl=remaining, group=user_id, generation=generation)
+            return 200, "ok"
+        except Exception as e:
+            logging.error(f"令牌检查失败: {str(e)}")
+            return 530, f"系统错误: {str(e)}"
+
+    def check_password(self, user_id: str, password: str) -> (int, str):
+        """验证密码"""
+        try:
+            code, message, _, _ = self.verify_password(user_id, password)
+            if code != 200:
+                return error.error_authorization_fail()
+            return 200, "ok"
+        except Exception as e:
+            logging.error(f"密码检查失败: {str(e)}")
+            return 530, f"系统错误: {str(e)}"
+
+    def login(self, user_id: str, password: str, terminal: str) -> (int, str, str):
+        """用户登录"""
+        token = ""
+        try:
+            # 生成新令牌（旧令牌随之失效）
+            token = self.issue_token(user_id, terminal)
+
+            # 密码哈希作为更新条件，验证后写入令牌；并发改密时条件不匹配
+            code, message = self.guarded_write(user_id, password, lambda stored: self.user_col.update_one(
+                {"user_id": user_id, "password": stored},
+                {"$set": {"token": token, "terminal": terminal}}
+            ).matched_count > 0)
+            if code != 200:
+                return code, message, ""
+            token_cache.invalidate_group(user_id)
+
+            return 200, "ok", token
+        except Exception as e:
+            logging.error(f"登录失败: {str(e)}")
+            return 530, f"系统错误: {str(e)}", ""
+
+    def logout(self, user_id: str, token: str) -> (int, str):
+        """用户登出"""
+        try:
+            # 验证令牌
+            code, message = self.check_token(user_id, token)
+            if code != 200:
+                return code, message
+
+            if STATELESS_TOKEN_ENABLED:
+                claims = stateless_decode(token)
+                revoke(self.db, claims["exp"], jti=claims["jti"])
+                return 200, "ok"
+
+            # 生成无效令牌（登出后令牌失效）
+            terminal = f"terminal_{time.time()}"
+            dummy_token = jwt_encode(user_id, terminal)
+
+            # 更新令牌为无效值
+            result = self.user_col.update_one(
+                {"user_id": user_id},
+                {"$set": {"token": dummy_token, "terminal": terminal}}
+            )
+            token_cache.invalidate_group(user_id)
+            if result.modified_count == 0:
+                return error.error_authorization_fail()
+
+            return 200, "ok"
+        except Exception as e:
+            logging.error(f"登出失败: {str(e)}")
+            return 530, f"系统错误: {str(e)}"
+
+    def unregister(self, user_id: str, password: str) -> (int, str):
+        """用户注销"""
+        try:
+            # 密码哈希作为删除条件
+            code, message = self.guarded_write(user_id, password, lambda stored: self.user_col.delete_one(
+                {"user_id": user_id, "password": stored}
+            ).deleted_count > 0)
+            if code != 200:
+                return code, message
+            password_cache.invalidate_group(user_id)
+            token_cache.invalidate_group(user_id)
+            self.revoke_user_tokens(user_id)
+
+            return 200, "ok"
+        except Exception as e:
+            logging.error(f"注销失败: {str(e)}")
+            return 530, f"系统错误: {str(e)}"
+
+    def change_password(
+            self, user_id: str, old_password: str, new_password: str
+    ) -> (int, str):
+        """修改密码"""
+        try:
+            # 生成新终端和令牌（密码修改后旧令牌失效）
+            terminal = f"terminal_{time.time()}"
+            token = jwt_encode(user_id, terminal)
+
+            # 旧密码哈希作为更新条件，并发修改时只有一个成功
+            new_hash = hash_password(new_password)
+            code, message = self.guarded_write(user_id, old_password, lambda stored: self.user_col.update_one(
+                {"user_id": user_id, "password": stored},
+                {
+                    "$set": {
+                        "password": new_hash,
+                        "token": token,
+                        "terminal": terminal
+                    }
+                }
+            ).matched_count > 0)
+            if code != 200:
+                return code, message
+            password_cache.invalidate_group(user_id)
+            token_cache.invalidate_group(user_id)
+            self.revoke_user_tokens(user_id)
+
+            return 200, "ok"
+        except Exception as e:
+            logging.error(f"密码修改失败: {str(e)}")
             return 530, f"系统错误: {str(e)}"
\ No newline at end of file
@@ -1,88 +1,120 @@
-import logging
-import os
-import traceback
-from flask import Flask, request, jsonify, Blueprint
-from be.view import auth
-from be.view import seller
-from be.view import buyer
-from be.view import search
-from be.view import order  # 导入订单蓝图
-from be.model.store import init_database, init_completed_event, close_database
-
-# 关闭服务蓝图
-bp_shutdown = Blueprint("shutdown", __name__)
-
-def shutdown_server():
-    func = request.environ.get("werkzeug.server.shutdown")
-    if func is None:
-        raise RuntimeError("Not running with the Werkzeug Server")
-    func()
-
-@bp_shutdown.route("/shutdown")
-def be_shutdown():
-    close_database()
-    shutdown_server()
-    return "Server shutting down..."
-
-# 全局异常处理器
-def register_global_error_handler(app):
-    @app.errorhandler(404)
-    def handle_404(e):
-        return jsonify({"errno": 404, "msg": f"接口不存在：{request.path}"}), 404
-
-    @app.errorhandler(Exception)
-    def handle_all_exceptions(e):
-        error_msg = f"未捕获异常: {str(e)}\n{traceback.format_exc()}"
-        logging.error(error_msg)
-        return jsonify({
-            "errno": 500,
-            "msg": f"服务器内部错误：{str(e)}"
-        }), 500
-
-# 主启动函数
-def be_run():
-    # 初始化数据库
-    init_database("mongodb://localhost:27017/")
-
-    # 日志配置
-    this_path = os.path.dirname(__file__)
-    parent_path = os.path.dirname(this_path)
-    log_file = os.path.join(parent_path, "app.log")
-    logging.basicConfig(
-        filename=log_file,
-        level=logging.ERROR,
-        format="%(asctime)s [%(threadName)-12.12s] [%(levelname)-5.5s]  %(message)s"
-    )
-    handler = logging.StreamHandler()
-    formatter = logging.Formatter(
-        "%(asctime)s [%(threadName)-12.12s] [%(levelname)-5.5s]  %(message)s"
-    )
-    handler.setFormatter(formatter)
-    logging.getLogger().addHandler(handler)
-
-    # 创建Flask应用并注册所有蓝图
-    app = Flask(__name__)
-    app.register_blueprint(bp_shutdown)
-    app.register_blueprint(auth.bp_auth)
-    app.register_blueprint(seller.bp_seller)
-    app.register_blueprint(buyer.bp_buyer)
-    app.register_blueprint(search.bp_search)
-    app.register_blueprint(order.bp_order)  # 注册订单蓝图
-
-    # 注册异常处理器
-    register_global_error_handler(app)
-    app.config["JSON_SORT_KEYS"] = False
-
-    # 标记初始化完成
-    init_completed_event.set()
-
-    # 启动服务
-    app.run(
-        host="0.0.0.0",
-        port=5000,
-        debug=False,
-        threaded=True
-    )
-
-if __name__ == "__main__":
+import logging
+import os
+import traceback
+from flask import Flask, request, jsonify, Blueprint
+from be.view import auth
+from be.view import seller
+from be.view import buyer
+from be.view import search
+from be.view import order  # 导入订单蓝图
+from be.view import metrics
+from be.view import picture
+from be.model.store import init_database, init_completed_event, close_database, get_db
+from be.model.order import start_expiry_scheduler, stop_expiry_scheduler
+from be.model.integrity import start_integrity_job, stop_integrity_job
+from be.model import user as user_model
+from be.model.revocation import start_revocation_refresher, stop_revocation_refresher
+from be.model.search_engine import start_search_index_loader
+from be.model.search_sync import start_search_sync, stop_search_sync
+
+# 关闭服务蓝图
+bp_shutdown = Blueprint("shutdown", __name__)
+
+def shutdown_server():
+    func = request.environ.get("werkzeug.server.shutdown")
+    if func is None:
+        raise RuntimeError("Not running with the Werkzeug Server")
+    func()
+
+@bp_shutdown.route("/shutdown")
+def be_shutdown():
+    stop_expiry_scheduler()
+    stop_integrity_job()
+    stop_search_sync()
+    stop_revocation_refresher()
+    close_database()
+    shutdown_server()
+    return "Server shutting down..."
+
+# 全局异常处理器
+def register_global_error_handler(app):
+    @app.errorhandler(404)
+    def handle_404(e):
+        return jsonify({"errno": 404, "msg": f"接口不存在：{request.path}"}), 404
+
+    @app.errorhandler(Exception)
+    def handle_all_exceptions(e):
+        error_msg = f"未捕获异常: {str(e)}\n{traceback.format_exc()}"
+        logging.error(error_msg)
+        return jsonify({
+            "errno": 500,
+            "msg": f"服务器内部错误：{str(e)}"
+        }), 500
+
+# 主启动函数
+def be_run():
+    # 初始化数据库
+    init_database("mongodb://localhost:27017/")
+
+    # 启动超时订单清理线程
+    start_expiry_scheduler()
+
+    # 后台执行 books 完整性检查（可断点续跑，不阻塞启动）
+    start_integrity_job(get_db())
+
+    # 后台加载内存搜索索引（加载完成前搜索走 MongoDB $text）
+    start_search_index_loader(get_db())
+
+    # 把卖家上架的图书增量同步到搜索集合 books
+    start_search_sync(get_db())
+
+    # 无状态令牌模式：加载吊销列表并定期刷新
+    if user_model.STATELESS_TOKEN_ENABLED:
+        if "BOOKSTORE_TOKEN_SECRET" not in os.environ:
+            logging.warning("未设置 BOOKSTORE_TOKEN_SECRET，使用随机密钥，重启后已签发的令牌全部失效")
+        start_revocation_refresher(get_db())
+
+    # 日志配置
+    this_path = os.path.dirname(__file__)
+    parent_path = os.path.dirname(this_path)
+    log_file = os.path.join(parent_path, "app.log")
+    logging.basicConfig(
+        filename=log_file,
+        level=logging.ERROR,
+        format="%(asctime)s [%(threadName)-12.12s] [%(levelname)-5.5s]  %(message)s"
+    )
+    handler = logging.StreamHandler()
+    formatter = logging.Formatter(
+        "%(asctime)s [%(threadName)-12.12s] [%(levelname)-5.5s]  %(message)s"
+    )
+    handler.setFormatter(formatter)
+    logging.getLogger().addHandler(handler)
+
+    # 创建Flask应用并注册所有蓝图
+    app = Flask(__name__)
+    app.register_blueprint(bp_shutdown)
+    app.register_blueprint(auth.bp_auth)
+    app.register_blueprint(seller.bp_seller)
+    app.register_blueprint(buyer.bp_buyer)
+    app.register_blueprint(search.bp_search)
+    app.register_blueprint(order.bp_order)  # 注册订单蓝图
+    app.register_blueprint(metrics.bp_metrics)
+    app.register_blueprint(picture.bp_picture)
+
+    # 注册异常处理器
+    register_global_error_handler(app)
+    app.config["JSON_SORT_KEYS"] = False
+
+    # 标记初始化完成
+    init_completed_event.set()
+
+    # 启动服务
+    app.run(
+        host="0.0.0.0",
+        port=5000,
+        debug=False,
+        threaded=True
+    )
+
+if __name__ == "__main__":
     be_run()
\ No newline at end of file
@@ -1,11 +1,23 @@
-# 订单状态枚举（用整数便于存储和比较）
-ORDER_STATUS = {
-    "UNPAID": 1,    # 未付款
-    "PAID": 2,      # 已付款
-    "SHIPPED": 3,   # 已发货
-    "RECEIVED": 4,  # 已收货
-    "CANCELLED": 5  # 已取消（含主动取消和超时取消）
-}
-
-# 订单超时时间（单位：秒，如30分钟）
-ORDER_TIMEOUT = 30 * 60
+# 订单状态枚举（用整数便于存储和比较）
+ORDER_STATUS = {
+    "UNPAID": 1,    # 未付款
+    "PAID": 2,      # 已付款
+    "SHIPPED": 3,   # 已发货
+    "RECEIVED": 4,  # 已收货
+    "CANCELLED": 5  # 已取消（含主动取消和超时取消）
+}
+
+# 订单超时时间（单位：秒，如30分钟）
+ORDER_TIMEOUT = 30 * 60
+
+# 超时订单清理（后台线程）配置
+ORDER_EXPIRY_SWEEP_INTERVAL = 10   # 两次清理之间的间隔（秒）
+ORDER_EXPIRY_BATCH_SIZE = 200      # 每批处理的订单数
+ORDER_EXPIRY_MAX_BATCHES = 50      # 单次清理最多处理的批数，剩余部分留到下一轮
+ORDER_EXPIRY_BATCH_PAUSE = 0.05    # 批次之间的停顿（秒），避免与请求线程争抢数据库
+
+# 超时订单时间轮（可选）：开启后不再周期性扫描，而是按订单截止时间精确触发
+ORDER_TIMER_WHEEL_ENABLED = False
+ORDER_TIMER_WHEEL_TICK = 1         # 时间轮刻度（秒）
+ORDER_TIMER_WHEEL_SLOTS = 4096     # 槽位数（刻度 * 槽位数 大于 ORDER_TIMEOUT 时每个槽位只含同一轮的订单）
+ORDER_TIMER_WHEEL_SAFETY_SWEEP = 300  # 时间轮模式下兜底的 (status, create_time) 范围扫描间隔（秒），0 表示关闭
@@ -0,0 +1,87 @@
+from flask import Blueprint, jsonify, request
+from be.model.store import get_pool_stats, is_ready, get_db
+from be.model.integrity import get_integrity_progress
+from be.model.transaction import get_transaction_stats
+from be.model.order import get_expiry_stats
+from be.model.user import get_token_cache_stats, get_password_cache_stats
+from be.model.revocation import get_revocation_stats
+from be.model.search import get_search_cache_stats
+from be.model.search_engine import get_search_index_stats
+from be.model.search_sync import get_search_sync_stats
+
+bp_metrics = Blueprint("metrics", __name__, url_prefix="/metrics")
+
+
+@bp_metrics.before_request
+def require_ready():
+    """数据库初始化完成前各统计接口统一返回 503（就绪探针自行返回就绪状态）"""
+    if request.endpoint != "metrics.readiness" and not is_ready():
+        return jsonify({"code": 503, "data": None}), 503
+
+
+@bp_metrics.route("/pool", methods=["GET"])
+def pool_metrics():
+    """MongoDB 连接池统计：连接数及借出等待时间，用于压测时调整池大小"""
+    return jsonify({"code": 200, "data": get_pool_stats()})
+
+
+@bp_metrics.route("/transactions", methods=["GET"])
+def transaction_metrics():
+    """下单事务统计：提交、中止及重试次数"""
+    return jsonify({"code": 200, "data": get_transaction_stats()})
+
+
+@bp_metrics.route("/order_expiry", methods=["GET"])
+def order_expiry_metrics():
+    """超时订单清理统计：每轮耗时、批大小和积压"""
+    return jsonify({"code": 200, "data": get_expiry_stats()})
+
+
+@bp_metrics.route("/token_cache", methods=["GET"])
+def token_cache_metrics():
+    """令牌验证缓存统计：命中率、条目数及淘汰次数"""
+    return jsonify({"code": 200, "data": get_token_cache_stats()})
+
+
+@bp_metrics.route("/password_cache", methods=["GET"])
+def password_cache_metrics():
+    """密码验证缓存统计：命中率、条目数及淘汰次数"""
+    return jsonify({"code": 200, "data": get_password_cache_stats()})
+
+
+@bp_metrics.route("/search_cache", methods=["GET"])
+def search_cache_metrics():
+    """搜索结果缓存统计：命中率、条目数、失效次数及被合并的并发查询数"""
+    return jsonify({"code": 200, "data": get_search_cache_stats()})
+
+
+@bp_metrics.route("/search_index", methods=["GET"])
+def search_index_metrics():
+    """内存搜索索引统计：是否就绪、文档数、词项数、倒排表总长度及加载耗时"""
+    return jsonify({"code": 200, "data": get_search_index_stats()})
+
+
+@bp_metrics.route("/search_sync", methods=["GET"])
+def search_sync_metrics():
+    """搜索索引同步统计：同步模式、已同步行数、高水位、积压及新鲜度延迟（秒）"""
+    return jsonify({"code": 200, "data": get_search_sync_stats()})
+
+
+@bp_metrics.route("/revocation", methods=["GET"])
+def revocation_metrics():
+    """无状态令牌吊销过滤器统计：吊销条目数、布隆过滤器命中及误判次数"""
+    return jsonify({"code": 200, "data": get_revocation_stats()})
+
+
+@bp_metrics.route("/ready", methods=["GET"])
+def readiness():
+    """就绪探针：连接池就绪返回 200，否则返回 503（供负载均衡判断是否转发流量）"""
+    if not is_ready():
+        return jsonify({"code": 503, "ready": False}), 503
+    return jsonify({"code": 200, "ready": True})
+
+
+@bp_metrics.route("/integrity", methods=["GET"])
+def integrity_metrics():
+    """books 完整性检查进度：已扫描数、百分比、发现的重复组"""
+    return jsonify({"code": 200, "data": get_integrity_progress(get_db())})
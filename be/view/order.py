@@ -1,82 +1,105 @@
-from flask import Blueprint, request, jsonify
-from be.model.order import Order
-
-bp_order = Blueprint("order", __name__, url_prefix="/order")
-
-@bp_order.route("/create", methods=["POST"])
-def create_order():
-    try:
-        # 从请求中获取参数（兼容测试用例的参数格式）
-        data = request.json
-        user_id = data.get("user_id")
-        store_id = data.get("store_id")
-
-        # 支持两种格式：books=[(id, count)] 或 book_ids+quantities
-        if "books" in data:
-            # 测试用例可能传递的格式：books = [(book_id, quantity), ...]
-            books = data["books"]
-            book_ids = [b[0] for b in books]
-            quantities = [b[1] for b in books]
-        else:
-            # 原始格式：book_ids 和 quantities 分开
-            book_ids = data.get("book_ids", [])
-            quantities = data.get("quantities", [])
-
-        # 校验参数长度匹配
-        if len(book_ids) != len(quantities):
-            return jsonify({"errno": 400, "msg": "book_ids与quantities长度不匹配"}), 400
-
-        # 调用订单创建逻辑
-        order_handler = Order()
-        code, msg, order_id = order_handler.create_order(user_id, store_id, book_ids, quantities)
-
-        # 返回响应（使用errno字段匹配测试用例）
-        if code == 200:
-            return jsonify({
-                "errno": 200,
-                "msg": "ok",
-                "data": {"order_id": order_id}
-            })
-        else:
-            return jsonify({"errno": code, "msg": msg}), code
-
-    except Exception as e:
-        # 捕获所有异常，返回具体错误信息
-        return jsonify({
-            "errno": 500,
-            "msg": f"服务器内部错误：{str(e)}"
-        }), 500
-
-@bp_order.route("/get_orders", methods=["GET"])
-def get_user_orders():
-    try:
-        user_id = request.args.get("user_id")
-        order_handler = Order()
-        code, msg, orders = order_handler.get_user_orders(user_id)
-        if code == 200:
-            return jsonify({
-                "errno": 200,
-                "msg": "ok",
-                "data": {"orders": orders}
-            })
-        else:
-            return jsonify({"errno": code, "msg": msg}), code
-    except Exception as e:
-        return jsonify({
-            "errno": 500,
-            "msg": f"服务器内部错误：{str(e)}"
-        }), 500
-
-@bp_order.route("/cancel", methods=["POST"])
-def cancel_order():
-    try:
-        user_id = request.json.get("user_id")
-        order_id = request.json.get("order_id")
-        order_handler = Order()
-        code, msg = order_handler.cancel_order(user_id, order_id)
-        return jsonify({"errno": code, "msg": msg}), code
-    except Exception as e:
-        return jsonify({
-            "errno": 500,
-            "msg": f"服务器内部错误：{str(e)}"
+from flask import Blueprint, request, jsonify
+from be.model.order import Order
+
+bp_order = Blueprint("order", __name__, url_prefix="/order")
+
+@bp_order.route("/create", methods=["POST"])
+def create_order():
+    try:
+        # 从请求中获取参数（兼容测试用例的参数格式）
+        data = request.json
+        user_id = data.get("user_id")
+        store_id = data.get("store_id")
+
+        # 支持两种格式：books=[(id, count)] 或 book_ids+quantities
+        if "books" in data:
+            # 测试用例可能传递的格式：books = [(book_id, quantity), ...]
+            books = data["books"]
+            book_ids = [b[0] for b in books]
+            quantities = [b[1] for b in books]
+        else:
+            # 原始格式：book_ids 和 quantities 分开
+            book_ids = data.get("book_ids", [])
+            quantities = data.get("quantities", [])
+
+        # 校验参数长度匹配
+        if len(book_ids) != len(quantities):
+            return jsonify({"errno": 400, "msg": "book_ids与quantities长度不匹配"}), 400
+
+        # 调用订单创建逻辑
+        order_handler = Order()
+        code, msg, order_id = order_handler.create_order(user_id, store_id, book_ids, quantities)
+
+        # 返回响应（使用errno字段匹配测试用例）
+        if code == 200:
+            return jsonify({
+                "errno": 200,
+                "msg": "ok",
+                "data": {"order_id": order_id}
+            })
+        else:
+            return jsonify({"errno": code, "msg": msg}), code
+
+    except Exception as e:
+        # 捕获所有异常，返回具体错误信息
+        return jsonify({
+            "errno": 500,
+            "msg": f"服务器内部错误：{str(e)}"
+        }), 500
+
+def _parse_status(value: str):
+    """状态参数：整数状态（Order.create_order 创建的订单）按整数匹配，其余按字符串匹配"""
+    try:
+        return int(value)
+    except ValueError:
+        return value
+
+
+@bp_order.route("/get_orders", methods=["GET"])
+def get_user_orders():
+    try:
+        user_id = request.args.get("user_id")
+        cursor = request.args.get("cursor") or None
+        fields = request.args.get("fields", "")
+        status = request.args.get("status", "")
+        # 不传 limit 和 cursor 时返回全部订单；传入任一个时分页返回，data.next_cursor 为下一页游标（没有下一页时为 null）
+        try:
+            limit = int(request.args["limit"]) if "limit" in request.args else None
+        except ValueError:
+            return jsonify({"errno": 400, "msg": "limit必须为整数"}), 400
+
+        order_handler = Order()
+        code, msg, orders, next_cursor = order_handler.get_user_orders(
+            user_id,
+            limit=limit,
+            cursor=cursor,
+            fields=[f.strip() for f in fields.split(",") if f.strip()],
+            statuses=[_parse_status(s.strip()) for s in status.split(",") if s.strip()]
+        )
+        if code == 200:
+            return jsonify({
+                "errno": 200,
+                "msg": "ok",
+                "data": {"orders": orders, "next_cursor": next_cursor}
+            })
+        else:
+            return jsonify({"errno": code, "msg": msg}), code
+    except Exception as e:
+        return jsonify({
+            "errno": 500,
+            "msg": f"服务器内部错误：{str(e)}"
+        }), 500
+
+@bp_order.route("/cancel", methods=["POST"])
+def cancel_order():
+    try:
+        user_id = request.json.get("user_id")
+        order_id = request.json.get("order_id")
+        order_handler = Order()
+        code, msg = order_handler.cancel_order(user_id, order_id)
+        return jsonify({"errno": code, "msg": msg}), code
+    except Exception as e:
+        return jsonify({
+            "errno": 500,
+            "msg": f"服务器内部错误：{str(e)}"
         }), 500
\ No newline at end of file
@@ -0,0 +1,88 @@
+import re
+from flask import Blueprint, Response, request, jsonify
+from be.model.store import get_db
+from be.model.picture import PictureStore, PICTURE_CHUNK_SIZE
+
+bp_picture = Blueprint("picture", __name__, url_prefix="/pictures")
+
+# 图片按内容寻址，同一 id 的内容永不变化，可长期缓存
+PICTURE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+RANGE_PATTERN = re.compile(r"^bytes=(\d*)-(\d*)$")
+
+
+def parse_range(header: str, length: int):
+    """
+    解析单个字节区间，返回 (start, end)（含 end）；
+    header 为空或含多个区间时返回 None（按完整内容响应），区间不可满足时返回 False。
+    """
+    if not header:
+        return None
+    match = RANGE_PATTERN.match(header.strip())
+    if match is None:
+        return None
+    first, last = match.groups()
+    if not first and not last:
+        return False
+    if not first:
+        # bytes=-N：最后 N 个字节
+        suffix = int(last)
+        if suffix == 0:
+            return False
+        return max(length - suffix, 0), length - 1
+    start = int(first)
+    end = min(int(last), length - 1) if last else length - 1
+    if start >= length or start > end:
+        return False
+    return start, end
+
+
+def stream_picture(grid_out, start: int, end: int):
+    """从 GridOut 中按块读取 [start, end] 区间，避免整张图片载入内存"""
+    try:
+        grid_out.seek(start)
+        remaining = end - start + 1
+        while remaining > 0:
+            data = grid_out.read(min(PICTURE_CHUNK_SIZE, remaining))
+            if not data:
+                break
+            remaining -= len(data)
+            yield data
+    finally:
+        grid_out.close()
+
+
+@bp_picture.route("/<picture_id>", methods=["GET"])
+def get_picture(picture_id):
+    etag = f'"{picture_id}"'
+    headers = {
+        "ETag": etag,
+        "Cache-Control": PICTURE_CACHE_CONTROL,
+        "Accept-Ranges": "bytes",
+    }
+    # 内容寻址：ETag 即 id，命中时无需访问 GridFS
+    if request.headers.get("If-None-Match") in (etag, picture_id, "*"):
+        if PictureStore(get_db()).exists(picture_id):
+            return Response(status=304, headers=headers)
+
+    grid_out = PictureStore(get_db()).open(picture_id)
+    if grid_out is None:
+        return jsonify({"code": 404, "msg": f"图片不存在：{picture_id}"}), 404
+
+    length = grid_out.length
+    content_type = (grid_out.metadata or {}).get("contentType", "application/octet-stream")
+    byte_range = parse_range(request.headers.get("Range"), length)
+    if byte_range is False:
+        grid_out.close()
+        headers["Content-Range"] = f"bytes */{length}"
+        return Response(status=416, headers=headers)
+
+    status = 200
+    start, end = 0, length - 1
+    if byte_range is not None:
+        status = 206
+        start, end = byte_range
+        headers["Content-Range"] = f"bytes {start}-{end}/{length}"
+    headers["Content-Length"] = str(end - start + 1)
+    return Response(stream_picture(grid_out, start, end), status=status,
+                    headers=headers, content_type=content_type, direct_passthrough=True)
+
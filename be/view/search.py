@@ -1,90 +1,89 @@
-from flask import Blueprint, request, jsonify
-import logging
-from be.model.store import get_db
-
-bp_search = Blueprint("search", __name__)
-
-
-@bp_search.route("/search_books", methods=["GET"])
-def search_books():
-    # 初始化默认响应结构（确保包含所有必要字段）
-    default_resp = {
-        "code": 200,
-        "data": {
-            "total": 0,
-            "page_num": 1,
-            "page_size": 20,
-            "books": []
-        }
-    }
-
-    try:
-        # 解析参数（增加类型校验）
-        keyword = request.args.get("keyword", "").strip()
-        store_id = request.args.get("store_id", "").strip()
-
-        # 处理页码和页大小（确保为正数）
-        try:
-            page_num = int(request.args.get("page_num", 1))
-            page_size = int(request.args.get("page_size", 20))
-            page_num = max(1, page_num)  # 页码最小为1
-            page_size = max(1, min(page_size, 100))  # 页大小限制1-100
-        except ValueError:
-            return jsonify({
-                "code": 400,
-                "msg": "页码或页大小必须为整数",
-                "data": default_resp["data"]  # 即使参数错误也返回完整结构
-            }), 400
-
-        # 构建查询条件
-        query = {}
-        if keyword:
-            query["$text"] = {"$search": keyword}
-        if store_id:
-            query["store_id"] = store_id
-
-        # 执行查询
-        db = get_db()
-        collection = db.books
-        total = collection.count_documents(query)  # 计算总条数
-
-        # 分页查询
-        skip = (page_num - 1) * page_size
-        cursor = collection.find(
-            query,
-            {
-                "score": {"$meta": "textScore"},
-                "store_id": 1,
-                "book_id": "$id",  # 映射id为book_id
-                "title": 1,
-                "tags": 1,
-                "price": 1
-            }
-        ).sort([("score", {"$meta": "textScore"})])
-
-        # 处理结果
-        books = []
-        for book in cursor.skip(skip).limit(page_size):
-            book.pop("_id", None)
-            books.append(book)
-
-        # 构造成功响应
-        return jsonify({
-            "code": 200,
-            "msg": "success",
-            "data": {
-                "total": total,
-                "page_num": page_num,
-                "page_size": page_size,
-                "books": books
-            }
-        })
-
-    except Exception as e:
-        logging.error(f"搜索异常: {str(e)}")
-        # 异常时仍返回完整结构（total=0）
-        return jsonify({
-            "code": 500,
-            "msg": f"搜索失败：{str(e)}",
-            "data": default_resp["data"]
-        }), 500
\ No newline at end of file
+from flask import Blueprint, request, jsonify
+import logging
+from be.model.store import get_db
+from be.model.catalog import get_store_books
+from be.model import search as search_model
+
+bp_search = Blueprint("search", __name__)
+
+
+@bp_search.route("/search_books", methods=["GET"])
+def search_books():
+    # 初始化默认响应结构（确保包含所有必要字段）
+    default_resp = {
+        "code": 200,
+        "data": {
+            "total": 0,
+            "total_capped": False,
+            "total_display": "0",
+            "page_num": 1,
+            "page_size": 20,
+            "books": [],
+            "next_cursor": None
+        }
+    }
+
+    try:
+        # 解析参数（增加类型校验）
+        keyword = request.args.get("keyword", "").strip()
+        store_id = request.args.get("store_id", "").strip()
+        # 深分页游标（上一页返回的 next_cursor），传入时忽略 page_num
+        cursor = request.args.get("cursor", "").strip() or None
+
+        # 处理页码和页大小（确保为正数）
+        try:
+            page_num = int(request.args.get("page_num", 1))
+            page_size = int(request.args.get("page_size", 20))
+            page_num = max(1, page_num)  # 页码最小为1
+            page_size = max(1, min(page_size, 100))  # 页大小限制1-100
+            # 总数上限（0 表示精确计数），如 10000 时超过部分显示为 "10000+"
+            total_limit = max(0, int(request.args.get("total_limit", 0)))
+        except ValueError:
+            return jsonify({
+                "code": 400,
+                "msg": "页码、页大小或总数上限必须为整数",
+                "data": default_resp["data"]  # 即使参数错误也返回完整结构
+            }), 400
+
+        # 查询（带结果缓存）
+        try:
+            data = search_model.search_books(
+                get_db(), keyword, store_id, page_num, page_size, total_limit, cursor
+            )
+        except ValueError as e:
+            return jsonify({"code": 400, "msg": str(e), "data": default_resp["data"]}), 400
+
+        # 构造成功响应
+        return jsonify({
+            "code": 200,
+            "msg": "success",
+            "data": data
+        })
+
+    except Exception as e:
+        logging.error(f"搜索异常: {str(e)}")
+        # 异常时仍返回完整结构（total=0）
+        return jsonify({
+            "code": 500,
+            "msg": f"搜索失败：{str(e)}",
+            "data": default_resp["data"]
+        }), 500
+
+
+@bp_search.route("/store_books", methods=["GET"])
+def store_books():
+    """
+    店铺库存列表：默认只返回 book_id、price、stock_level；
+    fields（逗号分隔，如 title,author，或 * 表示全部）非空时才关联共享目录返回 book_info。
+    """
+    store_id = request.args.get("store_id", "").strip()
+    if not store_id:
+        return jsonify({"code": 400, "msg": "store_id 不能为空", "data": {"books": []}}), 400
+    book_ids = request.args.getlist("book_id") or None
+    fields = [f.strip() for f in request.args.get("fields", "").split(",") if f.strip()]
+    try:
+        books = get_store_books(get_db(), store_id, book_ids, fields)
+        return jsonify({"code": 200, "msg": "success", "data": {"books": books}})
+    except Exception as e:
+        logging.error(f"查询店铺库存异常: {str(e)}")
+        return jsonify({"code": 500, "msg": f"查询失败：{str(e)}", "data": {"books": []}}), 500
@@ -1,65 +1,150 @@
-from flask import Blueprint, request, jsonify
-from be.model import seller
-import json
-import logging
-
-# 统一使用现有蓝图命名规范（bp_seller）
-bp_seller = Blueprint("seller", __name__, url_prefix="/seller")
-
-
-@bp_seller.route("/create_store", methods=["POST"])
-def seller_create_store():
-    user_id: str = request.json.get("user_id")
-    store_id: str = request.json.get("store_id")
-    s = seller.Seller()
-    code, message = s.create_store(user_id, store_id)
-    return jsonify({"message": message}), code
-
-
-@bp_seller.route("/add_book", methods=["POST"])
-def seller_add_book():
-    user_id: str = request.json.get("user_id")
-    store_id: str = request.json.get("store_id")
-    book_info: str = request.json.get("book_info")
-    stock_level: str = request.json.get("stock_level", 0)
-
-    s = seller.Seller()
-    code, message = s.add_book(
-        user_id, store_id, book_info.get("id"), json.dumps(book_info), stock_level
-    )
-
-    return jsonify({"message": message}), code
-
-
-@bp_seller.route("/add_stock_level", methods=["POST"])
-def add_stock_level():
-    user_id: str = request.json.get("user_id")
-    store_id: str = request.json.get("store_id")
-    book_id: str = request.json.get("book_id")
-    add_num: str = request.json.get("add_stock_level", 0)
-
-    s = seller.Seller()
-    code, message = s.add_stock_level(user_id, store_id, book_id, add_num)
-
-    return jsonify({"message": message}), code
-
-
-@bp_seller.route('/ship_order', methods=['POST'])
-def ship_order():
-    """卖家发货接口：更新订单状态为已发货"""
-    # 提取请求参数（与现有接口一致使用request.json）
-    seller_id: str = request.json.get("seller_id")
-    store_id: str = request.json.get("store_id")
-    order_id: str = request.json.get("order_id")
-    token: str = request.json.get("token")
-
-    # 验证必填参数（保持与其他接口相同的校验风格）
-    if not all([seller_id, store_id, order_id, token]):
-        return jsonify({"message": "missing required fields"}), 400
-
-    # 调用seller模块的发货方法
-    s = seller.Seller()
-    code, message = s.ship_order(seller_id, store_id, order_id, token)
-
-    # 保持返回格式统一（仅返回message字段，状态码使用code）
+from flask import Blueprint, request, jsonify
+from be.model import seller
+import io
+import csv
+import json
+import logging
+
+# 统一使用现有蓝图命名规范（bp_seller）
+bp_seller = Blueprint("seller", __name__, url_prefix="/seller")
+
+
+@bp_seller.route("/create_store", methods=["POST"])
+def seller_create_store():
+    user_id: str = request.json.get("user_id")
+    store_id: str = request.json.get("store_id")
+    s = seller.Seller()
+    code, message = s.create_store(user_id, store_id)
+    return jsonify({"message": message}), code
+
+
+@bp_seller.route("/add_book", methods=["POST"])
+def seller_add_book():
+    user_id: str = request.json.get("user_id")
+    store_id: str = request.json.get("store_id")
+    book_info: dict = request.json.get("book_info")
+    stock_level: str = request.json.get("stock_level", 0)
+
+    s = seller.Seller()
+    code, message = s.add_book(
+        user_id, store_id, book_info.get("id"), book_info, stock_level
+    )
+
+    return jsonify({"message": message}), code
+
+
+def iter_ndjson(stream):
+    """逐行解析 NDJSON 请求体，不把整个请求读入内存；无法解析的行产出 None"""
+    for line in stream:
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            yield json.loads(line)
+        except ValueError:
+            yield None
+
+
+@bp_seller.route("/add_books", methods=["POST"])
+def seller_add_books():
+    """
+    批量上架。两种请求格式：
+      - application/json：{"user_id", "store_id", "books": [{"book_info": {...}, "stock_level": n}, ...]}
+      - application/x-ndjson：user_id、store_id 放在查询参数中，请求体每行一本书
+    """
+    if request.mimetype == "application/x-ndjson":
+        user_id: str = request.args.get("user_id")
+        store_id: str = request.args.get("store_id")
+        books = iter_ndjson(request.stream)
+    else:
+        user_id: str = request.json.get("user_id")
+        store_id: str = request.json.get("store_id")
+        books = request.json.get("books", [])
+
+    s = seller.Seller()
+    code, message, results = s.add_books(user_id, store_id, books)
+
+    return jsonify({"message": message, "results": results}), code
+
+
+@bp_seller.route("/add_stock_level", methods=["POST"])
+def add_stock_level():
+    user_id: str = request.json.get("user_id")
+    store_id: str = request.json.get("store_id")
+    book_id: str = request.json.get("book_id")
+    add_num: str = request.json.get("add_stock_level", 0)
+
+    s = seller.Seller()
+    code, message = s.add_stock_level(user_id, store_id, book_id, add_num)
+
+    return jsonify({"message": message}), code
+
+
+def parse_delta(value):
+    """库存增量转为整数；无法转换时原样返回，由模型层记为格式错误的行"""
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return value
+
+
+def iter_stock_csv(stream):
+    """逐行解析 CSV（book_id,delta），首行为表头时跳过"""
+    reader = csv.reader(io.TextIOWrapper(stream, encoding="utf-8"))
+    for row_no, row in enumerate(reader):
+        if row_no == 0 and row[:1] == ["book_id"]:
+            continue
+        if not row:
+            continue
+        yield (row[0].strip(), parse_delta(row[1]) if len(row) > 1 else None)
+
+
+def iter_stock_ndjson(stream):
+    """逐行解析 NDJSON（{"book_id": ..., "delta": ...}）"""
+    for item in iter_ndjson(stream):
+        if not isinstance(item, dict):
+            yield (None, None)
+            continue
+        yield (item.get("book_id"), item.get("delta"))
+
+
+@bp_seller.route("/add_stock_levels", methods=["POST"])
+def add_stock_levels():
+    """
+    批量调整库存：user_id、store_id 放在查询参数中，请求体为 CSV（text/csv，每行 book_id,delta）
+    或 NDJSON（application/x-ndjson，每行 {"book_id", "delta"}），按流逐行读取。
+    """
+    user_id: str = request.args.get("user_id")
+    store_id: str = request.args.get("store_id")
+    if request.mimetype == "text/csv":
+        rows = iter_stock_csv(request.stream)
+    elif request.mimetype == "application/x-ndjson":
+        rows = iter_stock_ndjson(request.stream)
+    else:
+        return jsonify({"message": "unsupported content type"}), 400
+
+    s = seller.Seller()
+    code, message, report = s.add_stock_levels(user_id, store_id, rows)
+
+    return jsonify(dict(report, message=message)), code
+
+
+@bp_seller.route('/ship_order', methods=['POST'])
+def ship_order():
+    """卖家发货接口：更新订单状态为已发货"""
+    # 提取请求参数（与现有接口一致使用request.json）
+    seller_id: str = request.json.get("seller_id")
+    store_id: str = request.json.get("store_id")
+    order_id: str = request.json.get("order_id")
+    token: str = request.json.get("token")
+
+    # 验证必填参数（保持与其他接口相同的校验风格）
+    if not all([seller_id, store_id, order_id, token]):
+        return jsonify({"message": "missing required fields"}), 400
+
+    # 调用seller模块的发货方法
+    s = seller.Seller()
+    code, message = s.ship_order(seller_id, store_id, order_id, token)
+
+    # 保持返回格式统一（仅返回message字段，状态码使用code）
     return jsonify({"message": message}), code
\ No newline at end of file
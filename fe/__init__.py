@@ -1 +1 @@
-#!/usr/bin/env python3
+#!/usr/bin/env python3
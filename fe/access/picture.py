@@ -0,0 +1,15 @@
+import requests
+from urllib.parse import urljoin
+
+
+class Picture:
+    def __init__(self, url_prefix):
+        self.url_prefix = urljoin(url_prefix, "pictures/")
+
+    def get(self, picture_id: str, etag: str = None, byte_range: str = None) -> requests.Response:
+        headers = {}
+        if etag is not None:
+            headers["If-None-Match"] = etag
+        if byte_range is not None:
+            headers["Range"] = byte_range
+        return requests.get(urljoin(self.url_prefix, picture_id), headers=headers)
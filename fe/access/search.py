@@ -1,22 +1,47 @@
-# fe/access/search.py
-import requests
-from fe.conf import URL  # 保留默认URL
-
-class Search:
-    # 支持传入自定义URL，默认使用conf.URL
-    def __init__(self, url_prefix=None):
-        self.url_prefix = url_prefix if url_prefix else URL
-
-    def search_books(self, keyword, store_id="", page_num=1, page_size=20):
-        search_url = f"{self.url_prefix}/search_books"
-        params = {
-            "keyword": keyword,
-            "store_id": store_id,
-            "page_num": page_num,
-            "page_size": page_size
-        }
-        try:
-            response = requests.get(search_url, params=params, timeout=10)
-            return response.status_code, response.json()
-        except Exception as e:
-            return 500, {"msg": f"搜索请求失败：{str(e)}"}
\ No newline at end of file
+# fe/access/search.py
+import requests
+from fe.conf import URL  # 保留默认URL
+
+class Search:
+    # 支持传入自定义URL，默认使用conf.URL
+    def __init__(self, url_prefix=None):
+        self.url_prefix = url_prefix if url_prefix else URL
+
+    def search_books(self, keyword, store_id="", page_num=1, page_size=20, total_limit=0, cursor=None):
+        """cursor 为上一页响应中的 data.next_cursor，传入时按游标继续翻页（忽略 page_num）"""
+        search_url = f"{self.url_prefix}/search_books"
+        params = {
+            "keyword": keyword,
+            "store_id": store_id,
+            "page_num": page_num,
+            "page_size": page_size,
+            "total_limit": total_limit  # 0 为精确总数，否则超过上限时 total_capped 为 True
+        }
+        if cursor:
+            params["cursor"] = cursor
+        try:
+            response = requests.get(search_url, params=params, timeout=10)
+            return response.status_code, response.json()
+        except Exception as e:
+            return 500, {"msg": f"搜索请求失败：{str(e)}"}
+
+    def store_books(self, store_id, book_ids=None, fields=None):
+        """店铺库存列表，fields 为需要的描述性字段列表（["*"] 表示全部）"""
+        params = {"store_id": store_id, "book_id": book_ids or [], "fields": ",".join(fields or [])}
+        try:
+            response = requests.get(f"{self.url_prefix}/store_books", params=params, timeout=10)
+            return response.status_code, response.json()
+        except Exception as e:
+            return 500, {"msg": f"查询请求失败：{str(e)}"}
+
+    def iter_books(self, keyword, store_id="", page_size=20):
+        """按游标逐页遍历全部搜索结果（适合“加载更多”和全量抓取）"""
+        cursor = None
+        while True:
+            status, resp = self.search_books(keyword, store_id, page_size=page_size, cursor=cursor)
+            if status != 200:
+                raise RuntimeError(f"搜索翻页失败：{resp}")
+            yield from resp["data"]["books"]
+            cursor = resp["data"].get("next_cursor")
+            if not cursor:
+                return
@@ -1,64 +1,106 @@
-import requests
-from urllib.parse import urljoin
-from fe.access import book
-from fe.access.auth import Auth
-
-
-class Seller:
-    def __init__(self, url_prefix, seller_id: str, password: str):
-        self.url_prefix = urljoin(url_prefix, "seller/")
-        self.seller_id = seller_id
-        self.password = password
-        self.terminal = "my terminal"
-        self.auth = Auth(url_prefix)
-        code, self.token = self.auth.login(self.seller_id, self.password, self.terminal)
-        assert code == 200
-
-    def create_store(self, store_id):
-        json = {
-            "user_id": self.seller_id,
-            "store_id": store_id,
-        }
-        url = urljoin(self.url_prefix, "create_store")
-        headers = {"token": self.token}
-        r = requests.post(url, headers=headers, json=json)
-        return r.status_code
-
-    def add_book(self, store_id: str, stock_level: int, book_info: book.Book) -> int:
-        json = {
-            "user_id": self.seller_id,
-            "store_id": store_id,
-            "book_info": book_info.__dict__,
-            "stock_level": stock_level,
-        }
-        url = urljoin(self.url_prefix, "add_book")
-        headers = {"token": self.token}
-        r = requests.post(url, headers=headers, json=json)
-        return r.status_code
-
-    def add_stock_level(
-        self, seller_id: str, store_id: str, book_id: str, add_stock_num: int
-    ) -> int:
-        json = {
-            "user_id": seller_id,
-            "store_id": store_id,
-            "book_id": book_id,
-            "add_stock_level": add_stock_num,
-        }
-        url = urljoin(self.url_prefix, "add_stock_level")
-        headers = {"token": self.token}
-        r = requests.post(url, headers=headers, json=json)
-        return r.status_code
-
-    def ship_order(self, store_id: str, order_id: str) -> int:
-        """新增发货访问方法：调用卖家发货接口"""
-        json = {
-            "seller_id": self.seller_id,
-            "store_id": store_id,
-            "order_id": order_id,
-            "token": self.token  # 传递token用于身份验证
-        }
-        url = urljoin(self.url_prefix, "ship_order")
-        headers = {"token": self.token}  # 保持原有header传token的兼容方式
-        r = requests.post(url, headers=headers, json=json)
+import json
+import requests
+from urllib.parse import urljoin
+from fe.access import book
+from fe.access.auth import Auth
+
+
+class Seller:
+    def __init__(self, url_prefix, seller_id: str, password: str):
+        self.url_prefix = urljoin(url_prefix, "seller/")
+        self.seller_id = seller_id
+        self.password = password
+        self.terminal = "my terminal"
+        self.auth = Auth(url_prefix)
+        code, self.token = self.auth.login(self.seller_id, self.password, self.terminal)
+        assert code == 200
+
+    def create_store(self, store_id):
+        json = {
+            "user_id": self.seller_id,
+            "store_id": store_id,
+        }
+        url = urljoin(self.url_prefix, "create_store")
+        headers = {"token": self.token}
+        r = requests.post(url, headers=headers, json=json)
+        return r.status_code
+
+    def add_book(self, store_id: str, stock_level: int, book_info: book.Book) -> int:
+        json = {
+            "user_id": self.seller_id,
+            "store_id": store_id,
+            "book_info": book_info.__dict__,
+            "stock_level": stock_level,
+        }
+        url = urljoin(self.url_prefix, "add_book")
+        headers = {"token": self.token}
+        r = requests.post(url, headers=headers, json=json)
+        return r.status_code
+
+    def add_books(self, store_id: str, books: list, ndjson: bool = False) -> (int, list):
+        """批量上架，books 为 [(stock_level, book.Book), ...]；返回状态码和逐条结果"""
+        items = [
+            {"book_info": book_info.__dict__, "stock_level": stock_level}
+            for stock_level, book_info in books
+        ]
+        url = urljoin(self.url_prefix, "add_books")
+        headers = {"token": self.token}
+        if ndjson:
+            headers["Content-Type"] = "application/x-ndjson"
+            body = "".join(json.dumps(item) + "\n" for item in items)
+            r = requests.post(
+                url, headers=headers, data=body.encode(),
+                params={"user_id": self.seller_id, "store_id": store_id}
+            )
+        else:
+            r = requests.post(url, headers=headers, json={
+                "user_id": self.seller_id, "store_id": store_id, "books": items
+            })
+        return r.status_code, r.json().get("results", [])
+
+    def add_stock_level(
+        self, seller_id: str, store_id: str, book_id: str, add_stock_num: int
+    ) -> int:
+        json = {
+            "user_id": seller_id,
+            "store_id": store_id,
+            "book_id": book_id,
+            "add_stock_level": add_stock_num,
+        }
+        url = urljoin(self.url_prefix, "add_stock_level")
+        headers = {"token": self.token}
+        r = requests.post(url, headers=headers, json=json)
+        return r.status_code
+
+    def add_stock_levels(self, store_id: str, rows: list, fmt: str = "csv") -> (int, dict):
+        """批量调整库存，rows 为 [(book_id, delta), ...]，fmt 为 csv 或 ndjson；返回状态码和处理报告"""
+        if fmt == "csv":
+            content_type = "text/csv"
+            body = "book_id,delta\n" + "".join(
+                "{},{}\n".format(book_id, delta) for book_id, delta in rows
+            )
+        else:
+            content_type = "application/x-ndjson"
+            body = "".join(
+                json.dumps({"book_id": book_id, "delta": delta}) + "\n" for book_id, delta in rows
+            )
+        url = urljoin(self.url_prefix, "add_stock_levels")
+        headers = {"token": self.token, "Content-Type": content_type}
+        r = requests.post(
+            url, headers=headers, data=body.encode(),
+            params={"user_id": self.seller_id, "store_id": store_id}
+        )
+        return r.status_code, r.json()
+
+    def ship_order(self, store_id: str, order_id: str) -> int:
+        """新增发货访问方法：调用卖家发货接口"""
+        json = {
+            "seller_id": self.seller_id,
+            "store_id": store_id,
+            "order_id": order_id,
+            "token": self.token  # 传递token用于身份验证
+        }
+        url = urljoin(self.url_prefix, "ship_order")
+        headers = {"token": self.token}  # 保持原有header传token的兼容方式
+        r = requests.post(url, headers=headers, json=json)
         return r.status_code
\ No newline at end of file
@@ -0,0 +1,64 @@
+"""
+密码哈希与验证缓存基准：
+
+    python -m fe.bench.bench_password [--rounds 20] [--iterations 100000]
+
+分别测量 KDF 哈希、KDF 校验、验证缓存命中（HMAC 摘要 + 缓存查找）以及缓存满载时的淘汰开销。
+"""
+import argparse
+import time
+
+from be.model.cache import TTLCache
+from be.model.user import (
+    PASSWORD_KDF_ITERATIONS, hash_password, check_password_hash, password_cache_key
+)
+
+
+def timed(fn, rounds: int) -> float:
+    """返回单次调用的平均耗时（毫秒）"""
+    start = time.perf_counter()
+    for _ in range(rounds):
+        fn()
+    return (time.perf_counter() - start) / rounds * 1000
+
+
+def run(rounds: int, iterations: int, cache_entries: int = 10000) -> dict:
+    stored = hash_password("bench_password", iterations)
+    cache = TTLCache(cache_entries, default_ttl=300)
+    for i in range(cache_entries - 1):
+        cache.put(("fill_{}".format(i), b""), stored)
+    cache.put(password_cache_key("bench_user", "bench_password"), stored, group="bench_user")
+
+    def cache_hit():
+        cache.get(password_cache_key("bench_user", "bench_password"))
+
+    counter = iter(range(10 ** 9))
+
+    def cache_churn():
+        # 缓存已满时每次写入都淘汰最久未使用的条目
+        i = next(counter)
+        cache.put(("user_{}".format(i), b""), stored, group="user_{}".format(i))
+
+    hit_rounds = rounds * 1000
+    # 先测命中，再测淘汰（淘汰会挤掉命中用的条目）
+    return {
+        "iterations": iterations,
+        "kdf_hash_ms": round(timed(lambda: hash_password("bench_password", iterations), rounds), 3),
+        "kdf_verify_ms": round(timed(lambda: check_password_hash(stored, "bench_password"), rounds), 3),
+        "cache_hit_ms": round(timed(cache_hit, hit_rounds), 5),
+        "cache_put_evict_ms": round(timed(cache_churn, hit_rounds), 5),
+        "cache": cache.snapshot(),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="密码哈希与验证缓存基准")
+    parser.add_argument("--rounds", type=int, default=20)
+    parser.add_argument("--iterations", type=int, default=PASSWORD_KDF_ITERATIONS)
+    args = parser.parse_args()
+    for name, value in run(args.rounds, args.iterations).items():
+        print("{}: {}".format(name, value))
+
+
+if __name__ == "__main__":
+    main()
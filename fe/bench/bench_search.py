@@ -0,0 +1,140 @@
+"""
+搜索排序基准：
+
+    python -m fe.bench.bench_search [--synthetic 20000] [--queries 200] [--mongo]
+
+对比：
+  - mongo：现有路径，MongoDB $text + $facet（按 textScore 全量排序后 skip/limit），需要 --mongo 且数据库可用；
+  - memory_tf：内存索引，加权词频打分；
+  - memory_bm25：内存索引，NumPy 向量化 BM25F 打分 + argpartition 取 top-k；
+  - memory_bm25_full_sort：同样打分，但对全部候选做完整排序（用于衡量 top-k 的收益）；
+  - top_k / full_sort：单独对 20 万个候选分数取前 page_size 条。
+默认从 books 集合加载图书；--synthetic N 时生成 N 本随机中文图书，只测内存路径。
+"""
+import argparse
+import random
+import time
+
+import numpy as np
+
+from be.model.search_engine import SearchIndex, tokenize, parse_tags
+
+TOP_K_CANDIDATES = 200000
+SYNTHETIC_CHARS = "的一是在不了有和人这中大为上个国我以要他时来用们生到作地于出就分对成会可主发年动同工也能下过子说产种面而方后多定行学法所民得经"
+
+
+def synthetic_books(n: int, seed: int = 1) -> list:
+    rnd = random.Random(seed)
+    return [{
+        "store_id": "store_{}".format(i % 50),
+        "id": str(i),
+        "title": "".join(rnd.choices(SYNTHETIC_CHARS, k=rnd.randint(4, 12))),
+        "tags": [rnd.choice(("小说", "历史", "科普", "漫画", "传记"))],
+        "content": "".join(rnd.choices(SYNTHETIC_CHARS, k=300)),
+        "price": rnd.randint(100, 10000),
+    } for i in range(n)]
+
+
+def sample_keywords(books: list, count: int, seed: int = 2) -> list:
+    """从标题中截取 2-4 字作为查询词，覆盖宽泛（2 字）和较精确（4 字）的查询"""
+    rnd = random.Random(seed)
+    keywords = []
+    while len(keywords) < count:
+        title = rnd.choice(books).get("title") or ""
+        if len(tokenize(title)) >= 1:
+            start = rnd.randint(0, max(len(title) - 2, 0))
+            keywords.append(title[start:start + rnd.randint(2, 4)])
+    return keywords
+
+
+def full_sort(docs, scores, k):
+    return np.lexsort((docs, -scores))[:k]
+
+
+def timed(fn, keywords) -> float:
+    """返回每次查询的平均耗时（毫秒）"""
+    start = time.perf_counter()
+    for keyword in keywords:
+        fn(keyword)
+    return (time.perf_counter() - start) / len(keywords) * 1000
+
+
+def run(books: list, queries: int, page_size: int = 20, db=None) -> dict:
+    bm25 = SearchIndex(ranking="bm25")
+    tf = SearchIndex(ranking="tf")
+    start = time.perf_counter()
+    for book in books:
+        bm25.add(book)
+    build_seconds = time.perf_counter() - start
+    for book in books:
+        tf.add(book)
+
+    # narrow：从标题截取的 2-4 字；broad：高频标签，候选集大，更能体现 top-k 相对全量排序的收益
+    tag_counts = {}
+    for book in books:
+        for tag in parse_tags(book.get("tags")):
+            tag_counts[tag] = tag_counts.get(tag, 0) + 1
+    broad = sorted(tag_counts, key=tag_counts.get, reverse=True)[:5] or [""]
+    keyword_sets = {
+        "narrow": sample_keywords(books, queries),
+        "broad": (broad * (queries // len(broad) + 1))[:queries],
+    }
+    result = {
+        "books": len(books),
+        "queries": queries,
+        "index_build_s": round(build_seconds, 3),
+    }
+    for name, keywords in keyword_sets.items():
+        candidates = [bm25.search(k, limit=0)[0] for k in keywords]
+        result[name + "_avg_candidates"] = round(sum(candidates) / len(candidates), 1)
+        result[name + "_memory_tf_ms"] = round(timed(lambda k: tf.search(k, limit=page_size), keywords), 3)
+        result[name + "_memory_bm25_ms"] = round(timed(lambda k: bm25.search(k, limit=page_size), keywords), 3)
+        original = SearchIndex.__dict__["top_k"]
+        SearchIndex.top_k = staticmethod(full_sort)
+        try:
+            result[name + "_memory_bm25_full_sort_ms"] = round(
+                timed(lambda k: bm25.search(k, limit=page_size), keywords), 3
+            )
+        finally:
+            SearchIndex.top_k = original
+        if db is not None:
+            from be.model.search import run_search
+            result[name + "_mongo_ms"] = round(
+                timed(lambda k: run_search(db, k, "", 1, page_size), keywords), 3
+            )
+    # 单独对比取 top-k 与全量排序（candidates 个候选，分数分别为互不相同 / 大量同分）
+    rng = np.random.default_rng(3)
+    docs = np.arange(TOP_K_CANDIDATES, dtype=np.uint32)
+    for name, scores in (("distinct", rng.random(TOP_K_CANDIDATES)),
+                         ("ties", rng.integers(0, 5, TOP_K_CANDIDATES).astype(np.float64))):
+        result["top_k_{}_{}_ms".format(name, TOP_K_CANDIDATES)] = round(
+            timed(lambda _: SearchIndex.top_k(docs, scores, page_size), range(20)), 3
+        )
+        result["full_sort_{}_{}_ms".format(name, TOP_K_CANDIDATES)] = round(
+            timed(lambda _: full_sort(docs, scores, page_size), range(20)), 3
+        )
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="搜索排序基准")
+    parser.add_argument("--synthetic", type=int, default=0, help="生成 N 本随机图书（只测内存路径）")
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--page-size", type=int, default=20)
+    parser.add_argument("--mongo", action="store_true", help="同时测量 MongoDB $text 路径")
+    args = parser.parse_args()
+
+    db = None
+    if args.synthetic:
+        books = synthetic_books(args.synthetic)
+    else:
+        from be.model.store import init_database, get_db
+        init_database("mongodb://localhost:27017/")
+        db = get_db()
+        books = list(db.books.find({}, {"_id": 0, "picture": 0}))
+    for name, value in run(books, args.queries, args.page_size, db if args.mongo else None).items():
+        print("{}: {}".format(name, value))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+"""
+批量库存调整吞吐基准（需先启动后端）：
+
+    python -m fe.bench.bench_stock [--books 2000] [--rows 200000] [--single 500]
+
+先用 add_books 建立店铺库存，然后分别测量：
+  - 逐条 /seller/add_stock_level 调用 --single 次
+  - 一次 /seller/add_stock_levels 上传 --rows 行（CSV 与 NDJSON）
+"""
+import argparse
+import random
+import time
+import uuid
+
+from fe import conf
+from fe.access import book
+from fe.access.new_seller import register_new_seller
+
+
+def prepare_store(n_books: int):
+    seller_id = "bench_stock_seller_{}".format(uuid.uuid1())
+    store_id = "bench_stock_store_{}".format(uuid.uuid1())
+    seller = register_new_seller(seller_id, seller_id)
+    assert seller.create_store(store_id) == 200
+    book_db = book.BookDB(conf.Use_Large_DB)
+    book_ids = []
+    row_no = 0
+    while row_no < n_books:
+        books = book_db.get_book_info(row_no, min(conf.Data_Batch_Size * 10, n_books - row_no))
+        if not books:
+            break
+        code, _ = seller.add_books(store_id, [(0, bk) for bk in books])
+        assert code == 200
+        book_ids.extend(bk.id for bk in books)
+        row_no += len(books)
+    return seller, store_id, book_ids
+
+
+def run(n_books: int, n_rows: int, n_single: int) -> dict:
+    seller, store_id, book_ids = prepare_store(n_books)
+    rows = [(random.choice(book_ids), random.randint(1, 10)) for _ in range(n_rows)]
+    result = {"books": len(book_ids), "rows": n_rows}
+
+    start = time.perf_counter()
+    for book_id, delta in rows[:n_single]:
+        assert seller.add_stock_level(seller.seller_id, store_id, book_id, delta) == 200
+    elapsed = time.perf_counter() - start
+    result["single_rows_per_s"] = round(n_single / elapsed, 1)
+
+    for fmt in ("csv", "ndjson"):
+        start = time.perf_counter()
+        code, report = seller.add_stock_levels(store_id, rows, fmt=fmt)
+        elapsed = time.perf_counter() - start
+        assert code == 200 and report["updated"] == n_rows
+        result["bulk_{}_rows_per_s".format(fmt)] = round(n_rows / elapsed, 1)
+        result["bulk_{}_s".format(fmt)] = round(elapsed, 3)
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="批量库存调整吞吐基准")
+    parser.add_argument("--books", type=int, default=2000)
+    parser.add_argument("--rows", type=int, default=200000)
+    parser.add_argument("--single", type=int, default=500)
+    args = parser.parse_args()
+    for name, value in run(args.books, args.rows, args.single).items():
+        print("{}: {}".format(name, value))
+
+
+if __name__ == "__main__":
+    main()
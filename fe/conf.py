@@ -1,11 +1,11 @@
-URL = "http://127.0.0.1:5000/"
-Book_Num_Per_Store = 2000
-Store_Num_Per_User = 2
-Seller_Num = 2
-Buyer_Num = 10
-Session = 1
-Request_Per_Session = 1000
-Default_Stock_Level = 1000000
-Default_User_Funds = 10000000
-Data_Batch_Size = 100
-Use_Large_DB = True
+URL = "http://127.0.0.1:5000/"
+Book_Num_Per_Store = 2000
+Store_Num_Per_User = 2
+Seller_Num = 2
+Buyer_Num = 10
+Session = 1
+Request_Per_Session = 1000
+Default_Stock_Level = 1000000
+Default_User_Funds = 10000000
+Data_Batch_Size = 100
+Use_Large_DB = True
@@ -1,51 +1,94 @@
-import pytest
-
-from fe import conf
-from fe.access.new_seller import register_new_seller
-from fe.access import book
-import uuid
-
-
-class TestAddBook:
-    @pytest.fixture(autouse=True)
-    def pre_run_initialization(self):
-        # do before test
-        self.seller_id = "test_add_books_seller_id_{}".format(str(uuid.uuid1()))
-        self.store_id = "test_add_books_store_id_{}".format(str(uuid.uuid1()))
-        self.password = self.seller_id
-        self.seller = register_new_seller(self.seller_id, self.password)
-
-        code = self.seller.create_store(self.store_id)
-        assert code == 200
-        book_db = book.BookDB(conf.Use_Large_DB)
-        self.books = book_db.get_book_info(0, 2)
-
-        yield
-        # do after test
-
-    def test_ok(self):
-        for b in self.books:
-            code = self.seller.add_book(self.store_id, 0, b)
-            assert code == 200
-
-    def test_error_non_exist_store_id(self):
-        for b in self.books:
-            # non exist store id
-            code = self.seller.add_book(self.store_id + "x", 0, b)
-            assert code != 200
-
-    def test_error_exist_book_id(self):
-        for b in self.books:
-            code = self.seller.add_book(self.store_id, 0, b)
-            assert code == 200
-        for b in self.books:
-            # exist book id
-            code = self.seller.add_book(self.store_id, 0, b)
-            assert code != 200
-
-    def test_error_non_exist_user_id(self):
-        for b in self.books:
-            # non exist user id
-            self.seller.seller_id = self.seller.seller_id + "_x"
-            code = self.seller.add_book(self.store_id, 0, b)
-            assert code != 200
+import pytest
+
+from fe import conf
+from fe.access.new_seller import register_new_seller
+from fe.access import book
+from fe.access import search
+from be.model.store import get_db
+import uuid
+
+
+class TestAddBook:
+    @pytest.fixture(autouse=True)
+    def pre_run_initialization(self):
+        # do before test
+        self.seller_id = "test_add_books_seller_id_{}".format(str(uuid.uuid1()))
+        self.store_id = "test_add_books_store_id_{}".format(str(uuid.uuid1()))
+        self.password = self.seller_id
+        self.seller = register_new_seller(self.seller_id, self.password)
+
+        code = self.seller.create_store(self.store_id)
+        assert code == 200
+        book_db = book.BookDB(conf.Use_Large_DB)
+        self.books = book_db.get_book_info(0, 2)
+
+        yield
+        # do after test
+
+    def test_ok(self):
+        for b in self.books:
+            code = self.seller.add_book(self.store_id, 0, b)
+            assert code == 200
+
+    def test_book_info_stored_in_catalog(self):
+        for b in self.books:
+            code = self.seller.add_book(self.store_id, 0, b)
+            assert code == 200
+        db = get_db()
+        for b in self.books:
+            doc = db.store.find_one({"store_id": self.store_id, "book_id": b.id})
+            # 库存行只保留精简字段，描述性内容在共享目录中
+            assert "book_info" not in doc
+            assert doc["price"] == (b.price or 0)
+            catalog = db.catalog.find_one({"_id": doc["catalog_id"]})
+            assert catalog["book_info"]["title"] == b.title
+            assert "price" not in catalog["book_info"]
+
+    def test_catalog_shared_between_stores(self):
+        other_store_id = self.store_id + "_other"
+        assert self.seller.create_store(other_store_id) == 200
+        for b in self.books:
+            assert self.seller.add_book(self.store_id, 0, b) == 200
+            assert self.seller.add_book(other_store_id, 5, b) == 200
+        db = get_db()
+        for b in self.books:
+            rows = list(db.store.find({"book_id": b.id, "store_id": {"$in": [self.store_id, other_store_id]}}))
+            assert len(rows) == 2
+            assert rows[0]["catalog_id"] == rows[1]["catalog_id"]
+            assert db.catalog.count_documents({"_id": rows[0]["catalog_id"]}) == 1
+
+    def test_store_books_lazy_join(self):
+        for b in self.books:
+            assert self.seller.add_book(self.store_id, 3, b) == 200
+        searcher = search.Search(conf.URL)
+        code, body = searcher.store_books(self.store_id)
+        assert code == 200
+        books = body["data"]["books"]
+        assert sorted(r["book_id"] for r in books) == sorted(b.id for b in self.books)
+        assert all("book_info" not in r and r["stock_level"] == 3 for r in books)
+
+        code, body = searcher.store_books(self.store_id, [self.books[0].id], ["title"])
+        assert code == 200
+        assert body["data"]["books"][0]["book_info"] == {"title": self.books[0].title}
+
+    def test_error_non_exist_store_id(self):
+        for b in self.books:
+            # non exist store id
+            code = self.seller.add_book(self.store_id + "x", 0, b)
+            assert code != 200
+
+    def test_error_exist_book_id(self):
+        for b in self.books:
+            code = self.seller.add_book(self.store_id, 0, b)
+            assert code == 200
+        for b in self.books:
+            # exist book id
+            code = self.seller.add_book(self.store_id, 0, b)
+            assert code != 200
+
+    def test_error_non_exist_user_id(self):
+        for b in self.books:
+            # non exist user id
+            self.seller.seller_id = self.seller.seller_id + "_x"
+            code = self.seller.add_book(self.store_id, 0, b)
+            assert code != 200
@@ -0,0 +1,73 @@
+import pytest
+
+from fe import conf
+from fe.access.new_seller import register_new_seller
+from fe.access import book
+from be.model.store import get_db
+import uuid
+
+
+class TestAddBooks:
+    @pytest.fixture(autouse=True)
+    def pre_run_initialization(self):
+        self.seller_id = "test_bulk_add_books_seller_id_{}".format(str(uuid.uuid1()))
+        self.store_id = "test_bulk_add_books_store_id_{}".format(str(uuid.uuid1()))
+        self.password = self.seller_id
+        self.seller = register_new_seller(self.seller_id, self.password)
+
+        code = self.seller.create_store(self.store_id)
+        assert code == 200
+        book_db = book.BookDB(conf.Use_Large_DB)
+        self.books = book_db.get_book_info(0, 20)
+        yield
+
+    @pytest.mark.parametrize("ndjson", [False, True])
+    def test_ok(self, ndjson):
+        code, results = self.seller.add_books(
+            self.store_id, [(i, b) for i, b in enumerate(self.books)], ndjson=ndjson
+        )
+        assert code == 200
+        assert [r["book_id"] for r in results] == [b.id for b in self.books]
+        assert all(r["code"] == 200 for r in results)
+        db = get_db()
+        assert db.store.count_documents({"store_id": self.store_id}) == len(self.books)
+        doc = db.store.find_one({"store_id": self.store_id, "book_id": self.books[3].id})
+        assert doc["stock_level"] == 3
+        assert db.catalog.count_documents({"_id": doc["catalog_id"]}) == 1
+
+    @pytest.mark.parametrize("ndjson", [False, True])
+    def test_exist_book_id(self, ndjson):
+        code = self.seller.add_book(self.store_id, 0, self.books[0])
+        assert code == 200
+        # 已上架的图书和同一请求内重复的图书逐条报错，其余正常插入
+        items = [(1, b) for b in self.books] + [(1, self.books[1])]
+        code, results = self.seller.add_books(self.store_id, items, ndjson=ndjson)
+        assert code == 200
+        codes = [r["code"] for r in results]
+        assert codes[0] == 516
+        assert codes[-1] == 516
+        assert all(c == 200 for c in codes[1:-1])
+
+    @pytest.mark.parametrize("ndjson", [False, True])
+    def test_invalid_items(self, ndjson):
+        # 格式错误的条目逐条报错，前后的条目照常插入
+        items = [(1, b) for b in self.books]
+        items[5] = (-1, self.books[5])
+        items[6] = ("x", self.books[6])
+        code, results = self.seller.add_books(self.store_id, items, ndjson=ndjson)
+        assert code == 200
+        codes = [r["code"] for r in results]
+        assert codes[5] == 400 and codes[6] == 400
+        assert all(c == 200 for i, c in enumerate(codes) if i not in (5, 6))
+        db = get_db()
+        assert db.store.count_documents({"store_id": self.store_id}) == len(self.books) - 2
+
+    def test_error_non_exist_store_id(self):
+        code, results = self.seller.add_books(self.store_id + "x", [(1, b) for b in self.books])
+        assert code == 513
+        assert results == []
+
+    def test_error_non_exist_user_id(self):
+        self.seller.seller_id = self.seller.seller_id + "_x"
+        code, _ = self.seller.add_books(self.store_id, [(1, b) for b in self.books])
+        assert code == 511
@@ -0,0 +1,68 @@
+import pytest
+
+from fe import conf
+from fe.access.new_seller import register_new_seller
+from fe.access import book
+from be.model.store import get_db
+from be.model.seller import STOCK_CHUNK_SIZE
+import uuid
+
+
+class TestAddStockLevels:
+    @pytest.fixture(autouse=True)
+    def pre_run_initialization(self):
+        self.user_id = "test_add_stock_levels_user_{}".format(str(uuid.uuid1()))
+        self.store_id = "test_add_stock_levels_store_{}".format(str(uuid.uuid1()))
+        self.password = self.user_id
+        self.seller = register_new_seller(self.user_id, self.password)
+
+        code = self.seller.create_store(self.store_id)
+        assert code == 200
+        book_db = book.BookDB(conf.Use_Large_DB)
+        self.books = book_db.get_book_info(0, 5)
+        code, _ = self.seller.add_books(self.store_id, [(0, bk) for bk in self.books])
+        assert code == 200
+        yield
+
+    def stock_levels(self) -> dict:
+        return {
+            doc["book_id"]: doc["stock_level"]
+            for doc in get_db().store.find({"store_id": self.store_id})
+        }
+
+    @pytest.mark.parametrize("fmt", ["csv", "ndjson"])
+    def test_ok(self, fmt):
+        rows = [(b.id, 10) for b in self.books] + [(self.books[0].id, -3)]
+        code, report = self.seller.add_stock_levels(self.store_id, rows, fmt=fmt)
+        assert code == 200
+        assert report["updated"] == len(rows)
+        assert report["missing"] == []
+        levels = self.stock_levels()
+        assert levels[self.books[0].id] == 7
+        assert all(levels[b.id] == 10 for b in self.books[1:])
+
+    @pytest.mark.parametrize("fmt", ["csv", "ndjson"])
+    def test_missing_and_invalid(self, fmt):
+        rows = [(self.books[0].id, 5), ("no_such_book_x", 5), (self.books[1].id, "x")]
+        code, report = self.seller.add_stock_levels(self.store_id, rows, fmt=fmt)
+        assert code == 200
+        assert report["updated"] == 1
+        assert report["missing"] == ["no_such_book_x"]
+        assert report["invalid"] == [3]
+        assert self.stock_levels()[self.books[1].id] == 0
+
+    def test_missing_reported_once(self):
+        # 不存在的图书跨越多个分块重复出现，只报告一次
+        rows = [("no_such_book_y", 1), ("no_such_book_x", 1)] * (STOCK_CHUNK_SIZE + 1)
+        code, report = self.seller.add_stock_levels(self.store_id, rows)
+        assert code == 200
+        assert report["missing"] == ["no_such_book_y", "no_such_book_x"]
+
+    def test_error_store_id(self):
+        code, _ = self.seller.add_stock_levels(self.store_id + "_x", [(self.books[0].id, 1)])
+        assert code == 513
+
+    def test_error_user_id(self):
+        self.seller.seller_id = self.user_id + "_x"
+        code, _ = self.seller.add_stock_levels(self.store_id, [(self.books[0].id, 1)])
+        assert code == 511
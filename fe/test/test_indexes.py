@@ -0,0 +1,21 @@
+from be.model.indexes import INDEX_MANIFEST, apply_indexes, explain_query_shapes
+from be.model.store import get_db
+
+
+class TestIndexes:
+    def test_apply_idempotent(self):
+        db = get_db()
+        # 启动时已创建过一次，再次执行不应产生冲突
+        assert apply_indexes(db) == []
+        for collection, models in INDEX_MANIFEST.items():
+            names = set(db[collection].index_information())
+            for model in models:
+                assert model.document["name"] in names
+
+    def test_query_shapes_no_collscan(self):
+        collscans = [
+            (collection, query)
+            for collection, query, collscan, _ in explain_query_shapes(get_db())
+            if collscan
+        ]
+        assert collscans == []
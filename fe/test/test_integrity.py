@@ -0,0 +1,69 @@
+import pytest
+import requests
+from urllib.parse import urljoin
+
+from be.model.integrity import IntegrityJob, JOB_COLLECTION, JOB_ID, STATUS_COMPLETED
+from be.model.store import get_client
+from fe import conf
+
+
+class TestIntegrityJob:
+    @pytest.fixture(autouse=True)
+    def pre_run_initialization(self):
+        # 独立数据库，books 不建唯一索引，以便写入重复记录
+        self.db_name = "bookstore_integrity_test"
+        self.db = get_client()[self.db_name]
+        self.db.books.drop()
+        self.db[JOB_COLLECTION].drop()
+        self.db.books.create_index([("store_id", 1), ("book_id", 1)])
+        docs = [{"store_id": "s1", "book_id": "b{}".format(i)} for i in range(10)]
+        docs += [{"store_id": "s1", "book_id": "b3"}, {"store_id": "s2", "book_id": "b0"},
+                 {"store_id": "s2", "book_id": "b0"}, {"store_id": None, "book_id": "b1"}]
+        self.db.books.insert_many(docs)
+        yield
+        get_client().drop_database(self.db_name)
+
+    def test_find_duplicates(self):
+        checkpoint = IntegrityJob(self.db, batch_size=3, pause=0).run_once()
+        assert checkpoint["status"] == STATUS_COMPLETED
+        assert checkpoint["null_deleted"] == 1
+        assert checkpoint["scanned"] == 13
+        dups = {(d["store_id"], d["book_id"]): d["count"] for d in checkpoint["duplicates"]}
+        assert dups == {("s1", "b3"): 2, ("s2", "b0"): 2}
+
+    def test_resume_from_checkpoint(self):
+        job = IntegrityJob(self.db, batch_size=4, pause=0)
+        job._start_run()
+        # 模拟进程在处理完 s1/b3 后中断
+        job._save_progress(["s1", "b3"], 5, [{"store_id": "s1", "book_id": "b3", "count": 2}])
+        checkpoint = IntegrityJob(self.db, batch_size=4, pause=0).run_once()
+        assert checkpoint["status"] == STATUS_COMPLETED
+        assert checkpoint["scanned"] == 13
+        assert checkpoint["duplicate_groups"] == 2
+
+    def test_unique_index_built_after_scan(self):
+        checkpoint = IntegrityJob(self.db, pause=0).run_once()
+        assert not checkpoint["unique_index"]
+        self.db.books.delete_one({"store_id": "s1", "book_id": "b3"})
+        self.db.books.delete_one({"store_id": "s2", "book_id": "b0"})
+        self.db.books.drop_indexes()
+        checkpoint = IntegrityJob(self.db, pause=0).run_once()
+        assert checkpoint["unique_index"]
+        assert any(
+            index.get("unique") and index["key"] == [("store_id", 1), ("book_id", 1)]
+            for index in self.db.books.index_information().values()
+        )
+
+    def test_skip_with_unique_index(self):
+        self.db.books.delete_many({"store_id": {"$in": ["s1", "s2"]}, "book_id": {"$in": ["b3", "b0"]}})
+        self.db.books.drop_indexes()
+        self.db.books.create_index([("store_id", 1), ("book_id", 1)], unique=True)
+        checkpoint = IntegrityJob(self.db, pause=0).run_once()
+        assert checkpoint["skipped"]
+        assert self.db[JOB_COLLECTION].find_one({"_id": JOB_ID})["status"] == STATUS_COMPLETED
+
+
+def test_readiness():
+    r = requests.get(urljoin(conf.URL, "metrics/ready"))
+    assert r.status_code == 200
+    assert r.json()["ready"]
@@ -1,39 +1,67 @@
-import time
-
-import pytest
-
-from fe.access import auth
-from fe import conf
-
-
-class TestLogin:
-    @pytest.fixture(autouse=True)
-    def pre_run_initialization(self):
-        self.auth = auth.Auth(conf.URL)
-        # register a user
-        self.user_id = "test_login_{}".format(time.time())
-        self.password = "password_" + self.user_id
-        self.terminal = "terminal_" + self.user_id
-        assert self.auth.register(self.user_id, self.password) == 200
-        yield
-
-    def test_ok(self):
-        code, token = self.auth.login(self.user_id, self.password, self.terminal)
-        assert code == 200
-
-        code = self.auth.logout(self.user_id + "_x", token)
-        assert code == 401
-
-        code = self.auth.logout(self.user_id, token + "_x")
-        assert code == 401
-
-        code = self.auth.logout(self.user_id, token)
-        assert code == 200
-
-    def test_error_user_id(self):
-        code, token = self.auth.login(self.user_id + "_x", self.password, self.terminal)
-        assert code == 401
-
-    def test_error_password(self):
-        code, token = self.auth.login(self.user_id, self.password + "_x", self.terminal)
-        assert code == 401
+import time
+
+import pytest
+
+from be.model.store import get_db
+from be.model.user import is_password_hashed
+from fe.access import auth
+from fe import conf
+
+
+class TestLogin:
+    @pytest.fixture(autouse=True)
+    def pre_run_initialization(self):
+        self.auth = auth.Auth(conf.URL)
+        # register a user
+        self.user_id = "test_login_{}".format(time.time())
+        self.password = "password_" + self.user_id
+        self.terminal = "terminal_" + self.user_id
+        assert self.auth.register(self.user_id, self.password) == 200
+        yield
+
+    def test_ok(self):
+        code, token = self.auth.login(self.user_id, self.password, self.terminal)
+        assert code == 200
+
+        code = self.auth.logout(self.user_id + "_x", token)
+        assert code == 401
+
+        code = self.auth.logout(self.user_id, token + "_x")
+        assert code == 401
+
+        code = self.auth.logout(self.user_id, token)
+        assert code == 200
+
+    def test_error_user_id(self):
+        code, token = self.auth.login(self.user_id + "_x", self.password, self.terminal)
+        assert code == 401
+
+    def test_error_password(self):
+        code, token = self.auth.login(self.user_id, self.password + "_x", self.terminal)
+        assert code == 401
+
+    def test_cached_token_invalidated(self):
+        code, token = self.auth.login(self.user_id, self.password, self.terminal)
+        assert code == 200
+        # 重新登录后旧令牌（可能已在缓存中）失效
+        code, new_token = self.auth.login(self.user_id, self.password, self.terminal)
+        assert code == 200
+        assert self.auth.logout(self.user_id, token) == 401
+
+        assert self.auth.logout(self.user_id, new_token) == 200
+        assert self.auth.logout(self.user_id, new_token) == 401
+
+    def test_plaintext_password_migrated(self):
+        user_col = get_db()["user"]
+        assert is_password_hashed(user_col.find_one({"user_id": self.user_id})["password"])
+        # 模拟迁移前的明文记录，首次登录成功后改写为哈希
+        user_col.update_one({"user_id": self.user_id}, {"$set": {"password": self.password}})
+        code, token = self.auth.login(self.user_id, self.password, self.terminal)
+        assert code == 200
+        stored = user_col.find_one({"user_id": self.user_id})["password"]
+        assert is_password_hashed(stored)
+
+        code, token = self.auth.login(self.user_id, self.password, self.terminal)
+        assert code == 200
+        code, token = self.auth.login(self.user_id, self.password + "_x", self.terminal)
+        assert code == 401
@@ -1,58 +1,99 @@
-import pytest
-
-from fe.test.gen_book_data import GenBook
-from fe.access.new_buyer import register_new_buyer
-import uuid
-
-
-class TestNewOrder:
-    @pytest.fixture(autouse=True)
-    def pre_run_initialization(self):
-        self.seller_id = "test_new_order_seller_id_{}".format(str(uuid.uuid1()))
-        self.store_id = "test_new_order_store_id_{}".format(str(uuid.uuid1()))
-        self.buyer_id = "test_new_order_buyer_id_{}".format(str(uuid.uuid1()))
-        self.password = self.seller_id
-        self.buyer = register_new_buyer(self.buyer_id, self.password)
-        self.gen_book = GenBook(self.seller_id, self.store_id)
-        yield
-
-    def test_non_exist_book_id(self):
-        ok, buy_book_id_list = self.gen_book.gen(
-            non_exist_book_id=True, low_stock_level=False
-        )
-        assert ok
-        code, _ = self.buyer.new_order(self.store_id, buy_book_id_list)
-        assert code != 200
-
-    def test_low_stock_level(self):
-        ok, buy_book_id_list = self.gen_book.gen(
-            non_exist_book_id=False, low_stock_level=True
-        )
-        assert ok
-        code, _ = self.buyer.new_order(self.store_id, buy_book_id_list)
-        assert code != 200
-
-    def test_ok(self):
-        ok, buy_book_id_list = self.gen_book.gen(
-            non_exist_book_id=False, low_stock_level=False
-        )
-        assert ok
-        code, _ = self.buyer.new_order(self.store_id, buy_book_id_list)
-        assert code == 200
-
-    def test_non_exist_user_id(self):
-        ok, buy_book_id_list = self.gen_book.gen(
-            non_exist_book_id=False, low_stock_level=False
-        )
-        assert ok
-        self.buyer.user_id = self.buyer.user_id + "_x"
-        code, _ = self.buyer.new_order(self.store_id, buy_book_id_list)
-        assert code != 200
-
-    def test_non_exist_store_id(self):
-        ok, buy_book_id_list = self.gen_book.gen(
-            non_exist_book_id=False, low_stock_level=False
-        )
-        assert ok
-        code, _ = self.buyer.new_order(self.store_id + "_x", buy_book_id_list)
-        assert code != 200
+import pytest
+from concurrent.futures import ThreadPoolExecutor
+
+from be.model.store import get_db
+from fe import conf
+from fe.access.book import BookDB
+from fe.test.gen_book_data import GenBook
+from fe.access.new_buyer import register_new_buyer
+import uuid
+
+
+class TestNewOrder:
+    @pytest.fixture(autouse=True)
+    def pre_run_initialization(self):
+        self.seller_id = "test_new_order_seller_id_{}".format(str(uuid.uuid1()))
+        self.store_id = "test_new_order_store_id_{}".format(str(uuid.uuid1()))
+        self.buyer_id = "test_new_order_buyer_id_{}".format(str(uuid.uuid1()))
+        self.password = self.seller_id
+        self.buyer = register_new_buyer(self.buyer_id, self.password)
+        self.gen_book = GenBook(self.seller_id, self.store_id)
+        yield
+
+    def test_non_exist_book_id(self):
+        ok, buy_book_id_list = self.gen_book.gen(
+            non_exist_book_id=True, low_stock_level=False
+        )
+        assert ok
+        code, _ = self.buyer.new_order(self.store_id, buy_book_id_list)
+        assert code != 200
+
+    def test_low_stock_level(self):
+        ok, buy_book_id_list = self.gen_book.gen(
+            non_exist_book_id=False, low_stock_level=True
+        )
+        assert ok
+        code, _ = self.buyer.new_order(self.store_id, buy_book_id_list)
+        assert code != 200
+
+    def test_ok(self):
+        ok, buy_book_id_list = self.gen_book.gen(
+            non_exist_book_id=False, low_stock_level=False
+        )
+        assert ok
+        code, _ = self.buyer.new_order(self.store_id, buy_book_id_list)
+        assert code == 200
+
+    def test_non_exist_user_id(self):
+        ok, buy_book_id_list = self.gen_book.gen(
+            non_exist_book_id=False, low_stock_level=False
+        )
+        assert ok
+        self.buyer.user_id = self.buyer.user_id + "_x"
+        code, _ = self.buyer.new_order(self.store_id, buy_book_id_list)
+        assert code != 200
+
+    def test_non_exist_store_id(self):
+        ok, buy_book_id_list = self.gen_book.gen(
+            non_exist_book_id=False, low_stock_level=False
+        )
+        assert ok
+        code, _ = self.buyer.new_order(self.store_id + "_x", buy_book_id_list)
+        assert code != 200
+
+    def add_books(self, stock_levels: list) -> list:
+        books = BookDB(conf.Use_Large_DB).get_book_info(0, len(stock_levels))
+        for bk, stock_level in zip(books, stock_levels):
+            code = self.gen_book.seller.add_book(self.store_id, stock_level, bk)
+            assert code == 200
+        return [bk.id for bk in books]
+
+    def stock_levels(self) -> dict:
+        return {
+            b["book_id"]: b["stock_level"]
+            for b in get_db().store.find({"store_id": self.store_id})
+        }
+
+    def test_low_stock_mixed_keeps_stock(self):
+        book_ids = self.add_books([10, 1, 10])
+        before = self.stock_levels()
+        code, _ = self.buyer.new_order(
+            self.store_id, [(book_ids[0], 5), (book_ids[1], 2), (book_ids[2], 5)]
+        )
+        assert code != 200
+        assert self.stock_levels() == before
+
+    def test_concurrent_orders_release_only_reserved(self):
+        # 第一本书只够 5 单，其余两本充足：失败的订单必须回补已扣减的行
+        book_ids = self.add_books([10, 20, 20])
+        order = [(book_ids[0], 2), (book_ids[1], 1), (book_ids[2], 1)]
+        with ThreadPoolExecutor(max_workers=8) as pool:
+            codes = [code for code, _ in pool.map(
+                lambda _: self.buyer.new_order(self.store_id, order), range(8)
+            )]
+        succeeded = codes.count(200)
+        assert succeeded == 5
+        after = self.stock_levels()
+        assert after[book_ids[0]] == 0
+        assert after[book_ids[1]] == 20 - succeeded
+        assert after[book_ids[2]] == 20 - succeeded
@@ -0,0 +1,82 @@
+import pytest
+import uuid
+from pymongo.errors import OperationFailure
+
+from be.model import buyer, transaction
+from be.model.store import get_db
+from fe.test.gen_book_data import GenBook
+from fe.access.new_buyer import register_new_buyer
+
+
+class TestNewOrderTransaction:
+    @pytest.fixture(autouse=True)
+    def pre_run_initialization(self, monkeypatch):
+        # 需要副本集（单节点即可）：mongod --replSet rs0 后执行 rs.initiate()
+        if not transaction.transactions_supported():
+            pytest.skip("MongoDB 未以副本集方式部署，不支持事务")
+        monkeypatch.setattr(transaction, "ORDER_TRANSACTION_ENABLED", True)
+        self.seller_id = "test_txn_order_seller_id_{}".format(str(uuid.uuid1()))
+        self.store_id = "test_txn_order_store_id_{}".format(str(uuid.uuid1()))
+        self.buyer_id = "test_txn_order_buyer_id_{}".format(str(uuid.uuid1()))
+        self.password = self.seller_id
+        self.buyer = register_new_buyer(self.buyer_id, self.password)
+        self.gen_book = GenBook(self.seller_id, self.store_id)
+        self.db = get_db()
+        yield
+
+    def stock_levels(self) -> dict:
+        return {
+            b["book_id"]: b["stock_level"]
+            for b in self.db.store.find({"store_id": self.store_id})
+        }
+
+    def test_ok(self):
+        ok, buy_book_id_list = self.gen_book.gen(
+            non_exist_book_id=False, low_stock_level=False
+        )
+        assert ok
+        before = self.stock_levels()
+        code, order_id = self.buyer.new_order(self.store_id, buy_book_id_list)
+        assert code == 200
+        after = self.stock_levels()
+        for book_id, count in buy_book_id_list:
+            assert after[book_id] == before[book_id] - count
+        assert self.db.new_order.find_one({"order_id": order_id}) is not None
+
+    def test_low_stock_level_rolls_back(self, monkeypatch):
+        ok, buy_book_id_list = self.gen_book.gen(
+            non_exist_book_id=False, low_stock_level=False
+        )
+        assert ok
+        before = self.stock_levels()
+        # 第一行可以扣减，最后一行超出库存；跳过预检查，让失败发生在事务内的批量扣减中
+        first_id, _ = buy_book_id_list[0]
+        last_id, _ = buy_book_id_list[-1]
+        order = [(first_id, 1), (last_id, before[last_id] + 1)]
+        if first_id == last_id:
+            order = [(first_id, before[first_id] + 1)]
+        monkeypatch.setattr(buyer.Buyer, "_check_stock", staticmethod(lambda books, counts: (200, "ok")))
+        code, _ = self.buyer.new_order(self.store_id, order)
+        assert code == 517
+        assert self.stock_levels() == before
+        assert self.db.new_order.find_one({"user_id": self.buyer_id}) is None
+
+    def test_retry_on_transient_error(self):
+        calls = []
+
+        def callback(session):
+            calls.append(1)
+            if len(calls) == 1:
+                raise OperationFailure(
+                    "WriteConflict",
+                    code=transaction.WRITE_CONFLICT_CODE,
+                    details={"errorLabels": ["TransientTransactionError"]}
+                )
+            return "done"
+
+        before = transaction.get_transaction_stats()
+        assert transaction.run_in_transaction(callback) == "done"
+        after = transaction.get_transaction_stats()
+        assert len(calls) == 2
+        assert after["retry_write_conflict"] == before["retry_write_conflict"] + 1
+        assert after["committed"] == before["committed"] + 1
@@ -0,0 +1,98 @@
+import time
+import uuid
+import pytest
+
+from be.model.order import Order, OrderExpiryScheduler, OrderTimerWheel
+from be.model.store import get_db
+from be.utils import ORDER_TIMEOUT
+from fe.test.gen_book_data import GenBook
+from fe.access.new_buyer import register_new_buyer
+
+
+class TestOrderExpiry:
+    @pytest.fixture(autouse=True)
+    def pre_run_initialization(self):
+        self.seller_id = "test_order_expiry_seller_id_{}".format(str(uuid.uuid1()))
+        self.store_id = "test_order_expiry_store_id_{}".format(str(uuid.uuid1()))
+        self.buyer_id = "test_order_expiry_buyer_id_{}".format(str(uuid.uuid1()))
+        self.password = self.seller_id
+        self.buyer = register_new_buyer(self.buyer_id, self.password)
+        gen_book = GenBook(self.seller_id, self.store_id)
+        ok, self.buy_book_id_list = gen_book.gen(
+            non_exist_book_id=False, low_stock_level=False, max_book_count=5
+        )
+        assert ok
+        self.db = get_db()
+        yield
+
+    def stock_levels(self) -> dict:
+        return {
+            b["book_id"]: b["stock_level"]
+            for b in self.db.store.find({"store_id": self.store_id})
+        }
+
+    def make_expired_order(self) -> str:
+        code, order_id = self.buyer.new_order(self.store_id, self.buy_book_id_list)
+        assert code == 200
+        self.db.new_order.update_one(
+            {"order_id": order_id},
+            {"$set": {"create_time": time.time() - ORDER_TIMEOUT - 1}}
+        )
+        return order_id
+
+    def test_sweep_expires_order_and_restores_stock(self):
+        before = self.stock_levels()
+        order_id = self.make_expired_order()
+
+        scheduler = OrderExpiryScheduler(batch_size=1, max_batches=1000)
+        assert scheduler.sweep() >= 1
+
+        order = self.db.new_order.find_one({"order_id": order_id})
+        assert order["status"] == "cancelled"
+        assert self.stock_levels() == before
+        stats = scheduler.stats.snapshot()
+        assert stats["sweeps"] == 1
+        assert stats["expired_total"] >= 1
+
+    def test_paid_order_not_expired(self):
+        order_id = self.make_expired_order()
+        self.db.new_order.update_one({"order_id": order_id}, {"$set": {"status": "paid"}})
+        Order().check_timeout_orders()
+        assert self.db.new_order.find_one({"order_id": order_id})["status"] == "paid"
+
+
+class TestOrderTimerWheel:
+    def test_fires_only_due_orders(self):
+        wheel = OrderTimerWheel(tick=1, slots=8)
+        now = time.time()
+        wheel.add("a", now + 3)
+        wheel.add("b", now + 5)
+        wheel.add("c", now + 3 + 8 * 2)  # 同一槽位，晚两圈
+        assert wheel.advance(now + 2) == []
+        assert wheel.advance(now + 4) == ["a"]
+        assert wheel.advance(now + 6) == ["b"]
+        assert len(wheel) == 1
+        assert wheel.advance(now + 3 + 8 * 2 + 1) == ["c"]
+        assert len(wheel) == 0
+
+    def test_cancel(self):
+        wheel = OrderTimerWheel(tick=1, slots=8)
+        now = time.time()
+        wheel.add("a", now + 3)
+        assert wheel.cancel("a")
+        assert not wheel.cancel("a")
+        assert wheel.advance(now + 10) == []
+
+    def test_failed_chunk_requeued(self, monkeypatch):
+        def fail(self, order_ids, cutoff):
+            raise RuntimeError("db down")
+
+        monkeypatch.setattr(Order, "expire_orders_by_id", fail)
+        wheel = OrderTimerWheel(tick=0.1, slots=64)
+        wheel.add("a", time.time())
+        time.sleep(0.3)
+        scheduler = OrderExpiryScheduler(wheel=wheel, safety_interval=0)
+        assert scheduler.sweep_due() == 0
+        # 取消失败的订单重新放回时间轮，稍后重试
+        assert len(wheel) == 1
+        assert scheduler.stats.snapshot()["errors"] == 1
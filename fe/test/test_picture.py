@@ -0,0 +1,91 @@
+import base64
+import hashlib
+import uuid
+import pytest
+
+from fe import conf
+from fe.access.new_seller import register_new_seller
+from fe.access import book
+from fe.access.picture import Picture
+from be.model.store import get_db
+
+
+class TestPicture:
+    @pytest.fixture(autouse=True)
+    def pre_run_initialization(self):
+        self.seller_id = "test_picture_seller_id_{}".format(str(uuid.uuid1()))
+        self.store_id = "test_picture_store_id_{}".format(str(uuid.uuid1()))
+        self.seller = register_new_seller(self.seller_id, self.seller_id)
+        assert self.seller.create_store(self.store_id) == 200
+        self.picture = Picture(conf.URL)
+
+        # 构造一张带 PNG 文件头的图片，同一本书里引用 3 次，内容只发送一次
+        self.data = b"\x89PNG\r\n\x1a\n" + uuid.uuid4().bytes * 64
+        self.picture_id = hashlib.sha256(self.data).hexdigest()
+        self.book = book.BookDB(conf.Use_Large_DB).get_book_info(0, 1)[0]
+        self.book.pictures = [base64.b64encode(self.data).decode("utf-8")]
+        self.book.picture_ids = [self.picture_id] * 3
+        yield
+
+    def test_pictures_stored_once(self):
+        assert self.seller.add_book(self.store_id, 0, self.book) == 200
+        db = get_db()
+        doc = db.store.find_one({"store_id": self.store_id, "book_id": self.book.id})
+        content = db.catalog.find_one({"_id": doc["catalog_id"]})["book_info"]
+        # 目录中只保存图片 id，图片字节在 GridFS 中只存一份
+        assert "pictures" not in content
+        assert content["picture_ids"] == [self.picture_id] * 3
+        assert db["pictures.files"].count_documents({"_id": self.picture_id}) == 1
+
+    def test_legacy_repeated_pictures(self):
+        # 未给出 picture_ids 时，重复发送的图片仍按顺序生成引用
+        self.book.pictures = self.book.pictures * 3
+        self.book.picture_ids = None
+        assert self.seller.add_book(self.store_id, 0, self.book) == 200
+        db = get_db()
+        doc = db.store.find_one({"store_id": self.store_id, "book_id": self.book.id})
+        content = db.catalog.find_one({"_id": doc["catalog_id"]})["book_info"]
+        assert content["picture_ids"] == [self.picture_id] * 3
+
+    def test_reference_stored_picture(self):
+        assert self.seller.add_book(self.store_id, 0, self.book) == 200
+        # 已存入的图片只需传 sha256 引用；无法解析的引用被丢弃
+        other = book.BookDB(conf.Use_Large_DB).get_book_info(1, 1)[0]
+        other.pictures = []
+        other.picture_ids = [self.picture_id, "0" * 64]
+        assert self.seller.add_book(self.store_id, 0, other) == 200
+        db = get_db()
+        doc = db.store.find_one({"store_id": self.store_id, "book_id": other.id})
+        content = db.catalog.find_one({"_id": doc["catalog_id"]})["book_info"]
+        assert content["picture_ids"] == [self.picture_id]
+
+    def test_get_with_etag(self):
+        assert self.seller.add_book(self.store_id, 0, self.book) == 200
+        r = self.picture.get(self.picture_id)
+        assert r.status_code == 200
+        assert r.content == self.data
+        assert r.headers["Content-Type"] == "image/png"
+        assert "immutable" in r.headers["Cache-Control"]
+
+        r = self.picture.get(self.picture_id, etag=r.headers["ETag"])
+        assert r.status_code == 304
+        assert r.content == b""
+
+    def test_get_range(self):
+        assert self.seller.add_book(self.store_id, 0, self.book) == 200
+        picture_id = self.picture_id
+
+        r = self.picture.get(picture_id, byte_range="bytes=8-23")
+        assert r.status_code == 206
+        assert r.content == self.data[8:24]
+        assert r.headers["Content-Range"] == "bytes 8-23/{}".format(len(self.data))
+
+        r = self.picture.get(picture_id, byte_range="bytes=-16")
+        assert r.status_code == 206
+        assert r.content == self.data[-16:]
+
+        r = self.picture.get(picture_id, byte_range="bytes={}-".format(len(self.data)))
+        assert r.status_code == 416
+
+    def test_non_exist_picture(self):
+        assert self.picture.get("0" * 64).status_code == 404
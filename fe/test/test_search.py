@@ -1,120 +1,224 @@
-import time
-import pytest
-import ast
-from fe.access import search
-from fe import conf
-from be.model.store import get_db, init_database
-
-
-class TestSearch:
-    @pytest.fixture(autouse=True)
-    def init_resources(self):
-        init_database("mongodb://localhost:27017/")
-        self.searcher = search.Search(conf.URL)
-        self.db = get_db()
-        yield
-
-    @pytest.fixture(autouse=True)
-    def prepare_valid_books(self):
-        self.valid_books = list(self.db.books.find({
-            "title": {"$exists": True, "$ne": ""},
-            "tags": {"$exists": True, "$ne": ""},
-            "content": {"$exists": True, "$ne": ""},
-            "id": {"$exists": True},
-            "store_id": {"$exists": True}
-        }).limit(10))
-
-        if len(self.valid_books) == 0:
-            pytest.skip("数据库books集合中无有效图书数据！")
-
-    @pytest.mark.parametrize("search_field", ["title", "tags", "content"])
-    def test_search_by_field(self, search_field):
-        sample_book = self.valid_books[0]
-        book_id = sample_book["id"]
-
-        # 提取关键字
-        if search_field == "tags":
-            try:
-                tags_list = ast.literal_eval(sample_book["tags"])
-                keyword = tags_list[0].strip() if tags_list else ""
-            except:
-                keyword = sample_book["tags"][:6].strip()
-        else:
-            keyword = sample_book[search_field][:6].strip()
-
-        if not keyword:
-            pytest.skip(f"样本图书{search_field}无有效关键字")
-
-        # 执行搜索并容错
-        status, resp = self.searcher.search_books(keyword=keyword)
-        assert status == 200, f"{search_field}搜索失败：{resp}"
-
-        # 确保data和total字段存在
-        assert "data" in resp, f"响应缺少data字段：{resp}"
-        data = resp["data"]
-        assert "total" in data, f"响应data缺少total字段：{data}"
-
-        # 验证结果
-        assert data["total"] >= 1, f"{search_field}搜索无结果"
-        assert book_id in [b["book_id"] for b in data["books"]], "未匹配样本图书"
-
-    def test_search_scope(self):
-        sample_book = self.valid_books[0]
-        keyword = sample_book["title"][:5].strip()
-        target_store = sample_book["store_id"]
-
-        # 全站搜索
-        all_status, all_resp = self.searcher.search_books(keyword=keyword)
-        assert all_status == 200, "全站搜索失败"
-        assert "data" in all_resp and "total" in all_resp["data"], "全站响应结构错误"
-        all_total = all_resp["data"]["total"]
-        assert all_total >= 1, "全站搜索无结果"
-
-        # 指定店铺搜索
-        store_status, store_resp = self.searcher.search_books(
-            keyword=keyword,
-            store_id=target_store
-        )
-        assert store_status == 200, "指定店铺搜索失败"
-        assert "data" in store_resp and "total" in store_resp["data"], "店铺响应结构错误"
-        store_total = store_resp["data"]["total"]
-        assert store_total >= 1, "指定店铺无结果"
-        assert store_total <= all_total, "范围筛选异常"
-        assert all(b["store_id"] == target_store for b in store_resp["data"]["books"]), "店铺匹配错误"
-
-    def test_pagination(self):
-        keyword = "故事"  # 替换为实际高频词
-        page_size = 2
-
-        # 第1页
-        p1_status, p1_resp = self.searcher.search_books(
-            keyword=keyword,
-            page_num=1,
-            page_size=page_size
-        )
-        assert p1_status == 200, "第1页分页失败"
-        assert "data" in p1_resp and "total" in p1_resp["data"], "分页响应结构错误"
-        total = p1_resp["data"]["total"]
-        if total <= page_size:
-            pytest.skip(f"总结果不足2页（共{total}条）")
-
-        # 第2页
-        p2_status, p2_resp = self.searcher.search_books(
-            keyword=keyword,
-            page_num=2,
-            page_size=page_size
-        )
-        assert p2_status == 200, "第2页分页失败"
-
-        # 验证无重复
-        p1_ids = {b["book_id"] for b in p1_resp["data"]["books"]}
-        p2_ids = {b["book_id"] for b in p2_resp["data"]["books"]}
-        assert len(p1_ids & p2_ids) == 0, "分页结果重复"
-
-    def test_no_result(self):
-        random_keyword = f"no_result_{hash(time.time())}"
-        status, resp = self.searcher.search_books(keyword=random_keyword)
-        assert status == 200, "无结果搜索失败"
-        assert "data" in resp and "total" in resp["data"], "无结果响应结构错误"
-        assert resp["data"]["total"] == 0, "无结果搜索异常"
-        assert len(resp["data"]["books"]) == 0, "无结果返回非空列表"
\ No newline at end of file
+import time
+import uuid
+import pytest
+import ast
+from fe.access import search
+from fe.access import book
+from fe.access.new_seller import register_new_seller
+from fe import conf
+from be.model.store import get_db, init_database
+from be.model import search as search_model
+
+
+class TestSearch:
+    @pytest.fixture(autouse=True)
+    def init_resources(self):
+        init_database("mongodb://localhost:27017/")
+        self.searcher = search.Search(conf.URL)
+        self.db = get_db()
+        yield
+
+    @pytest.fixture(autouse=True)
+    def prepare_valid_books(self):
+        self.valid_books = list(self.db.books.find({
+            "title": {"$exists": True, "$ne": ""},
+            "tags": {"$exists": True, "$ne": ""},
+            "content": {"$exists": True, "$ne": ""},
+            "id": {"$exists": True},
+            "store_id": {"$exists": True}
+        }).limit(10))
+
+        if len(self.valid_books) == 0:
+            pytest.skip("数据库books集合中无有效图书数据！")
+
+    @pytest.mark.parametrize("search_field", ["title", "tags", "content"])
+    def test_search_by_field(self, search_field):
+        sample_book = self.valid_books[0]
+        book_id = sample_book["id"]
+
+        # 提取关键字
+        if search_field == "tags":
+            try:
+                tags_list = ast.literal_eval(sample_book["tags"])
+                keyword = tags_list[0].strip() if tags_list else ""
+            except:
+                keyword = sample_book["tags"][:6].strip()
+        else:
+            keyword = sample_book[search_field][:6].strip()
+
+        if not keyword:
+            pytest.skip(f"样本图书{search_field}无有效关键字")
+
+        # 执行搜索并容错
+        status, resp = self.searcher.search_books(keyword=keyword)
+        assert status == 200, f"{search_field}搜索失败：{resp}"
+
+        # 确保data和total字段存在
+        assert "data" in resp, f"响应缺少data字段：{resp}"
+        data = resp["data"]
+        assert "total" in data, f"响应data缺少total字段：{data}"
+
+        # 验证结果
+        assert data["total"] >= 1, f"{search_field}搜索无结果"
+        assert book_id in [b["book_id"] for b in data["books"]], "未匹配样本图书"
+
+    def test_search_scope(self):
+        sample_book = self.valid_books[0]
+        keyword = sample_book["title"][:5].strip()
+        target_store = sample_book["store_id"]
+
+        # 全站搜索
+        all_status, all_resp = self.searcher.search_books(keyword=keyword)
+        assert all_status == 200, "全站搜索失败"
+        assert "data" in all_resp and "total" in all_resp["data"], "全站响应结构错误"
+        all_total = all_resp["data"]["total"]
+        assert all_total >= 1, "全站搜索无结果"
+
+        # 指定店铺搜索
+        store_status, store_resp = self.searcher.search_books(
+            keyword=keyword,
+            store_id=target_store
+        )
+        assert store_status == 200, "指定店铺搜索失败"
+        assert "data" in store_resp and "total" in store_resp["data"], "店铺响应结构错误"
+        store_total = store_resp["data"]["total"]
+        assert store_total >= 1, "指定店铺无结果"
+        assert store_total <= all_total, "范围筛选异常"
+        assert all(b["store_id"] == target_store for b in store_resp["data"]["books"]), "店铺匹配错误"
+
+    def test_pagination(self):
+        keyword = "故事"  # 替换为实际高频词
+        page_size = 2
+
+        # 第1页
+        p1_status, p1_resp = self.searcher.search_books(
+            keyword=keyword,
+            page_num=1,
+            page_size=page_size
+        )
+        assert p1_status == 200, "第1页分页失败"
+        assert "data" in p1_resp and "total" in p1_resp["data"], "分页响应结构错误"
+        total = p1_resp["data"]["total"]
+        if total <= page_size:
+            pytest.skip(f"总结果不足2页（共{total}条）")
+
+        # 第2页
+        p2_status, p2_resp = self.searcher.search_books(
+            keyword=keyword,
+            page_num=2,
+            page_size=page_size
+        )
+        assert p2_status == 200, "第2页分页失败"
+
+        # 验证无重复
+        p1_ids = {b["book_id"] for b in p1_resp["data"]["books"]}
+        p2_ids = {b["book_id"] for b in p2_resp["data"]["books"]}
+        assert len(p1_ids & p2_ids) == 0, "分页结果重复"
+
+    def test_no_result(self):
+        random_keyword = f"no_result_{hash(time.time())}"
+        status, resp = self.searcher.search_books(keyword=random_keyword)
+        assert status == 200, "无结果搜索失败"
+        assert "data" in resp and "total" in resp["data"], "无结果响应结构错误"
+        assert resp["data"]["total"] == 0, "无结果搜索异常"
+        assert len(resp["data"]["books"]) == 0, "无结果返回非空列表"
+
+    def test_result_cached(self):
+        keyword = self.valid_books[0]["title"][:5].strip()
+        status, first = self.searcher.search_books(keyword=keyword, page_size=3)
+        assert status == 200
+        hits = search_model.get_search_cache_stats()["hits"]
+        status, second = self.searcher.search_books(keyword=keyword, page_size=3)
+        assert status == 200
+        assert second == first
+        assert search_model.get_search_cache_stats()["hits"] == hits + 1
+
+    def _wait_total(self, expected: int, timeout: float = 10, **params) -> int:
+        """轮询搜索直到总数达到 expected（MongoDB 搜索路径需等待搜索同步写入 books）"""
+        deadline = time.time() + timeout
+        while True:
+            status, resp = self.searcher.search_books(**params)
+            assert status == 200
+            total = resp["data"]["total"]
+            if total >= expected or time.time() > deadline:
+                return total
+            time.sleep(0.2)
+
+    def test_store_invalidation(self):
+        seller_id = "test_search_seller_{}".format(uuid.uuid1())
+        store_id = "test_search_store_{}".format(uuid.uuid1())
+        seller = register_new_seller(seller_id, seller_id)
+        assert seller.create_store(store_id) == 200
+        # 标题中加入唯一关键字，结果只可能来自本店铺上架的这本书
+        keyword = "zq{}".format(uuid.uuid4().hex[:12])
+        b = book.BookDB(conf.Use_Large_DB).get_book_info(0, 1)[0]
+        b.title = "{} {}".format(b.title, keyword)
+
+        # 上架前的空结果进入缓存（店铺和全站各一条）
+        status, resp = self.searcher.search_books(keyword=keyword, store_id=store_id)
+        assert status == 200 and resp["data"]["total"] == 0
+        status, resp = self.searcher.search_books(keyword=keyword)
+        assert status == 200 and resp["data"]["total"] == 0
+
+        try:
+            # 上架后店铺和全站的缓存都失效，立即能搜到新书
+            assert seller.add_book(store_id, 0, b) == 200
+            assert self._wait_total(1, keyword=keyword, store_id=store_id) == 1
+            assert self._wait_total(1, keyword=keyword) == 1
+        finally:
+            self.db.books.delete_many({"store_id": store_id})
+
+    def test_capped_total(self):
+        keyword = "故事"
+        status, exact = self.searcher.search_books(keyword=keyword, page_size=1)
+        assert status == 200
+        total = exact["data"]["total"]
+        assert exact["data"]["total_capped"] is False
+        if total < 2:
+            pytest.skip(f"结果不足2条（共{total}条）")
+
+        status, capped = self.searcher.search_books(keyword=keyword, page_size=1, total_limit=1)
+        assert status == 200
+        assert capped["data"]["total"] == 1
+        assert capped["data"]["total_capped"] is True
+        assert capped["data"]["total_display"] == "1+"
+        # 当前页不受总数上限影响
+        assert capped["data"]["books"] == exact["data"]["books"]
+
+    def test_cursor_pagination(self):
+        keyword = "故事"
+        page_size = 2
+        status, p1 = self.searcher.search_books(keyword=keyword, page_size=page_size)
+        assert status == 200
+        total = p1["data"]["total"]
+        if total <= page_size:
+            pytest.skip(f"总结果不足2页（共{total}条）")
+        assert p1["data"]["next_cursor"]
+
+        # 游标翻页与 page_num 翻页结果一致
+        status, by_cursor = self.searcher.search_books(
+            keyword=keyword, page_size=page_size, cursor=p1["data"]["next_cursor"]
+        )
+        assert status == 200
+        status, by_page = self.searcher.search_books(keyword=keyword, page_num=2, page_size=page_size)
+        assert [b["book_id"] for b in by_cursor["data"]["books"]] == \
+            [b["book_id"] for b in by_page["data"]["books"]]
+
+        # 游标遍历全部结果，不重复也不遗漏
+        books = list(self.searcher.iter_books(keyword, page_size=max(page_size, total // 5)))
+        assert len(books) == total
+
+    def test_invalid_cursor(self):
+        status, resp = self.searcher.search_books(keyword="故事", cursor="not-a-cursor")
+        assert status == 400
+        status, resp = self.searcher.search_books(keyword="故事", page_num=10 ** 6, page_size=100)
+        assert status == 400
+
+    def test_cursor_engine_mismatch(self):
+        # 游标只能用于生成它的引擎，两种引擎的 _id 含义不同
+        mongo_cursor = search_model.encode_cursor("mongo", {"score": 1.0, "_id": self.valid_books[0]["_id"]})
+        with pytest.raises(ValueError):
+            search_model.run_memory_search("故事", "", 1, 10, cursor=mongo_cursor)
+        memory_cursor = search_model.encode_cursor("memory", {"score": 1.0, "_id": 0})
+        with pytest.raises(ValueError):
+            search_model.run_search(self.db, "故事", "", 1, 10, cursor=memory_cursor)
@@ -0,0 +1,91 @@
+import uuid
+import numpy as np
+import pytest
+
+from fe import conf
+from fe.access import book, search
+from fe.access.new_seller import register_new_seller
+from be.model.search_engine import SearchIndex, tokenize, search_index
+
+
+class TestSearchEngine:
+    @pytest.fixture(autouse=True)
+    def pre_run_initialization(self):
+        self.index = SearchIndex()
+        self.index.add({"store_id": "s1", "id": "1", "title": "三体：地球往事",
+                        "tags": "科幻\n小说\n", "content": "文化大革命", "price": 10})
+        self.index.add({"store_id": "s2", "id": "2", "title": "地球简史",
+                        "tags": "['历史', '科普']", "content": "三体问题", "price": 20})
+        yield
+
+    def test_tokenize(self):
+        assert tokenize("三体：地球 Vol2") == ["三体", "地球", "vol2"]
+        assert tokenize("书") == ["书"]
+
+    def test_substring_match(self):
+        # 中文无需空格分词，标题中间的片段也能命中
+        total, hits = self.index.search("地球往")
+        assert total == 1 and hits[0][2][1] == "1"
+        total, hits = self.index.search("地球")
+        assert total == 2
+        # 标题权重高于正文
+        total, hits = self.index.search("三体")
+        assert [h[2][1] for h in hits] == ["1", "2"]
+
+    def test_single_char(self):
+        # 单字关键字命中长片段中的任意位置
+        assert self.index.search("球")[0] == 2
+        assert self.index.search("事")[0] == 1
+        assert self.index.search("球", store_id="s1")[0] == 1
+
+    def test_load_keeps_newer(self):
+        # 加载开始后由 index_book 写入的新版本，不被之后读到的旧文档覆盖
+        since = len(self.index.meta)
+        self.index.add({"store_id": "s1", "id": "1", "title": "球状闪电", "price": 10})
+        self.index.add({"store_id": "s1", "id": "1", "title": "三体：地球往事", "price": 10}, since=since)
+        assert self.index.search("闪电")[0] == 1
+        assert self.index.search("往事")[0] == 0
+
+    def test_tag_and_store(self):
+        assert self.index.search("科普")[0] == 1
+        assert self.index.search("地球", store_id="s2")[0] == 1
+        assert self.index.search("不存在的词")[0] == 0
+
+    def test_readd_replaces(self):
+        self.index.add({"store_id": "s1", "id": "1", "title": "球状闪电", "price": 10})
+        assert self.index.search("往事")[0] == 0
+        assert self.index.search("闪电")[0] == 1
+        assert len(self.index) == 2
+
+    def test_incremental_from_seller(self):
+        if not search_index.ready:
+            pytest.skip("内存搜索索引尚未加载完成")
+        seller_id = "test_search_engine_seller_{}".format(uuid.uuid1())
+        store_id = "test_search_engine_store_{}".format(uuid.uuid1())
+        seller = register_new_seller(seller_id, seller_id)
+        assert seller.create_store(store_id) == 200
+        b = book.BookDB(conf.Use_Large_DB).get_book_info(0, 1)[0]
+        assert seller.add_book(store_id, 0, b) == 200
+
+        keyword = "".join(tokenize(b.title)[:1])
+        if not keyword:
+            pytest.skip("样本图书标题无可检索的词")
+        status, resp = search.Search(conf.URL).search_books(keyword=keyword, store_id=store_id)
+        assert status == 200
+        assert [x["book_id"] for x in resp["data"]["books"]] == [b.id]
+
+    def test_field_weights(self):
+        # 默认标题权重最高；只看正文时正文含“三体”的书排在前面
+        index = SearchIndex(weights={"content": 1})
+        index.add({"store_id": "s1", "id": "1", "title": "三体", "content": "地球"})
+        index.add({"store_id": "s1", "id": "2", "title": "地球", "content": "三体"})
+        assert [h[2][1] for h in index.search("三体")[1]] == ["2", "1"]
+        index.set_weights({"title": 1})
+        assert [h[2][1] for h in index.search("三体")[1]] == ["1", "2"]
+
+    def test_top_k_ties(self):
+        docs = np.arange(10, dtype=np.uint32)[::-1].copy()
+        scores = np.array([1, 2, 2, 2, 3, 2, 2, 0, 2, 1], dtype=np.float64)
+        top = SearchIndex.top_k(docs, scores, 3)
+        # 分数降序，同分按文档序号升序
+        assert [int(docs[i]) for i in top] == [5, 1, 3]
@@ -0,0 +1,74 @@
+import uuid
+import pytest
+
+from fe import conf
+from fe.access import book
+from fe.access.new_seller import register_new_seller
+from be.model.store import get_db
+from be.model.search_sync import SearchSync, SYNC_COLLECTION, SYNC_SOURCE_FIELD, SYNC_SOURCE
+
+
+class TestSearchSync:
+    @pytest.fixture(autouse=True)
+    def pre_run_initialization(self):
+        self.seller_id = "test_search_sync_seller_{}".format(str(uuid.uuid1()))
+        self.store_id = "test_search_sync_store_{}".format(str(uuid.uuid1()))
+        self.seller = register_new_seller(self.seller_id, self.seller_id)
+        assert self.seller.create_store(self.store_id) == 200
+        self.books = book.BookDB(conf.Use_Large_DB).get_book_info(0, 3)
+        for b in self.books:
+            assert self.seller.add_book(self.store_id, 5, b) == 200
+        self.db = get_db()
+        # 独立的检查点，不推进服务内同步线程的高水位
+        self.sync_id = "test_search_sync_{}".format(str(uuid.uuid1()))
+        self.sync = SearchSync(self.db, mode="poll", settle=0, sync_id=self.sync_id)
+        yield
+        self.db.books.delete_many({"store_id": self.store_id})
+        self.db[SYNC_COLLECTION].delete_one({"_id": self.sync_id})
+
+    def test_sync_to_books(self):
+        self.sync.sync_once()
+        for b in self.books:
+            doc = self.db.books.find_one({"store_id": self.store_id, "book_id": b.id})
+            assert doc is not None
+            assert doc["id"] == b.id
+            assert doc["title"] == b.title
+            assert doc["price"] == (b.price or 0)
+            # 保留目录字段（与原始图书文档结构一致），不含图片，并标记来源
+            assert doc["author"] == b.author and doc["publisher"] == b.publisher
+            assert doc["stock_level"] == 5
+            assert "picture_ids" not in doc and "pictures" not in doc
+            assert doc[SYNC_SOURCE_FIELD] == SYNC_SOURCE
+        stats = self.sync.snapshot()
+        assert stats["synced"] >= len(self.books)
+        assert stats["last_lag_seconds"] is not None and stats["last_lag_seconds"] >= 0
+
+    def test_idempotent(self):
+        rows = list(self.db.store.find({"store_id": self.store_id}))
+        self.sync.apply_rows(rows)
+        self.sync.apply_rows(rows)
+        assert self.db.books.count_documents({"store_id": self.store_id}) == len(self.books)
+
+    def test_high_water_mark(self):
+        self.sync.sync_once()
+        stats = self.sync.snapshot()
+        last = self.db.store.find_one({"store_id": self.store_id}, sort=[("_id", -1)])
+        # 高水位已越过本店铺的全部库存行，之后的轮询不会再次同步这些行
+        assert stats["high_water_mark"] >= str(last["_id"])
+        assert stats["mode"] == "poll"
+        assert stats["freshness_lag_seconds"] >= 0
+
+    def test_catalog_reader_skips_synced(self):
+        # 生成测试数据的 BookDB 不会读到同步写入的店铺图书
+        book_db = book.BookDB(conf.Use_Large_DB)
+        before = book_db.get_book_count()
+        self.sync.apply_rows(list(self.db.store.find({"store_id": self.store_id})))
+        assert book_db.get_book_count() == before
+
+    def test_stock_update_synced(self):
+        rows = list(self.db.store.find({"store_id": self.store_id}))
+        self.sync.apply_rows(rows)
+        self.db.store.update_many({"store_id": self.store_id}, {"$inc": {"stock_level": 2}})
+        self.sync.apply_rows(list(self.db.store.find({"store_id": self.store_id})), "stock")
+        for doc in self.db.books.find({"store_id": self.store_id}):
+            assert doc["stock_level"] == 7
@@ -0,0 +1,58 @@
+import uuid
+
+import pytest
+
+from be.model import user as user_model
+from be.model.revocation import revocation_filter
+from be.model.store import get_db
+from fe.access import auth
+from fe import conf
+
+
+class TestStatelessToken:
+    @pytest.fixture(autouse=True)
+    def pre_run_initialization(self, monkeypatch):
+        # 后端与测试在同一进程中运行，直接切换令牌模式
+        monkeypatch.setattr(user_model, "STATELESS_TOKEN_ENABLED", True)
+        self.auth = auth.Auth(conf.URL)
+        self.user_id = "test_stateless_token_{}".format(str(uuid.uuid1()))
+        self.password = "password_" + self.user_id
+        self.terminal = "terminal_" + self.user_id
+        assert self.auth.register(self.user_id, self.password) == 200
+        yield
+
+    def test_logout_revokes_token(self):
+        code, token = self.auth.login(self.user_id, self.password, self.terminal)
+        assert code == 200
+        # 各终端令牌相互独立
+        code, other_token = self.auth.login(self.user_id, self.password, self.terminal)
+        assert code == 200
+
+        assert self.auth.logout(self.user_id + "_x", token) == 401
+        assert self.auth.logout(self.user_id, token) == 200
+        assert self.auth.logout(self.user_id, token) == 401
+        assert self.auth.logout(self.user_id, other_token) == 200
+
+    def test_password_change_revokes_all(self):
+        code, token = self.auth.login(self.user_id, self.password, self.terminal)
+        assert code == 200
+        assert self.auth.password(self.user_id, self.password, self.password + "_new") == 200
+        assert self.auth.logout(self.user_id, token) == 401
+
+        code, token = self.auth.login(self.user_id, self.password + "_new", self.terminal)
+        assert code == 200
+        assert self.auth.logout(self.user_id, token) == 200
+
+    def test_revocation_reload(self):
+        code, token = self.auth.login(self.user_id, self.password, self.terminal)
+        assert code == 200
+        assert self.auth.logout(self.user_id, token) == 200
+        # 重新加载后吊销记录仍然有效
+        revocation_filter.load(get_db())
+        assert self.auth.logout(self.user_id, token) == 401
+
+    def test_token_from_other_secret(self, monkeypatch):
+        code, token = self.auth.login(self.user_id, self.password, self.terminal)
+        assert code == 200
+        monkeypatch.setattr(user_model, "TOKEN_SECRET", "another_secret")
+        assert self.auth.logout(self.user_id, token) == 401